@@ -19,9 +19,55 @@ class Settings(BaseSettings):
         description="SQLAlchemy connection URL for chat history storage.",
     )
 
+    database_replica_url: str = Field(
+        "", description="Optional read replica URL for read-only endpoints. Empty reads from the primary."
+    )
+    database_replica_lag_seconds: float = Field(
+        5.0, description="Seconds after a write during which reads of the written data use the primary."
+    )
+    database_pool_size: int = Field(10, description="Connections kept open per database engine.")
+    database_max_overflow: int = Field(
+        20, description="Extra connections an engine may open beyond the pool size under load."
+    )
+    database_pool_timeout: float = Field(
+        30.0, description="Seconds to wait for a free database connection before failing."
+    )
+    database_pool_recycle: int = Field(
+        1800, description="Seconds after which pooled connections are replaced (-1 disables)."
+    )
+    database_pool_pre_ping: bool = Field(
+        False, description="Test pooled connections before use to survive server restarts."
+    )
+    sqlite_journal_mode: str = Field(
+        "wal", description="SQLite journal mode; WAL lets readers proceed while a write is in progress."
+    )
+    sqlite_synchronous: str = Field(
+        "normal",
+        description=(
+            "SQLite synchronous level. 'normal' in WAL mode never corrupts the database but may"
+            " lose the latest commits on power loss; use 'full' for strict durability."
+        ),
+    )
+    sqlite_busy_timeout_ms: int = Field(
+        5000, description="Milliseconds SQLite waits for a lock before raising 'database is locked'."
+    )
+    sqlite_mmap_size: int = Field(
+        256 * 1024 * 1024, description="Bytes of the SQLite file memory-mapped for reads (0 disables)."
+    )
+
     vector_store_url: str = Field(
         "qdrant://localhost:6333",
-        description="Connection URL to the vector store used for knowledge base embeddings.",
+        description=(
+            "Connection URL to the vector store used for knowledge base embeddings."
+            " Use local:///path for the embedded file-backed index."
+        ),
+    )
+    local_index_ivf_threshold: int = Field(
+        50_000,
+        description="Point count above which local:// collections build an approximate IVF index.",
+    )
+    local_index_nprobe: int = Field(
+        8, description="Number of IVF lists scanned per query in local:// collections."
     )
 
     groq_api_key: str = Field("", description="API key for Groq LLM + STT services.")
@@ -31,6 +77,215 @@ class Settings(BaseSettings):
     )
     elevenlabs_api_key: str = Field("", description="API key for ElevenLabs text-to-speech streaming.")
 
+    context_token_budget: int = Field(
+        6000, description="Approximate token budget for chat history sent with each completion."
+    )
+    context_min_recent_messages: int = Field(
+        4, description="Number of most recent messages always sent verbatim, regardless of budget."
+    )
+
+    message_write_behind: bool = Field(
+        False, description="Queue message writes for a background writer that group-commits them."
+    )
+    message_group_commit_ms: float = Field(
+        5.0, description="Milliseconds the write-behind writer gathers messages before committing."
+    )
+    message_group_commit_max: int = Field(
+        512, description="Messages after which a write-behind group is committed without waiting."
+    )
+    message_batch_max: int = Field(500, description="Most messages accepted by one batch append request.")
+
+    chat_export_batch_rows: int = Field(
+        500, description="Rows fetched per round trip from the server-side cursor during chat export."
+    )
+    chat_import_batch_size: int = Field(
+        1000, description="Chats and messages inserted per batch (and transaction) during chat import."
+    )
+    chat_import_max_line_bytes: int = Field(
+        8 * 1024 * 1024, description="Longest NDJSON line accepted by chat import, in decompressed bytes."
+    )
+
+    stream_coalesce_ms: int = Field(
+        0, description="Hold streamed tokens for up to this many milliseconds before sending a frame."
+    )
+    stream_coalesce_chars: int = Field(
+        0, description="Send a streamed frame once this many characters are buffered (0 disables)."
+    )
+
+    rag_timeout_ms: int = Field(
+        250, description="Time budget for knowledge retrieval before streaming starts without it."
+    )
+    rag_top_k: int = Field(4, description="Number of knowledge snippets retrieved in RAG mode.")
+
+    knowledge_search_mode: str = Field(
+        "hybrid", description="Default knowledge search ranking: 'dense' or 'hybrid' (dense + BM25 fused)."
+    )
+    knowledge_search_candidates: int = Field(
+        40, description="Candidates fetched per search leg before fusion and diversification."
+    )
+    knowledge_rrf_k: int = Field(60, description="Rank offset k of reciprocal rank fusion.")
+    knowledge_mmr_diversity: float = Field(
+        0.3, description="Weight of novelty versus relevance when MMR diversification is requested."
+    )
+
+    embedding_model: str = Field(
+        "text-embedding-3-large",
+        description="Identifier of the embedding model used for knowledge base vectors.",
+    )
+    embedding_batch_size: int = Field(
+        64, description="Maximum number of texts sent in a single embeddings request."
+    )
+    embedding_batch_max_chars: int = Field(
+        200_000, description="Maximum combined characters of texts sent in a single embeddings request."
+    )
+    embedding_batch_concurrency: int = Field(
+        4, description="Number of embeddings batch requests allowed in flight at once."
+    )
+    vector_upsert_batch_size: int = Field(
+        512, description="Maximum number of points written to the vector store per upsert request."
+    )
+    memory_chunk_tokens: int = Field(
+        512, description="Approximate token budget of each chat memory chunk."
+    )
+    memory_chunk_overlap_tokens: int = Field(
+        64, description="Approximate number of tokens shared between consecutive memory chunks."
+    )
+    embedding_cache_size: int = Field(
+        4096, description="Maximum number of embeddings kept in the in-memory LRU cache."
+    )
+    embedding_cache_path: str = Field(
+        "./embeddings.db",
+        description="SQLite file persisting cached embeddings. Leave empty to disable persistence.",
+    )
+    embedding_cache_disk_entries: int = Field(
+        50_000,
+        description="Embeddings kept in the SQLite tier; least recently used ones are evicted (0 keeps all).",
+    )
+    completion_cache_size: int = Field(
+        1024, description="Completions kept in the exact-match completion cache (0 disables it)."
+    )
+    completion_cache_ttl_seconds: float = Field(
+        3600.0, description="Seconds a cached completion may be replayed."
+    )
+    completion_cache_semantic_threshold: float = Field(
+        0.0,
+        description=(
+            "Cosine similarity above which a single-turn question reuses an earlier answer "
+            "(0 disables the semantic tier)."
+        ),
+    )
+    completion_cache_semantic_size: int = Field(
+        512, description="Single-turn questions indexed by the semantic completion cache."
+    )
+
+    ingest_workers: int = Field(
+        2, description="Background ingestion workers per process (0 leaves jobs to other processes)."
+    )
+    ingest_job_batch_size: int = Field(
+        256, description="Items embedded and upserted between ingestion job progress checkpoints."
+    )
+    ingest_job_lease_seconds: float = Field(
+        60.0, description="Seconds a crashed worker's job stays claimed before another worker resumes it."
+    )
+    ingest_job_max_attempts: int = Field(3, description="Attempts before an ingestion job is marked failed.")
+    ingest_poll_interval: float = Field(
+        2.0, description="Seconds idle workers wait between checks for jobs queued by other processes."
+    )
+    ingest_upload_dir: str = Field(
+        "./uploads",
+        description="Directory spooling uploaded documents until ingested; share it between processes.",
+    )
+    ingest_upload_max_bytes: int = Field(
+        256 * 1024 * 1024, description="Largest document accepted by the knowledge upload endpoint."
+    )
+    ingest_parse_processes: int = Field(
+        2, description="Worker processes parsing and chunking uploaded documents."
+    )
+    ingest_chunk_tokens: int = Field(
+        512, description="Approximate token budget of each uploaded document chunk."
+    )
+    ingest_chunk_overlap_tokens: int = Field(
+        64, description="Approximate number of tokens shared between consecutive document chunks."
+    )
+    ingest_pipeline_depth: int = Field(
+        2, description="Embedded chunk batches allowed to wait for upsert while a document is ingested."
+    )
+
+    groq_base_url: str = Field(
+        "https://api.groq.com/openai/v1",
+        description="Base URL of the Groq OpenAI-compatible API.",
+    )
+    elevenlabs_base_url: str = Field(
+        "https://api.elevenlabs.io",
+        description="Base URL of the ElevenLabs API.",
+    )
+
+    http_http2: bool = Field(True, description="Negotiate HTTP/2 with upstream services when available.")
+    http_max_connections: int = Field(
+        100, description="Maximum number of pooled connections per upstream service."
+    )
+    http_max_keepalive_connections: int = Field(
+        20, description="Maximum number of idle keep-alive connections per upstream service."
+    )
+    http_keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle keep-alive connection is retained before closing."
+    )
+    http_connect_timeout: float = Field(5.0, description="Timeout in seconds for establishing connections.")
+    http_read_timeout: float = Field(
+        120.0, description="Timeout in seconds for reading a chunk of an upstream response."
+    )
+    http_write_timeout: float = Field(30.0, description="Timeout in seconds for sending request bodies.")
+    http_pool_timeout: float = Field(
+        10.0, description="Timeout in seconds for acquiring a connection from the pool."
+    )
+
+    groq_requests_per_second: float = Field(
+        10.0, description="Sustained Groq request rate (0 disables rate limiting)."
+    )
+    groq_burst: int = Field(20, description="Groq requests allowed in a burst above the sustained rate.")
+    groq_max_concurrency: int = Field(16, description="Concurrent Groq requests (0 is unlimited).")
+    elevenlabs_requests_per_second: float = Field(
+        5.0, description="Sustained ElevenLabs request rate (0 disables rate limiting)."
+    )
+    elevenlabs_burst: int = Field(10, description="ElevenLabs requests allowed in a burst.")
+    elevenlabs_max_concurrency: int = Field(
+        4, description="Concurrent ElevenLabs streams (0 is unlimited)."
+    )
+    vector_store_requests_per_second: float = Field(
+        0.0, description="Sustained vector store request rate (0 disables rate limiting)."
+    )
+    vector_store_burst: int = Field(50, description="Vector store requests allowed in a burst.")
+    vector_store_max_concurrency: int = Field(
+        32, description="Concurrent vector store requests (0 is unlimited)."
+    )
+    upstream_max_retries: int = Field(
+        3, description="Retries for rate-limited, timed-out or 5xx upstream requests."
+    )
+    upstream_retry_base_delay: float = Field(
+        0.5, description="Base delay in seconds for jittered exponential retry backoff."
+    )
+    upstream_retry_max_delay: float = Field(20.0, description="Longest backoff between retries in seconds.")
+    upstream_breaker_failures: int = Field(
+        5, description="Consecutive upstream failures that open a provider's circuit breaker."
+    )
+    upstream_breaker_reset_seconds: float = Field(
+        30.0, description="Seconds an open circuit breaker fails fast before probing the provider again."
+    )
+
+    voice_reply_tts_concurrency: int = Field(
+        2, description="Sentences synthesised concurrently by the voice-reply pipeline."
+    )
+    voice_reply_min_sentence_chars: int = Field(
+        20, description="Minimum characters before a sentence is sent to TTS in voice replies."
+    )
+    tts_cache_dir: str = Field(
+        "./tts_cache",
+        description="Directory caching synthesised speech. Leave empty to disable the cache.",
+    )
+    tts_cache_max_bytes: int = Field(
+        512 * 1024 * 1024, description="Maximum total size of the TTS audio cache in bytes."
+    )
+
     allowed_origins: List[str] = Field(
         default_factory=lambda: [
             "http://localhost:5173",
@@ -54,6 +309,32 @@ class Settings(BaseSettings):
         env="SIGNALLING_SECRET",
     )
 
+    realtime_transcription_workers: int = Field(
+        2, description="Concurrent transcriptions per realtime websocket connection."
+    )
+    realtime_max_pending_segments: int = Field(
+        4, description="Speech segments queued per connection before the socket reader waits."
+    )
+    realtime_vad_silence_ms: int = Field(
+        600, description="Trailing silence that ends an utterance in streamed speech."
+    )
+    realtime_max_utterance_ms: int = Field(
+        15_000, description="Longest utterance buffered before it is transcribed regardless of pauses."
+    )
+    realtime_partial_interval_ms: int = Field(
+        1_500, description="Interval between partial transcripts of an ongoing utterance (0 disables)."
+    )
+    signalling_broker_url: str = Field(
+        "memory://",
+        description="Pub/sub broker for signalling rooms: memory://, redis://host:port or unix:///path.",
+    )
+    realtime_send_queue_size: int = Field(
+        256, description="Outbound room frames buffered per websocket before it counts as slow."
+    )
+    realtime_slow_consumer_policy: str = Field(
+        "drop", description="What to do when a websocket's send queue is full: 'drop' frames or 'close' it."
+    )
+
     model_config = SettingsConfigDict(
         env_file=(Path(__file__).resolve().parent.parent / ".env"),
         env_file_encoding="utf-8",
@@ -2,26 +2,117 @@ from __future__ import annotations
 
 """Database session and engine management helpers."""
 
+import time
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import AsyncIterator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
 
 from app.config import get_settings
+from app.services import http_clients
+from app.services.metrics import DB_QUERY_SECONDS
+from app.storage.embedding_cache import close_embedding_cache
+from app.storage.local_index import close_local_indexes
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+BASELINE_REVISION = "0001_baseline"
+# Read-your-writes key covering the chat list; chat-scoped reads use the chat ID.
+CHAT_LIST_KEY = "chats"
 
 Base = declarative_base()
 _engine = None
 _session_factory: async_sessionmaker[AsyncSession] | None = None
+_read_engine = None
+_read_session_factory: async_sessionmaker[AsyncSession] | None = None
+# Key -> monotonic deadline until which reads of that key must use the primary.
+_recent_writes: dict[str, float] = {}
+
+
+class PrimarySession(Session):
+    """Session bound to the primary; commits mark the written data for read-your-writes."""
+
+
+def _build_engine(url: str) -> AsyncEngine:
+    """Create an instrumented engine with pool sizing and SQLite tuning from settings."""
+
+    settings = get_settings()
+    options: dict = {
+        "echo": settings.debug,
+        "future": True,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+    backend = make_url(url)
+    is_sqlite = backend.get_backend_name() == "sqlite"
+    # In-memory SQLite uses a single static connection, which takes no pool sizing.
+    if not (is_sqlite and backend.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+            pool_recycle=settings.database_pool_recycle,
+        )
+    engine = create_async_engine(url, **options)
+    if is_sqlite:
+        _tune_sqlite(engine.sync_engine)
+    _instrument(engine.sync_engine)
+    return engine
+
+
+def _tune_sqlite(engine) -> None:
+    """Apply the configured PRAGMAs to every new SQLite connection."""
+
+    settings = get_settings()
+    pragmas = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+    }
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if value != "":
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
 
 
 def _create_engine() -> None:
-    """Initialise the global SQLAlchemy engine and session factory."""
+    """Initialise the global SQLAlchemy engines and session factories."""
 
-    global _engine, _session_factory
+    global _engine, _session_factory, _read_engine, _read_session_factory
     settings = get_settings()
-    _engine = create_async_engine(settings.database_url, echo=settings.debug, future=True)
-    _session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+    _engine = _build_engine(settings.database_url)
+    _session_factory = async_sessionmaker(
+        _engine, expire_on_commit=False, sync_session_class=PrimarySession
+    )
+    if settings.database_replica_url:
+        _read_engine = _build_engine(settings.database_replica_url)
+        _read_session_factory = async_sessionmaker(_read_engine, expire_on_commit=False)
+
+
+def _instrument(engine) -> None:
+    """Record statement execution time, labelled by SQL verb."""
+
+    # The start time lives on the execution context, which is discarded with
+    # the statement, so a failed statement leaves nothing behind.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            context.query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, "query_started", None)
+        if started is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation)
 
 
 def get_session_factory() -> async_sessionmaker[AsyncSession]:
@@ -34,18 +125,112 @@ def get_session_factory() -> async_sessionmaker[AsyncSession]:
     return _session_factory
 
 
+def get_read_session_factory(key: str | None = None) -> async_sessionmaker[AsyncSession]:
+    """Return the session factory for read-only work on ``key``.
+
+    Reads go to the replica when one is configured, except when ``key`` was
+    written by this process within ``database_replica_lag_seconds``. Those
+    reads use the primary so callers always see their own writes.
+    """
+
+    primary = get_session_factory()
+    if _read_session_factory is None:
+        return primary
+    if key is not None and _recent_writes.get(key, 0.0) > time.monotonic():
+        return primary
+    return _read_session_factory
+
+
+def note_write(*keys: str) -> None:
+    """Route reads of ``keys`` to the primary until the replica has caught up."""
+
+    if _read_session_factory is None:
+        return
+    now = time.monotonic()
+    if len(_recent_writes) > 10_000:
+        for key, deadline in list(_recent_writes.items()):
+            if deadline <= now:
+                del _recent_writes[key]
+    deadline = now + get_settings().database_replica_lag_seconds
+    for key in keys:
+        _recent_writes[key] = deadline
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _collect_written(session: Session, flush_context) -> None:
+    from app.models import Chat, Message
+
+    written = session.info.setdefault("written", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Message):
+            written.add(instance.chat_id)
+        elif isinstance(instance, Chat):
+            written.add(instance.id)
+            if instance in session.new or instance in session.deleted:
+                written.add(CHAT_LIST_KEY)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _note_committed(session: Session) -> None:
+    note_write(*session.info.pop("written", ()))
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _forget_written(session: Session) -> None:
+    session.info.pop("written", None)
+
+
+def run_migrations(connection: Connection) -> None:
+    """Upgrade the schema to the latest Alembic revision on ``connection``.
+
+    Databases created by the former ``metadata.create_all`` bootstrap are
+    stamped at the baseline revision first so later migrations apply cleanly.
+    """
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    tables = set(inspect(connection).get_table_names())
+    if "chats" in tables and "alembic_version" not in tables:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
 @asynccontextmanager
 async def lifespan(app) -> AsyncIterator[None]:
-    """Manage engine lifecycle for FastAPI."""
+    """Manage engine and upstream connection pool lifecycle for FastAPI."""
 
     from app import models  # noqa: F401  # Ensure models are registered with SQLAlchemy metadata.
 
     _create_engine()
+    await http_clients.open_clients()
     try:
         if _engine is not None:
             async with _engine.begin() as connection:
-                await connection.run_sync(Base.metadata.create_all)
+                await connection.run_sync(run_migrations)
+        from app.services import ingestion  # noqa: F401  # Register ingestion job handlers.
+        from app.services.jobs import start_job_workers
+
+        await start_job_workers()
         yield
     finally:
+        from app.services.context import cancel_summary_refreshes
+        from app.services.documents import close_parser_pool
+        from app.services.jobs import stop_job_workers
+        from app.services.message_writer import close_message_writer
+        from app.services.rooms import close_room_manager
+
+        await stop_job_workers()
+        close_parser_pool()
+        await cancel_summary_refreshes()
+        await close_message_writer()
+        await close_room_manager()
+        await http_clients.close_clients()
+        close_embedding_cache()
+        close_local_indexes()
+        if _read_engine is not None:
+            await _read_engine.dispose()
         if _engine is not None:
             await _engine.dispose()
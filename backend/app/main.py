@@ -2,12 +2,17 @@ from __future__ import annotations
 
 """Application entry point."""
 
-from fastapi import FastAPI
+import math
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from app.config import get_settings
 from app.database import lifespan
 from app.routers import chats, knowledge, realtime
+from app.services.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.services.scheduler import UpstreamUnavailableError
 
 settings = get_settings()
 
@@ -21,14 +26,33 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(chats.router)
 app.include_router(knowledge.router)
 app.include_router(realtime.router)
 
 
+@app.exception_handler(UpstreamUnavailableError)
+async def upstream_unavailable(request: Request, exc: UpstreamUnavailableError) -> JSONResponse:
+    """Report throttled or failing upstream providers as a retryable 503."""
+
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
 @app.get("/")
 async def root() -> dict[str, str]:
     """Simple health-check endpoint."""
 
     return {"status": "ok", "name": settings.app_name}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Expose Prometheus metrics."""
+
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -5,7 +5,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -18,13 +18,26 @@ class Chat(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     title: Mapped[str] = mapped_column(String, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+    last_seq: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    summary_seq: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    memory_watermark: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    memory_restart_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    memory_restart_offset: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    memory_chunk_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
 
     messages: Mapped[list[Message]] = relationship(
         "Message",
         back_populates="chat",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
     )
 
 
@@ -32,12 +45,46 @@ class Message(Base):
     """A single message exchanged within a chat."""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_chat_id_seq", "chat_id", "seq", unique=True),
+        Index("ix_messages_chat_id_created_at", "chat_id", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     chat_id: Mapped[str] = mapped_column(String, ForeignKey("chats.id", ondelete="CASCADE"))
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
     role: Mapped[str] = mapped_column(String, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     audio_url: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    token_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
-    chat: Mapped[Chat] = relationship("Chat", back_populates="messages", lazy="selectin")
+    chat: Mapped[Chat] = relationship("Chat", back_populates="messages", lazy="select")
+
+
+class IngestJob(Base):
+    """A durable background job feeding the knowledge base.
+
+    Workers claim a job by taking a time-limited lease. A job whose lease
+    expires (for example because its worker crashed) is claimed again and
+    resumes from ``processed``.
+    """
+
+    __tablename__ = "ingest_jobs"
+    __table_args__ = (Index("ix_ingest_jobs_status_run_after", "status", "run_after"),)
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="queued")
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    total: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    processed: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    run_after: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -2,20 +2,39 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
 import uuid
+from datetime import datetime
+from urllib.parse import quote
 from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.responses import StreamingResponse
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session_factory
+from app.config import get_settings
+from app.database import CHAT_LIST_KEY, get_read_session_factory, get_session_factory, note_write
 from app.models import Chat, Message
 from app.schemas.chat import Chat as ChatSchema
-from app.schemas.chat import ChatCreate, Message as MessageSchema, MessageCreate
-from app.services import llm, voice
+from app.schemas.chat import ChatCreate, ChatImportResult, ChatPage, ChatSummary
+from app.schemas.chat import Message as MessageSchema
+from app.schemas.chat import MessageCreate, MessagePage, MessageSearchHit, MessageSearchPage
+from app.services import chat_archive, llm, message_search, voice
+from app.services.audio_cache import get_audio_cache
+from app.services.context import build_context, schedule_summary_refresh
+from app.services.http_clients import ELEVENLABS, GROQ
+from app.services.message_writer import get_message_writer
+from app.services.messages import MessageDraft, append_message, append_messages
+from app.services.metrics import track_stream
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.scheduler import ensure_available
+from app.services.sse import coalesce, delta_frame, sse_frame
+from app.services.voice_pipeline import split_sentences, synthesise_in_order
+from app.storage.vector_store import search_knowledge
+
+PREVIEW_LENGTH = 160
 
 router = APIRouter(prefix="/chats", tags=["chats"])
 
@@ -28,17 +47,184 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         yield session
 
 
-@router.get("/", response_model=list[ChatSchema])
-async def list_chats(session: AsyncSession = Depends(get_session)) -> list[ChatSchema]:
-    """Return all persisted chats ordered by creation time."""
+async def get_read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """Provide a session for read-only endpoints, on the replica when configured.
 
-    result = await session.execute(
-        select(Chat)
-            .options(selectinload(Chat.messages))
-            .order_by(Chat.created_at.desc())
+    Reads of a chat fall back to the primary shortly after that chat was
+    written; the chat list does so after chats are created or deleted.
+    """
+
+    session_factory = get_read_session_factory(request.path_params.get("chat_id", CHAT_LIST_KEY))
+    async with session_factory() as session:
+        yield session
+
+
+def _parse_cursor(cursor: str | None, size: int) -> list | None:
+    """Decode an optional cursor query parameter, rejecting malformed values."""
+
+    if cursor is None:
+        return None
+    try:
+        values = decode_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+
+@router.get("/", response_model=ChatPage)
+async def list_chats(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_read_session),
+) -> ChatPage:
+    """Return a page of chat summaries, newest first.
+
+    Message counts, the latest message preview and the last activity time are
+    computed in SQL so no message rows are loaded.
+    """
+
+    message_count = (
+        select(func.count(Message.id)).where(Message.chat_id == Chat.id).scalar_subquery()
+    )
+    last_preview = (
+        select(func.substr(Message.content, 1, PREVIEW_LENGTH))
+        .where(Message.chat_id == Chat.id)
+        .order_by(Message.seq.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    last_activity = (
+        select(func.max(Message.created_at)).where(Message.chat_id == Chat.id).scalar_subquery()
+    )
+    query = (
+        select(Chat.id, Chat.title, Chat.created_at, message_count, last_preview, last_activity)
+        .order_by(Chat.created_at.desc(), Chat.id.desc())
+        .limit(limit + 1)
+    )
+    position = _parse_cursor(cursor, 2)
+    if position is not None:
+        try:
+            created_at, chat_id = datetime.fromisoformat(position[0]), str(position[1])
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor") from exc
+        query = query.where(
+            or_(
+                Chat.created_at < created_at,
+                and_(Chat.created_at == created_at, Chat.id < chat_id),
+            )
+        )
+
+    rows = (await session.execute(query)).all()
+    items = [
+        ChatSummary(
+            id=chat_id,
+            title=title,
+            created_at=created_at,
+            message_count=count or 0,
+            last_message_preview=preview,
+            last_activity_at=activity or created_at,
+        )
+        for chat_id, title, created_at, count, preview, activity in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return ChatPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/search", response_model=MessageSearchPage)
+async def search_messages(
+    query: str = Query(..., min_length=1, max_length=500),
+    chat_id: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_read_session),
+) -> MessageSearchPage:
+    """Full-text search over message content, ranked by relevance.
+
+    Words must all match; ``"quoted phrases"`` are matched as phrases. Each hit
+    carries an HTML-escaped excerpt with matches wrapped in ``<mark>`` tags.
+    Pass ``chat_id`` to search a single chat.
+    """
+
+    after = None
+    position = _parse_cursor(cursor, 2)
+    if position is not None:
+        score, message_id = position
+        if not isinstance(score, (int, float)) or not isinstance(message_id, str):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        after = (float(score), message_id)
+
+    try:
+        hits = await message_search.search_messages(
+            session, query, chat_id=chat_id, limit=limit + 1, after=after
+        )
+    except RuntimeError as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    items = [MessageSearchHit(**vars(hit)) for hit in hits[:limit]]
+    next_cursor = None
+    if len(hits) > limit:
+        next_cursor = encode_cursor(items[-1].score, items[-1].id)
+    return MessageSearchPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/export")
+async def export_chats(compression: str = Query("none")) -> StreamingResponse:
+    """Stream every chat and message as NDJSON, optionally gzip or zstd compressed.
+
+    Each chat line (``"type": "chat"``) is followed by its messages
+    (``"type": "message"``) in sequence order. Rows are read from a
+    server-side cursor, so memory stays flat regardless of history size.
+    """
+
+    try:
+        chat_archive.require_codec(compression)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    settings = get_settings()
+    lines = chat_archive.export_ndjson(get_session_factory(), settings.chat_export_batch_rows)
+    filename = f"chats{chat_archive.EXTENSIONS[compression]}"
+    return StreamingResponse(
+        track_stream("/chats/export", chat_archive.compress(lines, compression)),
+        media_type=chat_archive.MEDIA_TYPES[compression],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@router.post("/import", response_model=ChatImportResult)
+async def import_chats(request: Request) -> ChatImportResult:
+    """Import an NDJSON export streamed as the request body.
+
+    gzip and zstd bodies are detected from ``Content-Encoding`` or their magic
+    bytes. Records are inserted in batches as the body arrives, and existing
+    IDs are skipped, so an interrupted import can simply be retried. Skipped
+    records, including messages whose position in their chat is already
+    taken, are counted in the result. Corrupt archives and overlong lines are
+    rejected with 400.
+    """
+
+    settings = get_settings()
+    lines = chat_archive.iter_lines(
+        chat_archive.decompress(request.stream(), request.headers.get("content-encoding")),
+        settings.chat_import_max_line_bytes,
+    )
+    try:
+        result = await chat_archive.import_ndjson(
+            get_session_factory(), lines, settings.chat_import_batch_size
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    finally:
+        note_write(CHAT_LIST_KEY)
+    return ChatImportResult(
+        chats=result.chats,
+        messages=result.messages,
+        skipped_chats=result.skipped_chats,
+        skipped_messages=result.skipped_messages,
     )
-    chats = result.scalars().all()
-    return [ChatSchema.from_orm(chat) for chat in chats]
 
 
 @router.post("/", response_model=ChatSchema)
@@ -49,7 +235,7 @@ async def create_chat(payload: ChatCreate, session: AsyncSession = Depends(get_s
     session.add(chat)
     await session.commit()
     await session.refresh(chat)
-    return ChatSchema.from_orm(chat)
+    return ChatSchema(id=chat.id, title=chat.title, created_at=chat.created_at)
 
 
 @router.delete("/{chat_id}", status_code=204, response_class=Response)
@@ -64,80 +250,304 @@ async def delete_chat(chat_id: str, session: AsyncSession = Depends(get_session)
     return Response(status_code=204)
 
 
+async def _write_messages(
+    session: AsyncSession, chat_id: str, drafts: list[MessageDraft]
+) -> list[Message]:
+    """Persist ``drafts`` through the write-behind writer or directly."""
+
+    writer = get_message_writer()
+    if writer is not None:
+        messages = await writer.submit(chat_id, drafts)
+    else:
+        messages = await append_messages(session, chat_id, drafts)
+        if messages is not None:
+            await session.commit()
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    return messages
+
+
 @router.post("/{chat_id}/messages", response_model=MessageSchema)
 async def post_message(
     chat_id: str, payload: MessageCreate, session: AsyncSession = Depends(get_session)
 ) -> MessageSchema:
     """Persist a message belonging to a chat."""
 
-    chat = await session.get(Chat, chat_id)
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    message = Message(
-        id=str(uuid.uuid4()),
-        chat_id=chat_id,
-        role=payload.role,
-        content=payload.content,
-        audio_url=payload.audio_url,
+    (message,) = await _write_messages(
+        session, chat_id, [MessageDraft(payload.role, payload.content, audio_url=payload.audio_url)]
     )
-    session.add(message)
-    await session.commit()
-    await session.refresh(message)
     return MessageSchema.from_orm(message)
 
 
-@router.get("/{chat_id}/messages", response_model=list[MessageSchema])
-async def list_messages(
-    chat_id: str, session: AsyncSession = Depends(get_session)
+@router.post("/{chat_id}/messages:batch", response_model=list[MessageSchema])
+async def post_messages(
+    chat_id: str, payload: list[MessageCreate], session: AsyncSession = Depends(get_session)
 ) -> list[MessageSchema]:
-    """Return all messages for the specified chat ordered chronologically."""
+    """Append several messages to a chat in order, in a single transaction."""
+
+    if not payload:
+        raise HTTPException(status_code=400, detail="At least one message is required")
+    limit = get_settings().message_batch_max
+    if len(payload) > limit:
+        raise HTTPException(status_code=400, detail=f"At most {limit} messages per batch")
+    drafts = [MessageDraft(item.role, item.content, audio_url=item.audio_url) for item in payload]
+    messages = await _write_messages(session, chat_id, drafts)
+    return [MessageSchema.from_orm(message) for message in messages]
+
+
+@router.get("/{chat_id}/messages", response_model=MessagePage)
+async def list_messages(
+    chat_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_read_session),
+) -> MessagePage:
+    """Return a page of messages for the specified chat ordered chronologically."""
 
     chat = await session.get(Chat, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    result = await session.execute(
-        select(Message).where(Message.chat_id == chat_id).order_by(Message.created_at)
+    query = (
+        select(Message)
+        .where(Message.chat_id == chat_id)
+        .order_by(Message.seq)
+        .limit(limit + 1)
     )
-    messages = result.scalars().all()
-    return [MessageSchema.from_orm(message) for message in messages]
+    position = _parse_cursor(cursor, 1)
+    if position is not None:
+        if not isinstance(position[0], int):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        query = query.where(Message.seq > position[0])
+
+    messages = (await session.execute(query)).scalars().all()
+    items = [MessageSchema.from_orm(message) for message in messages[:limit]]
+    next_cursor = None
+    if len(messages) > limit:
+        next_cursor = encode_cursor(items[-1].seq)
+    return MessagePage(items=items, next_cursor=next_cursor)
+
+
+async def _save_reply(chat_id: str, message_id: str, content: str) -> None:
+    """Persist an assembled assistant reply in a single transaction."""
+
+    writer = get_message_writer()
+    if writer is not None:
+        await writer.submit(chat_id, [MessageDraft("assistant", content, id=message_id)])
+        return
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        if await append_message(session, chat_id, "assistant", content, message_id=message_id):
+            await session.commit()
 
 
 @router.post("/{chat_id}/stream")
-async def stream_completion(chat_id: str, session: AsyncSession = Depends(get_session)) -> StreamingResponse:
-    """Stream a completion from the LLM for the specified chat."""
+async def stream_completion(
+    chat_id: str,
+    coalesce_ms: int | None = Query(None, ge=0, le=1000),
+    coalesce_chars: int | None = Query(None, ge=0, le=65536),
+    rag: bool = False,
+    cache: bool = False,
+    session: AsyncSession = Depends(get_session),
+) -> StreamingResponse:
+    """Stream a completion from the LLM for the specified chat.
+
+    Each frame is ``data: {"d": "<text>"}``; tokens may be coalesced by time or
+    size. Once the reply is complete it is saved as an assistant message and a
+    final ``event: done`` frame carries its ID.
+
+    With ``rag`` enabled the latest user turn is searched in the knowledge base
+    while the history loads. Retrieval must finish within ``rag_timeout_ms``;
+    otherwise generation starts without snippets. An initial ``event: meta``
+    frame reports the outcome and the snippets used.
+
+    Pass ``cache=true`` to answer from the completion cache when the same
+    prompt was completed recently. It is off by default so that regenerating
+    a reply asks the model again.
+    """
 
     chat = await session.get(Chat, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    await session.refresh(chat)
-    await session.refresh(chat, attribute_names=["messages"])
-    history: list[dict[str, str]] = [
-        {"role": message.role, "content": message.content}
-        for message in sorted(chat.messages, key=lambda m: m.created_at)
-    ]
+    ensure_available(GROQ)
+    settings = get_settings()
+    retrieval: asyncio.Task | None = None
+    started = time.monotonic()
+    if rag:
+        latest_turn = await session.scalar(
+            select(Message.content)
+            .where(Message.chat_id == chat_id, Message.role == "user")
+            .order_by(Message.seq.desc())
+            .limit(1)
+        )
+        if latest_turn:
+            retrieval = asyncio.create_task(search_knowledge(latest_turn, settings.rag_top_k))
+
+    # Cancel retrieval if anything below fails or the request goes away first.
+    try:
+        context = await build_context(session, chat)
+        if context.summary_stale:
+            assert context.first_verbatim_seq is not None
+            schedule_summary_refresh(chat_id, context.first_verbatim_seq - 1)
+        history = context.messages
+
+        snippets: list[str] = []
+        meta: dict | None = None
+        if rag:
+            status = "skipped"
+            used = []
+            if retrieval is not None:
+                remaining = settings.rag_timeout_ms / 1000 - (time.monotonic() - started)
+                try:
+                    used = await asyncio.wait_for(retrieval, max(remaining, 0))
+                    status = "ok"
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                except Exception:  # noqa: BLE001 - retrieval is best effort
+                    status = "error"
+            snippets = [f"{item.title}: {item.text}" for item in used]
+            meta = {
+                "rag": {
+                    "status": status,
+                    "elapsed_ms": round((time.monotonic() - started) * 1000),
+                    "snippets": [
+                        {"id": item.id, "title": item.title, "source": item.source} for item in used
+                    ],
+                }
+            }
+    finally:
+        if retrieval is not None:
+            retrieval.cancel()
+            if retrieval.done() and not retrieval.cancelled():
+                retrieval.exception()  # Mark a failed search as retrieved.
+
+    max_delay = (coalesce_ms if coalesce_ms is not None else settings.stream_coalesce_ms) / 1000
+    max_chars = coalesce_chars if coalesce_chars is not None else settings.stream_coalesce_chars
 
     async def token_stream() -> AsyncIterator[str]:
-        async for chunk in llm.generate_response(history):
-            yield f"data: {chunk}\n\n"
-
-    return StreamingResponse(token_stream(), media_type="text/event-stream")
+        if meta is not None:
+            yield sse_frame(meta, event="meta")
+        parts: list[str] = []
+        deltas = llm.generate_response(
+            history, knowledge_snippets=snippets or None, cache=cache
+        )
+        async for piece in coalesce(deltas, max_delay, max_chars):
+            parts.append(piece)
+            yield delta_frame(piece)
+
+        message_id = str(uuid.uuid4())
+        reply = "".join(parts)
+        if reply:
+            await _save_reply(chat_id, message_id, reply)
+        yield sse_frame({"id": message_id if reply else None}, event="done")
+
+    return StreamingResponse(
+        track_stream("/chats/{chat_id}/stream", token_stream()), media_type="text/event-stream"
+    )
 
 
 @router.post("/{chat_id}/speak")
 async def speak_message(
-    chat_id: str, payload: MessageCreate, session: AsyncSession = Depends(get_session)
+    chat_id: str,
+    payload: MessageCreate,
+    voice_id: str = voice.DEFAULT_VOICE_ID,
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    """Stream ElevenLabs audio for the provided text payload.
+
+    Audio is cached on disk by (text, voice, settings). Replays are served from
+    the cached file with HTTP Range support and no upstream call.
+    """
+
+    chat = await session.get(Chat, chat_id)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    headers = {"Content-Disposition": f"inline; filename=chat-{chat_id}.mp3"}
+    voice_settings = voice.DEFAULT_VOICE_SETTINGS
+    audio = voice.stream_tts(payload.content, voice_id=voice_id, voice_settings=voice_settings)
+
+    cache = get_audio_cache()
+    if cache is not None:
+        key = cache.key(payload.content, voice_id, voice_settings)
+        cached = cache.lookup(key)
+        if cached is not None:
+            await audio.aclose()
+            return FileResponse(cached, media_type="audio/mpeg", headers=headers)
+        audio = cache.stream_and_store(key, audio)
+
+    ensure_available(ELEVENLABS)
+    return StreamingResponse(
+        track_stream("/chats/{chat_id}/speak", audio), media_type="audio/mpeg", headers=headers
+    )
+
+
+@router.post("/{chat_id}/voice-reply")
+async def voice_reply(
+    chat_id: str,
+    audio: UploadFile = File(...),
+    voice_id: str = voice.DEFAULT_VOICE_ID,
+    session: AsyncSession = Depends(get_session),
 ) -> StreamingResponse:
-    """Stream ElevenLabs audio for the provided text payload."""
+    """Answer a spoken turn with streamed speech.
+
+    The upload is transcribed and saved as a user message. The reply is then
+    streamed from the LLM, and each sentence is sent to TTS as soon as it
+    completes while later sentences are still being generated. MP3 chunks are
+    returned in sentence order. The transcript is echoed in the URL-encoded
+    ``X-Transcript`` header and the full reply is saved when the stream ends.
+    """
 
     chat = await session.get(Chat, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    async def audio_stream() -> AsyncIterator[bytes]:
-        async for audio_chunk in voice.stream_tts(payload.content):
-            yield audio_chunk
+    # Both upstreams are needed; fail before transcribing rather than mid-stream.
+    ensure_available(GROQ)
+    ensure_available(ELEVENLABS)
+    audio_bytes = await audio.read()
+    transcript = (
+        await llm.transcribe_audio(audio_bytes, mime_type=audio.content_type or "audio/webm")
+    ).strip()
+    if not transcript:
+        raise HTTPException(status_code=422, detail="No speech detected in the uploaded audio")
 
-    headers = {"Content-Disposition": f"inline; filename=chat-{chat_id}.mp3"}
-    return StreamingResponse(audio_stream(), media_type="audio/mpeg", headers=headers)
+    await _write_messages(session, chat_id, [MessageDraft("user", transcript)])
+
+    context = await build_context(session, chat)
+    if context.summary_stale:
+        assert context.first_verbatim_seq is not None
+        schedule_summary_refresh(chat_id, context.first_verbatim_seq - 1)
+    history = context.messages
+
+    settings = get_settings()
+    parts: list[str] = []
+
+    async def reply_deltas() -> AsyncIterator[str]:
+        async for delta in llm.generate_response(history):
+            parts.append(delta)
+            yield delta
+
+    async def audio_stream() -> AsyncIterator[bytes]:
+        sentences = split_sentences(reply_deltas(), settings.voice_reply_min_sentence_chars)
+        async for chunk in synthesise_in_order(
+            sentences,
+            lambda sentence: voice.stream_tts(sentence, voice_id=voice_id),
+            settings.voice_reply_tts_concurrency,
+        ):
+            yield chunk
+
+        reply = "".join(parts)
+        if reply:
+            await _save_reply(chat_id, str(uuid.uuid4()), reply)
+
+    headers = {
+        "Content-Disposition": f"inline; filename=chat-{chat_id}-reply.mp3",
+        "X-Transcript": quote(transcript),
+    }
+    return StreamingResponse(
+        track_stream("/chats/{chat_id}/voice-reply", audio_stream()),
+        media_type="audio/mpeg",
+        headers=headers,
+    )
@@ -2,19 +2,53 @@
 
 from __future__ import annotations
 
+import json
 import uuid
-from typing import AsyncIterator
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.database import get_session_factory
-from app.models import Chat
-from app.schemas.knowledge import KnowledgeItem, KnowledgeItemCreate
-from app.storage.vector_store import VectorStoreClient, create_knowledge_item, embed_text
+from app.models import Chat, IngestJob
+from app.schemas.knowledge import (
+    IngestJobStatus,
+    KnowledgeBatchSearch,
+    KnowledgeFilter,
+    KnowledgeItem,
+    KnowledgeItemCreate,
+)
+from app.services import documents, ingestion, jobs, uploads
+from app.storage.embedding_cache import get_embedding_cache
+from app.storage import vector_store
+from app.storage.vector_store import create_knowledge_item
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
 
+# The form accepted by ``POST /knowledge/upload``, which parses its body itself.
+_UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "title": {"type": "string"},
+                        "tags": {"type": "array", "items": {"type": "string"}},
+                        "source": {"type": "string"},
+                    },
+                }
+            }
+        },
+    }
+}
+
 
 async def get_session() -> AsyncIterator[AsyncSession]:
     """Provide a scoped async SQLAlchemy session."""
@@ -24,6 +58,26 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         yield session
 
 
+def _job_status(job: IngestJob) -> IngestJobStatus:
+    return IngestJobStatus(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        total=job.total,
+        processed=job.processed,
+        error=job.error,
+        result=json.loads(job.result) if job.result else None,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _accepted(job: IngestJob, response: Response) -> IngestJobStatus:
+    response.headers["Location"] = f"/knowledge/jobs/{job.id}"
+    return _job_status(job)
+
+
 @router.post("/", response_model=KnowledgeItem)
 async def upsert_item(payload: KnowledgeItemCreate) -> KnowledgeItem:
     """Create or update a knowledge item in the vector store."""
@@ -32,28 +86,133 @@ async def upsert_item(payload: KnowledgeItemCreate) -> KnowledgeItem:
     return await create_knowledge_item(payload, item_id)
 
 
+@router.post("/bulk", status_code=202, response_model=IngestJobStatus)
+async def bulk_upsert_items(payload: list[KnowledgeItemCreate], response: Response) -> IngestJobStatus:
+    """Queue many knowledge items for batched embedding and upsert.
+
+    Returns ``202 Accepted`` with the job; poll ``GET /knowledge/jobs/{id}``
+    (also given in ``Location``) for progress and the stored item IDs.
+    """
+
+    job = await ingestion.submit_bulk_ingest(payload)
+    return _accepted(job, response)
+
+
+@router.post("/upload", status_code=202, response_model=IngestJobStatus, openapi_extra=_UPLOAD_FORM)
+async def upload_document(request: Request, response: Response) -> IngestJobStatus:
+    """Ingest a text, Markdown, HTML or PDF document as overlapping knowledge chunks.
+
+    The multipart body is parsed as it arrives and the ``file`` part is
+    written straight to disk. Uploads over ``ingest_upload_max_bytes`` are
+    refused from ``Content-Length`` or as soon as the limit is crossed.
+    Parsing and chunking run in worker processes. Returns ``202 Accepted``
+    with the job, whose result reports the document ID and chunk count.
+    """
+
+    settings = get_settings()
+    max_bytes = settings.ingest_upload_max_bytes
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_bytes + uploads.FORM_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Documents are limited to {max_bytes} bytes")
+
+    try:
+        upload = await uploads.receive_file(
+            request.stream(),
+            request.headers.get("content-type"),
+            Path(settings.ingest_upload_dir).resolve(),
+            "file",
+            max_bytes,
+        )
+    except uploads.UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    fields = upload.fields
+    kind = documents.detect_kind(upload.filename, upload.content_type)
+    if kind is None or not documents.supports(kind):
+        upload.path.unlink(missing_ok=True)
+        if kind is None:
+            raise HTTPException(status_code=415, detail="Upload a .txt, .md, .html or .pdf document")
+        raise HTTPException(status_code=501, detail="PDF uploads require the 'pdf' extra")
+
+    job = await ingestion.submit_document(
+        upload.path,
+        kind=kind,
+        title=(fields.get("title") or [""])[0] or Path(upload.filename or "").stem or "Document",
+        tags=fields.get("tags", []),
+        source=(fields.get("source") or [None])[0],
+    )
+    return _accepted(job, response)
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobStatus)
+async def get_ingest_job(job_id: str) -> IngestJobStatus:
+    """Report the progress of a background ingestion job."""
+
+    job = await jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_status(job)
+
+
 @router.get("/search", response_model=list[KnowledgeItem])
-async def search_knowledge(query: str) -> list[KnowledgeItem]:
-    """Search the vector store for items similar to the provided query."""
+async def search_items(
+    query: str,
+    limit: int = Query(4, ge=1, le=100),
+    tags: list[str] = Query([]),
+    source: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    mode: Literal["dense", "hybrid"] | None = None,
+    mmr: bool = False,
+) -> list[KnowledgeItem]:
+    """Search the knowledge base, optionally filtered by tags, source and creation date.
+
+    ``hybrid`` mode (the default) fuses vector similarity with BM25 keyword
+    relevance; ``mmr`` trades some relevance for less redundant results.
+    """
+
+    filters = KnowledgeFilter(
+        tags=tags, source=source, created_after=created_after, created_before=created_before
+    )
+    return await vector_store.search_knowledge(query, limit, filters, mode=mode, mmr=mmr)
+
 
-    vector = await embed_text(query)
-    client = VectorStoreClient()
-    results = await client.query(vector)
-    await client.close()
-    return results
+@router.post("/search/batch", response_model=list[list[KnowledgeItem]])
+async def search_knowledge_batch(payload: KnowledgeBatchSearch) -> list[list[KnowledgeItem]]:
+    """Answer several searches at once; results are returned in query order.
+
+    Queries are embedded together and sent to the vector store as one batch
+    request, so multi-question retrieval costs a single round trip. Without
+    ``mode`` the configured ``knowledge_search_mode`` applies, as for
+    ``GET /knowledge/search``.
+    """
+
+    return await vector_store.search_knowledge_many(
+        payload.queries, payload.limit, payload, mode=payload.mode, mmr=payload.mmr
+    )
 
 
-@router.post("/chat/{chat_id}/remember")
-async def remember_chat(chat_id: str, session: AsyncSession = Depends(get_session)) -> KnowledgeItem:
-    """Persist all messages from a chat as a single knowledge item."""
+@router.get("/cache/stats")
+async def embedding_cache_stats() -> dict[str, int]:
+    """Return hit/miss counters for the embedding cache."""
+
+    return get_embedding_cache().stats.as_dict()
+
+
+@router.post("/chat/{chat_id}/remember", status_code=202, response_model=IngestJobStatus)
+async def remember_chat(
+    chat_id: str, response: Response, session: AsyncSession = Depends(get_session)
+) -> IngestJobStatus:
+    """Queue memorisation of new chat messages as overlapping knowledge chunks.
+
+    Returns ``202 Accepted`` with the job; its result lists the chunk IDs
+    written once it succeeds.
+    """
 
     chat = await session.get(Chat, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
-    await session.refresh(chat, attribute_names=["messages"])
-    aggregated = "\n".join(message.content for message in chat.messages)
-    item = await create_knowledge_item(
-        KnowledgeItemCreate(title=f"Chat memory {chat_id}", text=aggregated, tags=["memory"], source="chat"),
-        item_id=str(uuid.uuid4()),
-    )
-    return item
+    job = await ingestion.submit_chat_memory(chat_id)
+    return _accepted(job, response)
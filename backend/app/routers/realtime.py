@@ -2,12 +2,23 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+import asyncio
+import json
+import logging
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 
 from app.config import get_settings
+from app.services.metrics import STREAMS_IN_FLIGHT
+from app.services.rooms import RoomConnection, get_room_manager
+from app.services.speech_stream import SpeechStream
+from app.services.vad import EnergyVAD
 
 router = APIRouter(prefix="/realtime", tags=["realtime"])
 
+logger = logging.getLogger(__name__)
+
 
 async def validate_secret(secret: str | None) -> None:
     """Validate an optional shared secret for websocket clients."""
@@ -18,14 +29,113 @@ async def validate_secret(secret: str | None) -> None:
 
 
 @router.websocket("/signalling")
-async def signalling_socket(websocket: WebSocket, secret: str | None = None):
-    """Echo websocket that validates an optional secret."""
+async def signalling_socket(
+    websocket: WebSocket,
+    secret: str | None = None,
+    sample_rate: int = Query(16_000, ge=8_000, le=48_000),
+    frame_ms: int = Query(30, ge=10, le=100),
+    room: str | None = None,
+):
+    """Signalling websocket that also transcribes streamed speech.
+
+    Without ``room`` text frames are echoed back. With ``room`` they are
+    broadcast to every other participant of that room, on any worker, as
+    ``room.message`` envelopes. ``{"type": "audio.end"}`` is never relayed; it
+    finalises the current utterance. Binary frames carry mono 16-bit
+    little-endian PCM at ``sample_rate``. They are segmented into utterances
+    by a voice-activity detector working on ``frame_ms`` frames, and each
+    segment is transcribed concurrently. ``transcript`` messages (partial and final) are sent back
+    as JSON as soon as they are ready.
+    """
 
     await validate_secret(secret)
     await websocket.accept()
+    with STREAMS_IN_FLIGHT.track("/realtime/signalling"):
+        await _serve_signalling(websocket, sample_rate, frame_ms, room)
+
+
+async def _serve_signalling(
+    websocket: WebSocket, sample_rate: int, frame_ms: int, room: str | None
+) -> None:
+    """Run the receive loop for an accepted signalling websocket."""
+
+    settings = get_settings()
+    send_lock = asyncio.Lock()
+
+    async def send_json(message: dict[str, Any]) -> None:
+        async with send_lock:
+            await websocket.send_text(json.dumps(message))
+
+    speech = SpeechStream(
+        send_json,
+        EnergyVAD(
+            sample_rate=sample_rate,
+            frame_ms=frame_ms,
+            end_silence_ms=settings.realtime_vad_silence_ms,
+            max_utterance_ms=settings.realtime_max_utterance_ms,
+            partial_interval_ms=settings.realtime_partial_interval_ms,
+        ),
+        workers=settings.realtime_transcription_workers,
+        max_pending=settings.realtime_max_pending_segments,
+    )
+    rooms = None
+    connection = None
+    if room:
+        rooms = await get_room_manager()
+        connection = RoomConnection(
+            websocket,
+            send_lock,
+            max_queue=settings.realtime_send_queue_size,
+            policy=settings.realtime_slow_consumer_policy,
+        )
+        await rooms.join(room, connection)
     try:
         while True:
-            payload = await websocket.receive_text()
-            await websocket.send_text(payload)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                await speech.feed(message["bytes"])
+                continue
+            payload = message.get("text")
+            if payload is None:
+                continue
+            if _is_audio_end(payload):
+                await speech.flush()
+                continue
+            if rooms is not None:
+                try:
+                    await rooms.broadcast(room, _decode_text(payload), sender=connection)
+                except Exception as exc:  # noqa: BLE001 - reported to the sender, socket stays open
+                    logger.warning("Room broadcast to %r failed: %s", room, exc)
+                    await send_json({"type": "error", "detail": "Room broadcast failed"})
+                continue
+            async with send_lock:
+                await websocket.send_text(payload)
     except WebSocketDisconnect:
-        return
+        pass
+    finally:
+        if rooms is not None and connection is not None:
+            await rooms.leave(room, connection)
+            await connection.close()
+        await speech.close(drain=False)
+
+
+def _is_audio_end(payload: str) -> bool:
+    """Return whether a text frame asks to finalise the current utterance."""
+
+    if '"audio.end"' not in payload:
+        return False
+    try:
+        return json.loads(payload).get("type") == "audio.end"
+    except (ValueError, AttributeError):
+        return False
+
+
+def _decode_text(payload: str) -> Any:
+    """Return a text frame as JSON when possible so it is not double encoded."""
+
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return payload
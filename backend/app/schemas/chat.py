@@ -24,6 +24,7 @@ class Message(MessageBase):
     """Schema returned when reading messages from the API."""
 
     id: str
+    seq: int
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -47,3 +48,56 @@ class Chat(ChatBase):
     messages: list[Message] = Field(default_factory=list)
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ChatSummary(ChatBase):
+    """Lightweight chat listing entry with aggregate message details."""
+
+    id: str
+    created_at: datetime
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
+    last_activity_at: datetime
+
+
+class ChatPage(BaseModel):
+    """A page of chat summaries with a cursor for the next page."""
+
+    items: list[ChatSummary]
+    next_cursor: Optional[str] = None
+
+
+class MessagePage(BaseModel):
+    """A page of chronologically ordered messages with a cursor for the next page."""
+
+    items: list[Message]
+    next_cursor: Optional[str] = None
+
+
+class MessageSearchHit(BaseModel):
+    """A message matching a full-text search; the snippet is HTML-escaped with matches in ``<mark>``."""
+
+    id: str
+    chat_id: str
+    chat_title: str
+    seq: int
+    role: str
+    created_at: datetime
+    snippet: str
+    score: float
+
+
+class MessageSearchPage(BaseModel):
+    """A page of search hits, best match first, with a cursor for the next page."""
+
+    items: list[MessageSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class ChatImportResult(BaseModel):
+    """Number of chats and messages inserted by an import, and of duplicates skipped."""
+
+    chats: int
+    messages: int
+    skipped_chats: int = 0
+    skipped_messages: int = 0
@@ -3,7 +3,7 @@ from __future__ import annotations
 """Pydantic models for knowledge base resources."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,6 +17,21 @@ class KnowledgeItemCreate(BaseModel):
     source: Optional[str] = None
 
 
+class IngestJobStatus(BaseModel):
+    """Progress and outcome of a background ingestion job."""
+
+    id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    total: int
+    processed: int
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
 class KnowledgeItem(BaseModel):
     """Schema returned for persisted knowledge items."""
 
@@ -26,6 +41,25 @@ class KnowledgeItem(BaseModel):
     tags: list[str]
     source: Optional[str]
     created_at: datetime
+    score: Optional[float] = None
 
     class Config:
         orm_mode = True
+
+
+class KnowledgeFilter(BaseModel):
+    """Payload filters applied inside the vector store query."""
+
+    tags: list[str] = Field(default_factory=list, description="Match items carrying any of these tags.")
+    source: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class KnowledgeBatchSearch(KnowledgeFilter):
+    """Several knowledge searches sharing filters, answered in one vector store round trip."""
+
+    queries: list[str] = Field(..., min_length=1, max_length=32)
+    limit: int = Field(4, ge=1, le=100)
+    mode: Optional[Literal["dense", "hybrid"]] = None
+    mmr: bool = False
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+"""Content-addressed, size-bounded on-disk cache for synthesised audio."""
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.config import get_settings
+
+_cache: "AudioCache | None" = None
+
+
+class AudioCache:
+    """Store synthesised audio files under their content hash with LRU eviction.
+
+    Recency is tracked through file modification times so it survives restarts;
+    a cache hit touches the file, and eviction removes the least recently used
+    files until the directory fits within ``max_bytes``.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str = ".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._index: OrderedDict[str, int] | None = None
+        self._total = 0
+
+    @staticmethod
+    def key(text: str, voice_id: str, voice_settings: dict) -> str:
+        """Return the content address for a synthesis request."""
+
+        material = json.dumps(
+            {"text": text, "voice_id": voice_id, "voice_settings": voice_settings},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        """Return the file path used to store ``key``."""
+
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        """Scan the cache directory once, ordering entries from oldest to newest."""
+
+        if self._index is None:
+            entries: list[tuple[float, str, int]] = []
+            if self.directory.exists():
+                for file in self.directory.glob(f"*/*{self.suffix}"):
+                    stat = file.stat()
+                    entries.append((stat.st_mtime, file.stem, stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((key, size) for _, key, size in entries)
+            self._total = sum(size for _, _, size in entries)
+        return self._index
+
+    def lookup(self, key: str) -> Path | None:
+        """Return the cached file for ``key`` and mark it as recently used."""
+
+        index = self._load_index()
+        path = self.path(key)
+        if key not in index:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._total -= index.pop(key)
+            return None
+        index.move_to_end(key)
+        return path
+
+    def _record(self, key: str, size: int) -> list[Path]:
+        """Account for a newly stored entry and return the files to evict."""
+
+        index = self._load_index()
+        if key in index:
+            self._total -= index.pop(key)
+        index[key] = size
+        self._total += size
+
+        evicted: list[Path] = []
+        while self._total > self.max_bytes and len(index) > 1:
+            old_key, old_size = index.popitem(last=False)
+            self._total -= old_size
+            evicted.append(self.path(old_key))
+        return evicted
+
+    @staticmethod
+    def _publish(temp_path: Path, final_path: Path) -> int:
+        os.replace(temp_path, final_path)
+        return final_path.stat().st_size
+
+    @staticmethod
+    def _remove(paths: list[Path]) -> None:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    async def stream_and_store(self, key: str, source: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Yield ``source`` while writing it to disk, publishing the file on completion.
+
+        Partial downloads (upstream errors or client disconnects) are discarded.
+        """
+
+        final_path = self.path(key)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = final_path.with_name(f"{final_path.name}.{uuid.uuid4().hex}.part")
+        handle = await asyncio.to_thread(open, temp_path, "wb")
+        completed = False
+        try:
+            async for chunk in source:
+                await asyncio.to_thread(handle.write, chunk)
+                yield chunk
+            completed = True
+        finally:
+            await asyncio.to_thread(handle.close)
+            if completed:
+                size = await asyncio.to_thread(self._publish, temp_path, final_path)
+                evicted = self._record(key, size)
+                if evicted:
+                    await asyncio.to_thread(self._remove, evicted)
+            else:
+                temp_path.unlink(missing_ok=True)
+
+
+def get_audio_cache() -> AudioCache | None:
+    """Return the process-wide TTS cache, or ``None`` when caching is disabled."""
+
+    global _cache
+    settings = get_settings()
+    if not settings.tts_cache_dir:
+        return None
+    if _cache is None:
+        _cache = AudioCache(Path(settings.tts_cache_dir), settings.tts_cache_max_bytes)
+    return _cache
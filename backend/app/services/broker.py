@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+"""Pluggable publish/subscribe brokers for cross-worker realtime fan-out."""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable
+from urllib.parse import unquote, urlparse
+
+MessageHandler = Callable[[bytes], None]
+
+logger = logging.getLogger(__name__)
+
+
+class Broker(ABC):
+    """Deliver opaque payloads published on a channel to every subscribed worker."""
+
+    async def start(self) -> None:
+        """Open any connections required by the broker."""
+
+    @abstractmethod
+    async def publish(self, channel: str, data: bytes) -> None:
+        """Publish ``data`` to every subscriber of ``channel``."""
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        """Invoke ``handler`` for every payload published on ``channel``."""
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str) -> None:
+        """Stop receiving payloads for ``channel``."""
+
+    async def close(self) -> None:
+        """Release broker resources."""
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker that dispatches publishes synchronously."""
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, MessageHandler] = {}
+
+    async def publish(self, channel: str, data: bytes) -> None:
+        handler = self._handlers.get(channel)
+        if handler is not None:
+            handler(data)
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers[channel] = handler
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._handlers.pop(channel, None)
+
+
+def _encode_command(*parts: str | bytes) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+
+    encoded = [part.encode("utf-8") if isinstance(part, str) else part for part in parts]
+    chunks = [b"*%d\r\n" % len(encoded)]
+    for part in encoded:
+        chunks.append(b"$%d\r\n%s\r\n" % (len(part), part))
+    return b"".join(chunks)
+
+
+async def _read_reply(reader: asyncio.StreamReader):
+    """Read a single RESP2 reply."""
+
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body
+    if kind == b"-":
+        raise RuntimeError(f"Broker error: {body.decode(errors='replace')}")
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise RuntimeError(f"Unexpected broker reply: {line!r}")
+
+
+class RedisBroker(Broker):
+    """Broker speaking the Redis pub/sub protocol over TCP or a Unix socket.
+
+    Any server implementing ``PUBLISH``/``SUBSCRIBE`` over RESP2 works,
+    including lightweight local stand-ins. The subscriber connection is
+    re-established and re-subscribed automatically if it drops.
+    """
+
+    def __init__(self, url: str, reconnect_delay: float = 1.0):
+        parsed = urlparse(url)
+        self._unix_path = parsed.path if parsed.scheme == "unix" else None
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or 6379
+        self._password = unquote(parsed.password) if parsed.password else None
+        self._reconnect_delay = reconnect_delay
+        self._handlers: dict[str, MessageHandler] = {}
+        self._pub: tuple[asyncio.StreamReader, asyncio.StreamWriter] | None = None
+        self._sub_writer: asyncio.StreamWriter | None = None
+        self._pub_lock = asyncio.Lock()
+        self._sub_lock = asyncio.Lock()
+        self._reader_task: asyncio.Task[None] | None = None
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self._unix_path:
+            reader, writer = await asyncio.open_unix_connection(self._unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(self._host, self._port)
+        if self._password:
+            writer.write(_encode_command("AUTH", self._password))
+            await writer.drain()
+            await _read_reply(reader)
+        return reader, writer
+
+    async def start(self) -> None:
+        self._pub = await self._connect()
+        reader, self._sub_writer = await self._connect()
+        self._reader_task = asyncio.create_task(self._listen(reader))
+
+    async def _listen(self, reader: asyncio.StreamReader) -> None:
+        """Dispatch pushed messages, reconnecting the subscriber connection on failure.
+
+        A handler failing on one message is logged and skipped. Error replies
+        and malformed frames leave the stream in an unknown state, so they are
+        treated like a dropped connection.
+        """
+
+        while True:
+            try:
+                while True:
+                    reply = await _read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        self._dispatch(reply[1], reply[2])
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                logger.warning("Broker subscriber connection lost; reconnecting")
+            except (RuntimeError, ValueError, asyncio.LimitOverrunError):
+                logger.exception("Broker protocol error; reconnecting the subscriber")
+            if self._sub_writer is not None:
+                self._sub_writer.close()
+            await asyncio.sleep(self._reconnect_delay)
+            try:
+                async with self._sub_lock:
+                    reader, self._sub_writer = await self._connect()
+                    if self._handlers:
+                        self._sub_writer.write(_encode_command("SUBSCRIBE", *self._handlers))
+                        await self._sub_writer.drain()
+            except (OSError, RuntimeError, ValueError, asyncio.IncompleteReadError):
+                logger.warning("Broker reconnect failed; retrying", exc_info=True)
+                continue
+
+    def _dispatch(self, channel: bytes, data: bytes) -> None:
+        handler = self._handlers.get(channel.decode("utf-8", errors="replace"))
+        if handler is None:
+            return
+        try:
+            handler(data)
+        except Exception:  # noqa: BLE001 - one bad message must not silence the channel
+            logger.exception("Dropping undeliverable broker message on %r", channel)
+
+    async def publish(self, channel: str, data: bytes) -> None:
+        async with self._pub_lock:
+            if self._pub is None or self._pub[1].is_closing():
+                self._pub = await self._connect()
+            reader, writer = self._pub
+            try:
+                writer.write(_encode_command("PUBLISH", channel, data))
+                await writer.drain()
+                await _read_reply(reader)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                writer.close()
+                self._pub = None
+                raise
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers[channel] = handler
+        async with self._sub_lock:
+            if self._sub_writer is not None:
+                self._sub_writer.write(_encode_command("SUBSCRIBE", channel))
+                await self._sub_writer.drain()
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._handlers.pop(channel, None)
+        async with self._sub_lock:
+            if self._sub_writer is not None:
+                self._sub_writer.write(_encode_command("UNSUBSCRIBE", channel))
+                await self._sub_writer.drain()
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        for writer in (self._sub_writer, self._pub[1] if self._pub else None):
+            if writer is not None:
+                writer.close()
+        self._pub = None
+        self._sub_writer = None
+
+
+def create_broker(url: str) -> Broker:
+    """Instantiate the broker described by ``url``.
+
+    ``memory://`` keeps delivery inside one process; ``redis://host:port`` and
+    ``unix:///path/to/socket`` use the Redis pub/sub protocol.
+    """
+
+    scheme = urlparse(url).scheme
+    if scheme in ("", "memory"):
+        return InMemoryBroker()
+    if scheme in ("redis", "unix"):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported signalling broker URL: {url}")
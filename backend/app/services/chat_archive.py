@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+"""Streaming NDJSON export and import of chat history."""
+
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Chat, Message
+from app.services.tokens import estimate_tokens
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+CODECS = ("none", "gzip", "zstd")
+MEDIA_TYPES = {"none": "application/x-ndjson", "gzip": "application/gzip", "zstd": "application/zstd"}
+EXTENSIONS = {"none": ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+
+# Bytes of NDJSON buffered before a chunk is compressed and sent.
+_OUTPUT_CHUNK_BYTES = 64 * 1024
+# Upper bound on decompressed bytes produced per compressed input chunk step.
+_INFLATE_STEP_BYTES = 1024 * 1024
+
+
+@dataclass
+class ImportResult:
+    """Counts of records inserted by an import, and of those skipped as duplicates."""
+
+    chats: int = 0
+    messages: int = 0
+    skipped_chats: int = 0
+    skipped_messages: int = 0
+
+
+class ArchiveFormatError(ValueError):
+    """Raised for malformed archive input, carrying the offending line number."""
+
+    def __init__(self, line: int, reason: str):
+        super().__init__(f"Line {line}: {reason}")
+        self.line = line
+
+
+def require_codec(codec: str) -> None:
+    """Raise ``ValueError`` if ``codec`` is unknown or its library is missing."""
+
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported compression '{codec}'; use one of {', '.join(CODECS)}.")
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package (install the zstd extra).")
+
+
+def _timestamp(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+async def export_ndjson(
+    session_factory: async_sessionmaker[AsyncSession], batch_rows: int = 500
+) -> AsyncIterator[bytes]:
+    """Yield every chat followed by its messages as NDJSON.
+
+    A single outer join is read through a server-side cursor in chunks of
+    ``batch_rows``. Memory stays bounded however large the history is, and
+    each chat line precedes its messages.
+    """
+
+    query = (
+        select(
+            Chat.id,
+            Chat.title,
+            Chat.created_at,
+            Chat.last_seq,
+            Chat.summary,
+            Chat.summary_seq,
+            Message.id,
+            Message.seq,
+            Message.role,
+            Message.content,
+            Message.audio_url,
+            Message.token_count,
+            Message.created_at,
+        )
+        .outerjoin(Message, Message.chat_id == Chat.id)
+        .order_by(Chat.id, Message.seq)
+        .execution_options(yield_per=batch_rows)
+    )
+
+    buffer: list[str] = []
+    buffered = 0
+    current_chat: str | None = None
+    async with session_factory() as session:
+        rows = await session.stream(query)
+        try:
+            async for row in rows:
+                (chat_id, title, created_at, last_seq, summary, summary_seq, *message) = row
+                lines = []
+                if chat_id != current_chat:
+                    current_chat = chat_id
+                    lines.append(
+                        {
+                            "type": "chat",
+                            "id": chat_id,
+                            "title": title,
+                            "created_at": _timestamp(created_at),
+                            "last_seq": last_seq,
+                            "summary": summary,
+                            "summary_seq": summary_seq,
+                        }
+                    )
+                message_id, seq, role, content, audio_url, token_count, message_created = message
+                if message_id is not None:
+                    lines.append(
+                        {
+                            "type": "message",
+                            "chat_id": chat_id,
+                            "id": message_id,
+                            "seq": seq,
+                            "role": role,
+                            "content": content,
+                            "audio_url": audio_url,
+                            "token_count": token_count,
+                            "created_at": _timestamp(message_created),
+                        }
+                    )
+                for record in lines:
+                    line = json.dumps(record, ensure_ascii=False) + "\n"
+                    buffer.append(line)
+                    buffered += len(line)
+                if buffered >= _OUTPUT_CHUNK_BYTES:
+                    yield "".join(buffer).encode("utf-8")
+                    buffer, buffered = [], 0
+        finally:
+            await rows.close()
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+async def compress(chunks: AsyncIterator[bytes], codec: str) -> AsyncIterator[bytes]:
+    """Compress ``chunks`` incrementally with ``codec``."""
+
+    if codec == "none":
+        async for chunk in chunks:
+            yield chunk
+        return
+    if codec == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        async for chunk in chunks:
+            if out := compressor.compress(chunk):
+                yield out
+        yield compressor.flush()
+        return
+    compressor = zstandard.ZstdCompressor().compressobj()
+    async for chunk in chunks:
+        if out := compressor.compress(chunk):
+            yield out
+    yield compressor.flush()
+
+
+def detect_codec(head: bytes, content_encoding: str | None = None) -> str:
+    """Infer the compression of an upload from its header or magic bytes."""
+
+    encoding = (content_encoding or "").lower()
+    if encoding in ("gzip", "x-gzip") or head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if encoding == "zstd" or head.startswith(b"\x28\xb5\x2f\xfd"):
+        return "zstd"
+    return "none"
+
+
+async def decompress(chunks: AsyncIterator[bytes], content_encoding: str | None = None) -> AsyncIterator[bytes]:
+    """Decompress an uploaded archive, detecting its codec from the first chunk."""
+
+    iterator = chunks.__aiter__()
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        return
+    codec = detect_codec(first, content_encoding)
+    require_codec(codec)
+
+    async def all_chunks() -> AsyncIterator[bytes]:
+        yield first
+        async for chunk in iterator:
+            yield chunk
+
+    if codec == "none":
+        async for chunk in all_chunks():
+            yield chunk
+    elif codec == "gzip":
+        inflater = zlib.decompressobj(47)
+        async for chunk in all_chunks():
+            data = chunk
+            while data:
+                # Bound each step so a small, highly compressed chunk cannot balloon memory.
+                try:
+                    out = inflater.decompress(data, _INFLATE_STEP_BYTES)
+                except zlib.error as exc:
+                    raise ValueError(f"Archive is not valid gzip data: {exc}") from exc
+                if out:
+                    yield out
+                data = inflater.unconsumed_tail
+        if tail := inflater.flush():
+            yield tail
+        if not inflater.eof:
+            raise ValueError("Archive is not valid gzip data: the stream is truncated")
+    else:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        async for chunk in all_chunks():
+            try:
+                out = decompressor.decompress(chunk)
+            except zstandard.ZstdError as exc:
+                raise ValueError(f"Archive is not valid zstd data: {exc}") from exc
+            if out:
+                yield out
+        if not getattr(decompressor, "eof", True):
+            raise ValueError("Archive is not valid zstd data: the stream is truncated")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int | None = None) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without holding more than one partial line.
+
+    Raises :class:`ArchiveFormatError` as soon as a line grows past
+    ``max_line_bytes``, so a stream without newlines cannot exhaust memory.
+    """
+
+    pending = b""
+    number = 0
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            number += 1
+            if max_line_bytes is not None and len(line) > max_line_bytes:
+                raise ArchiveFormatError(number, f"line exceeds {max_line_bytes} bytes")
+            yield line
+        if max_line_bytes is not None and len(pending) > max_line_bytes:
+            raise ArchiveFormatError(number + 1, f"line exceeds {max_line_bytes} bytes")
+    if pending:
+        yield pending
+
+
+def _insert(session: AsyncSession, model):
+    """Return an ``INSERT`` that skips rows conflicting with existing ones."""
+
+    dialect = session.bind.dialect.name if session.bind is not None else ""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+async def _raise_last_seq(session: AsyncSession, chat_ids: set[str]) -> None:
+    """Lift each chat's ``last_seq`` to its highest stored message ``seq``.
+
+    Imported messages keep their ``seq``, so without this ``allocate_seq``
+    would hand out numbers already taken when the chat existed beforehand
+    or its chat line carried a stale ``last_seq``.
+    """
+
+    highest = func.coalesce(
+        select(func.max(Message.seq)).where(Message.chat_id == Chat.id).scalar_subquery(), 0
+    )
+    await session.execute(
+        update(Chat)
+        .where(Chat.id.in_(chat_ids))
+        .values(last_seq=case((highest > Chat.last_seq, highest), else_=Chat.last_seq))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+async def import_ndjson(
+    session_factory: async_sessionmaker[AsyncSession],
+    lines: AsyncIterator[bytes],
+    batch_size: int = 1000,
+) -> ImportResult:
+    """Insert chats and messages from NDJSON ``lines`` in batches.
+
+    Each batch is written with one multi-row ``INSERT`` per table and committed
+    on its own, so memory use is bounded by ``batch_size``. Records whose IDs
+    already exist, and messages whose ``(chat_id, seq)`` is taken, are skipped
+    and counted, which makes re-running an interrupted import safe. Raises :class:`ArchiveFormatError` on malformed input; batches
+    committed before the error are kept.
+    """
+
+    result = ImportResult()
+    chats: list[dict] = []
+    messages: list[dict] = []
+
+    async with session_factory() as session:
+
+        async def write(model, rows: list[dict]) -> int:
+            if not rows:
+                return 0
+            # A Core execute returns the cursor's row count, which excludes skipped conflicts.
+            connection = await session.connection()
+            outcome = await connection.execute(_insert(session, model), rows)
+            return outcome.rowcount if outcome.rowcount >= 0 else len(rows)
+
+        async def flush() -> None:
+            inserted_chats = await write(Chat, chats)
+            inserted_messages = await write(Message, messages)
+            if messages:
+                await _raise_last_seq(session, {row["chat_id"] for row in messages})
+            await session.commit()
+            result.chats += inserted_chats
+            result.messages += inserted_messages
+            result.skipped_chats += len(chats) - inserted_chats
+            result.skipped_messages += len(messages) - inserted_messages
+            chats.clear()
+            messages.clear()
+
+        number = 0
+        async for raw in lines:
+            number += 1
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+                kind = record["type"]
+                if kind == "chat":
+                    chats.append(
+                        {
+                            "id": record["id"],
+                            "title": record["title"],
+                            "created_at": _parse_time(record.get("created_at")) or datetime.utcnow(),
+                            "last_seq": int(record.get("last_seq") or 0),
+                            "summary": record.get("summary"),
+                            "summary_seq": int(record.get("summary_seq") or 0),
+                            "memory_chunk_count": 0,
+                        }
+                    )
+                elif kind == "message":
+                    content = record["content"]
+                    messages.append(
+                        {
+                            "id": record["id"],
+                            "chat_id": record["chat_id"],
+                            "seq": int(record["seq"]),
+                            "role": record["role"],
+                            "content": content,
+                            "audio_url": record.get("audio_url"),
+                            "token_count": record.get("token_count") or estimate_tokens(content),
+                            "created_at": _parse_time(record.get("created_at")) or datetime.utcnow(),
+                        }
+                    )
+                else:
+                    raise ValueError(f"unknown record type {kind!r}")
+            except (KeyError, TypeError, ValueError) as exc:
+                raise ArchiveFormatError(number, str(exc)) from exc
+            if len(chats) + len(messages) >= batch_size:
+                await flush()
+        await flush()
+    return result
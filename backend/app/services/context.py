@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+"""Token-budgeted prompt assembly with cached rolling chat summaries."""
+
+import asyncio
+from dataclasses import dataclass
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_session_factory
+from app.models import Chat, Message
+from app.services import llm, scheduler
+from app.services.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Merge the new messages into the existing summary. Keep facts, decisions, names, open "
+    "questions and user preferences; drop pleasantries. Reply with the updated summary only."
+)
+
+_refresh_tasks: dict[str, asyncio.Task[None]] = {}
+
+
+@dataclass
+class ChatContext:
+    """Messages to send to the LLM plus the summary state they were built from."""
+
+    messages: list[dict[str, str]]
+    first_verbatim_seq: int | None
+    summary_seq: int
+
+    @property
+    def summary_stale(self) -> bool:
+        """Whether turns between the summary and the verbatim window are unsummarised."""
+
+        return self.first_verbatim_seq is not None and self.summary_seq < self.first_verbatim_seq - 1
+
+
+def _token_count_column():
+    """Cached per-message token counts, estimated from the content length when missing."""
+
+    estimate = (func.length(Message.content) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return func.coalesce(Message.token_count, estimate)
+
+
+async def build_context(session: AsyncSession, chat: Chat, budget: int | None = None) -> ChatContext:
+    """Assemble the prompt for ``chat`` within ``budget`` tokens.
+
+    The newest turns are kept verbatim, newest first, until the budget left after
+    the cached summary is used up (always keeping at least
+    ``context_min_recent_messages``). Older turns are represented only by
+    ``Chat.summary``. Budget checks read cached token counts, so message content
+    is loaded only for the turns that are sent.
+    """
+
+    settings = get_settings()
+    budget = budget if budget is not None else settings.context_token_budget
+    summary_tokens = estimate_tokens(chat.summary or "")
+    remaining = max(budget - summary_tokens, 0)
+
+    counts = await session.stream(
+        select(Message.seq, _token_count_column())
+        .where(Message.chat_id == chat.id)
+        .order_by(Message.seq.desc())
+    )
+    first_seq: int | None = None
+    kept = 0
+    async for seq, tokens in counts:
+        tokens = int(tokens or 0)
+        if kept >= settings.context_min_recent_messages and tokens > remaining:
+            break
+        remaining -= tokens
+        kept += 1
+        first_seq = seq
+    await counts.close()
+
+    messages: list[dict[str, str]] = []
+    if chat.summary:
+        messages.append(
+            {"role": "system", "content": f"Summary of the earlier conversation:\n{chat.summary}"}
+        )
+    if first_seq is not None:
+        rows = await session.execute(
+            select(Message.role, Message.content)
+            .where(Message.chat_id == chat.id, Message.seq >= first_seq)
+            .order_by(Message.seq)
+        )
+        messages.extend({"role": role, "content": content} for role, content in rows)
+
+    return ChatContext(messages=messages, first_verbatim_seq=first_seq, summary_seq=chat.summary_seq)
+
+
+async def _summarise(previous: str | None, turns: list[tuple[str, str]]) -> str:
+    """Ask the LLM to fold ``turns`` into ``previous``."""
+
+    transcript = "\n".join(f"{role}: {content}" for role, content in turns)
+    prompt = f"Existing summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"
+    parts = [
+        part
+        async for part in llm.generate_response(
+            [
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": prompt},
+            ],
+            stream=False,
+            cache=True,
+        )
+    ]
+    return "".join(parts).strip()
+
+
+async def refresh_summary(chat_id: str, through_seq: int) -> None:
+    """Fold every unsummarised message up to ``through_seq`` into the chat summary.
+
+    Messages are summarised in batches bounded by the context budget and the
+    summary is committed after each batch, so an interrupted refresh resumes
+    where it stopped.
+    """
+
+    settings = get_settings()
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        chat = await session.get(Chat, chat_id)
+        if chat is None:
+            return
+        summary, summary_seq = chat.summary, chat.summary_seq
+        while summary_seq < through_seq:
+            rows = await session.stream(
+                select(Message.seq, Message.role, Message.content, _token_count_column())
+                .where(
+                    Message.chat_id == chat_id,
+                    Message.seq > summary_seq,
+                    Message.seq <= through_seq,
+                )
+                .order_by(Message.seq)
+            )
+            batch: list[tuple[str, str]] = []
+            batch_tokens = 0
+            last_seq = summary_seq
+            async for seq, role, content, tokens in rows:
+                tokens = int(tokens or 0)
+                if batch and batch_tokens + tokens > settings.context_token_budget:
+                    break
+                batch.append((role, content))
+                batch_tokens += tokens
+                last_seq = seq
+            await rows.close()
+            # End the read transaction before the slow LLM call.
+            await session.rollback()
+            if not batch:
+                break
+
+            summary = await _summarise(summary, batch)
+            summary_seq = last_seq
+            await session.execute(
+                update(Chat)
+                .where(Chat.id == chat_id, Chat.summary_seq < summary_seq)
+                .values(summary=summary, summary_seq=summary_seq)
+            )
+            await session.commit()
+
+
+def schedule_summary_refresh(chat_id: str, through_seq: int) -> None:
+    """Refresh the chat summary in the background, at most once per chat at a time."""
+
+    existing = _refresh_tasks.get(chat_id)
+    if existing is not None and not existing.done():
+        return
+
+    # The task copies the current context, so its LLM calls queue behind interactive ones.
+    with scheduler.priority(scheduler.BACKGROUND):
+        task = asyncio.create_task(refresh_summary(chat_id, through_seq))
+    _refresh_tasks[chat_id] = task
+
+    def _forget(finished: asyncio.Task[None]) -> None:
+        if _refresh_tasks.get(chat_id) is finished:
+            del _refresh_tasks[chat_id]
+        if not finished.cancelled():
+            finished.exception()  # Summaries are best effort; a later turn retries.
+
+    task.add_done_callback(_forget)
+
+
+async def cancel_summary_refreshes() -> None:
+    """Cancel outstanding background summary refreshes."""
+
+    tasks = list(_refresh_tasks.values())
+    _refresh_tasks.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
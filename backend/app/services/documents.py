@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+"""Streaming document parsing and chunking for knowledge base uploads.
+
+Everything here runs in worker processes (see :func:`get_parser_pool`), so
+CPU-heavy parsing never blocks the event loop. Documents are read
+incrementally and chunks are written to a JSON-lines file as they are
+produced, so memory stays flat however large the document is.
+"""
+
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from app.config import get_settings
+from app.services.tokens import estimate_tokens, split_by_tokens
+
+try:  # pragma: no cover - optional dependency
+    import pypdf
+except ImportError:  # pragma: no cover - optional dependency
+    pypdf = None  # type: ignore
+
+TEXT = "text"
+MARKDOWN = "markdown"
+HTML = "html"
+PDF = "pdf"
+
+_EXTENSIONS = {
+    ".txt": TEXT,
+    ".text": TEXT,
+    ".md": MARKDOWN,
+    ".markdown": MARKDOWN,
+    ".html": HTML,
+    ".htm": HTML,
+    ".pdf": PDF,
+}
+_CONTENT_TYPES = {
+    "text/plain": TEXT,
+    "text/markdown": MARKDOWN,
+    "text/x-markdown": MARKDOWN,
+    "text/html": HTML,
+    "application/xhtml+xml": HTML,
+    "application/pdf": PDF,
+}
+
+# Bytes read per step from text and HTML documents.
+READ_SIZE = 64 * 1024
+# A paragraph longer than this is emitted in pieces rather than buffered whole.
+MAX_BLOCK_CHARS = 64 * 1024
+
+_BLANK_LINES = re.compile(r"\n\s*\n")
+_SKIPPED_TAGS = frozenset({"script", "style", "noscript", "template", "head"})
+_BLOCK_TAGS = frozenset(
+    """
+    address article aside blockquote br dd div dl dt figcaption figure footer form h1 h2 h3 h4 h5 h6
+    header hr li main nav ol p pre section table td th tr ul
+    """.split()
+)
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def detect_kind(filename: str | None, content_type: str | None) -> str | None:
+    """Return the document kind for an upload, judged by extension then content type."""
+
+    if filename:
+        kind = _EXTENSIONS.get(Path(filename).suffix.lower())
+        if kind:
+            return kind
+    if content_type:
+        return _CONTENT_TYPES.get(content_type.split(";", 1)[0].strip().lower())
+    return None
+
+
+def supports(kind: str) -> bool:
+    """Whether documents of ``kind`` can be parsed with the installed dependencies."""
+
+    return kind != PDF or pypdf is not None
+
+
+def _paragraphs(text: str) -> Iterator[str]:
+    for paragraph in _BLANK_LINES.split(text):
+        paragraph = paragraph.strip()
+        if paragraph:
+            yield paragraph
+
+
+def _iter_text(path: str) -> Iterator[str]:
+    pending = ""
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        while True:
+            data = handle.read(READ_SIZE)
+            if not data:
+                break
+            pending += data
+            # Everything before the last blank line is made of complete paragraphs.
+            matches = list(_BLANK_LINES.finditer(pending))
+            if matches:
+                cut = matches[-1].end()
+                yield from _paragraphs(pending[:cut])
+                pending = pending[cut:]
+            while len(pending) > MAX_BLOCK_CHARS:
+                cut = pending.rfind(" ", 0, MAX_BLOCK_CHARS)
+                cut = cut if cut > 0 else MAX_BLOCK_CHARS
+                yield pending[:cut].strip()
+                pending = pending[cut:]
+    yield from _paragraphs(pending)
+
+
+class _TextExtractor(HTMLParser):
+    """Collect visible text from HTML, one block per paragraph-level element."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: list[str] = []
+        self._current: list[str] = []
+        self._size = 0
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.flush()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self.flush()
+
+    def handle_data(self, data):
+        if self._skipping:
+            return
+        self._current.append(data)
+        self._size += len(data)
+        if self._size > MAX_BLOCK_CHARS:
+            self.flush()
+
+    def flush(self) -> None:
+        text = " ".join("".join(self._current).split())
+        if text:
+            self.blocks.append(text)
+        self._current, self._size = [], 0
+
+
+def _iter_html(path: str) -> Iterator[str]:
+    parser = _TextExtractor()
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        while True:
+            data = handle.read(READ_SIZE)
+            if not data:
+                break
+            parser.feed(data)
+            yield from parser.blocks
+            parser.blocks.clear()
+    parser.close()
+    parser.flush()
+    yield from parser.blocks
+
+
+def _iter_pdf(path: str) -> Iterator[str]:
+    if pypdf is None:
+        raise RuntimeError("PDF parsing requires the 'pdf' extra (pypdf)")
+    reader = pypdf.PdfReader(path)
+    for page in reader.pages:
+        yield from _paragraphs(page.extract_text() or "")
+
+
+def iter_blocks(path: str, kind: str) -> Iterator[str]:
+    """Yield the paragraphs of the document at ``path`` in reading order."""
+
+    if kind in (TEXT, MARKDOWN):
+        return _iter_text(path)
+    if kind == HTML:
+        return _iter_html(path)
+    if kind == PDF:
+        return _iter_pdf(path)
+    raise ValueError(f"Unsupported document kind '{kind}'")
+
+
+def iter_chunks(blocks: Iterable[str], max_tokens: int, overlap_tokens: int) -> Iterator[str]:
+    """Group blocks into overlapping, token-bounded chunks.
+
+    Blocks are split into word runs of about half the overlap, which are
+    packed greedily into chunks; consecutive chunks share up to
+    ``overlap_tokens`` of trailing runs. Runs of one block are joined by
+    spaces and blocks by blank lines. Only the current window is held in
+    memory.
+    """
+
+    unit_tokens = max(1, min(max_tokens, overlap_tokens // 2 or max_tokens))
+    window: list[tuple[int, str, int]] = []
+    size = 0
+    for number, block in enumerate(blocks):
+        for piece in split_by_tokens(block, unit_tokens):
+            tokens = estimate_tokens(piece)
+            if window and size + tokens > max_tokens:
+                yield _join(window)
+                carried: list[tuple[int, str, int]] = []
+                overlap = 0
+                for unit in reversed(window):
+                    if overlap + unit[2] > overlap_tokens:
+                        break
+                    carried.insert(0, unit)
+                    overlap += unit[2]
+                while carried and overlap + tokens > max_tokens:
+                    overlap -= carried.pop(0)[2]
+                window, size = carried, overlap
+            window.append((number, piece, tokens))
+            size += tokens
+    if window:
+        yield _join(window)
+
+
+def _join(window: list[tuple[int, str, int]]) -> str:
+    parts = [window[0][1]]
+    for (previous, _, _), (number, piece, _) in zip(window, window[1:]):
+        parts.append(" " if number == previous else "\n\n")
+        parts.append(piece)
+    return "".join(parts)
+
+
+def parse_document(path: str, kind: str, output_path: str, max_tokens: int, overlap_tokens: int) -> int:
+    """Chunk the document at ``path`` into a JSON-lines file and return the chunk count.
+
+    The output is written beside ``output_path`` and moved into place once
+    complete, so an existing output file always holds every chunk.
+    """
+
+    partial = f"{output_path}.{os.getpid()}.part"
+    count = 0
+    try:
+        with open(partial, "w", encoding="utf-8") as handle:
+            for chunk in iter_chunks(iter_blocks(path, kind), max_tokens, overlap_tokens):
+                handle.write(json.dumps(chunk) + "\n")
+                count += 1
+        os.replace(partial, output_path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return count
+
+
+def get_parser_pool() -> ProcessPoolExecutor:
+    """Return the process pool used for document parsing.
+
+    Workers are spawned rather than forked so they never inherit the event
+    loop, open connections or threads of the server process.
+    """
+
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, get_settings().ingest_parse_processes),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def close_parser_pool() -> None:
+    """Shut the parsing processes down."""
+
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
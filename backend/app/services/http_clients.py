@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+"""Shared, pooled HTTP clients for upstream services."""
+
+import httpx
+
+from app.config import get_settings
+
+GROQ = "groq"
+ELEVENLABS = "elevenlabs"
+VECTOR_STORE = "vector_store"
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def resolve_vector_store_url(raw_url: str) -> str:
+    """Translate ``qdrant://`` style URLs into plain HTTP(S) base URLs."""
+
+    if raw_url.startswith("qdrant+https://"):
+        return raw_url.replace("qdrant+https://", "https://", 1)
+    if raw_url.startswith("qdrant://"):
+        return raw_url.replace("qdrant://", "http://", 1)
+    return raw_url
+
+
+def _base_url(name: str) -> str:
+    """Return the configured base URL for the named upstream."""
+
+    settings = get_settings()
+    if name == GROQ:
+        return settings.groq_base_url
+    if name == ELEVENLABS:
+        return settings.elevenlabs_base_url
+    if name == VECTOR_STORE:
+        return resolve_vector_store_url(settings.vector_store_url)
+    raise ValueError(f"Unknown upstream service: {name}")
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    """Create a keep-alive connection pool for the named upstream."""
+
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.http_connect_timeout,
+        read=settings.http_read_timeout,
+        write=settings.http_write_timeout,
+        pool=settings.http_pool_timeout,
+    )
+    return httpx.AsyncClient(
+        base_url=_base_url(name),
+        http2=settings.http_http2,
+        limits=limits,
+        timeout=timeout,
+    )
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Return the shared client for ``name``, creating it lazily if required."""
+
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+
+def get_groq_client() -> httpx.AsyncClient:
+    """Return the pooled client used for Groq requests."""
+
+    return get_client(GROQ)
+
+
+def get_elevenlabs_client() -> httpx.AsyncClient:
+    """Return the pooled client used for ElevenLabs requests."""
+
+    return get_client(ELEVENLABS)
+
+
+def get_vector_store_client() -> httpx.AsyncClient:
+    """Return the pooled client used for vector store requests."""
+
+    return get_client(VECTOR_STORE)
+
+
+async def open_clients() -> None:
+    """Eagerly create the connection pools for every upstream service."""
+
+    names = [GROQ, ELEVENLABS]
+    if not get_settings().vector_store_url.startswith("local://"):
+        names.append(VECTOR_STORE)
+    for name in names:
+        get_client(name)
+
+
+async def close_clients() -> None:
+    """Close every pooled client and release their connections."""
+
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
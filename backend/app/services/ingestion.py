@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+"""Knowledge ingestion jobs run by the background worker pool."""
+
+import asyncio
+import json
+import uuid
+from pathlib import Path
+from typing import TextIO
+
+from sqlalchemy import select, update
+
+from app.config import get_settings
+from app.database import get_session_factory
+from app.models import Chat, IngestJob, Message
+from app.schemas.knowledge import KnowledgeItemCreate
+from app.services import documents, scheduler
+from app.services.jobs import JobContext, LeaseLostError, job_handler, submit_job
+from app.services.memory import chunk_messages, chunk_point_id
+from app.storage.vector_store import create_knowledge_items, embed_texts, store_knowledge_items
+
+BULK_INGEST = "knowledge_bulk"
+CHAT_MEMORY = "chat_memory"
+DOCUMENT_INGEST = "knowledge_document"
+
+DOCUMENT_NAMESPACE = uuid.UUID("5b0f3c52-8d7e-4f0a-9a43-2f1c6d8e7b19")
+
+
+async def submit_bulk_ingest(items: list[KnowledgeItemCreate]) -> IngestJob:
+    """Queue ``items`` for embedding and upsert.
+
+    Point IDs are assigned up front and stored with the job, so a resumed job
+    overwrites rather than duplicates anything written before a crash.
+    """
+
+    payload = {
+        "items": [item.model_dump() for item in items],
+        "ids": [str(uuid.uuid4()) for _ in items],
+    }
+    return await submit_job(BULK_INGEST, payload, total=len(items))
+
+
+async def submit_chat_memory(chat_id: str) -> IngestJob:
+    """Queue memorisation of the chat's messages written since the last run."""
+
+    return await submit_job(CHAT_MEMORY, {"chat_id": chat_id})
+
+
+async def submit_document(
+    upload: Path,
+    *,
+    kind: str,
+    title: str,
+    tags: list[str],
+    source: str | None = None,
+) -> IngestJob:
+    """Queue a document already spooled to ``upload`` for parsing and ingestion.
+
+    The file is moved into ``ingest_upload_dir`` under the document ID and
+    is owned by the job from then on; it is removed if queueing fails.
+    """
+
+    settings = get_settings()
+    document_id = str(uuid.uuid4())
+    directory = Path(settings.ingest_upload_dir).resolve()
+    await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+    path = directory / f"{document_id}.upload"
+    queued = False
+    try:
+        await asyncio.to_thread(upload.replace, path)
+        job = await submit_job(
+            DOCUMENT_INGEST,
+            {
+                "document_id": document_id,
+                "path": str(path),
+                "kind": kind,
+                "title": title,
+                "tags": tags,
+                "source": source,
+            },
+        )
+        queued = True
+        return job
+    finally:
+        if not queued:
+            upload.unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+
+
+def document_point_id(document_id: str, index: int) -> str:
+    """Return the deterministic vector store point ID for a document chunk."""
+
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, f"{document_id}:{index}"))
+
+
+@job_handler(BULK_INGEST)
+async def run_bulk_ingest(job: JobContext) -> dict:
+    """Embed and upsert the job's items in checkpointed slices."""
+
+    items = [KnowledgeItemCreate(**raw) for raw in job.payload["items"]]
+    ids: list[str] = job.payload["ids"]
+    step = max(1, get_settings().ingest_job_batch_size)
+    with scheduler.priority(scheduler.BULK):
+        for start in range(job.processed, len(items), step):
+            stop = min(start + step, len(items))
+            await create_knowledge_items(items[start:stop], ids[start:stop])
+            await job.progress(stop)
+    return {"ids": ids, "count": len(ids)}
+
+
+@job_handler(CHAT_MEMORY)
+async def run_chat_memory(job: JobContext) -> dict:
+    """Memorise new chat messages as overlapping, token-bounded knowledge chunks.
+
+    Only messages after the chat's memory watermark are embedded; the last,
+    possibly partial, chunk is rebuilt and replaced through its deterministic
+    point ID. The watermark only moves once every chunk is stored, so a resumed
+    job redoes the run idempotently (cached embeddings make that cheap).
+    """
+
+    chat_id = job.payload["chat_id"]
+    settings = get_settings()
+    session_factory = get_session_factory()
+    # Read everything up front and close the session, so no transaction is
+    # held open across the embedding and upsert round trips below.
+    async with session_factory() as session:
+        chat = await session.get(Chat, chat_id)
+        if chat is None:
+            return {"ids": [], "count": 0}
+
+        query = select(Message.id, Message.role, Message.content).where(Message.chat_id == chat_id)
+        start_index = 0
+        start_offset = 0
+        restart = await session.get(Message, chat.memory_restart_id) if chat.memory_restart_id else None
+        if restart is not None:
+            query = query.where(Message.seq >= restart.seq)
+            start_index = max(chat.memory_chunk_count - 1, 0)
+            start_offset = chat.memory_restart_offset
+        messages = (await session.execute(query.order_by(Message.seq))).all()
+        watermark = chat.memory_watermark
+    if not messages or messages[-1].id == watermark:
+        return {"ids": [], "count": 0}
+
+    chunks = chunk_messages(
+        [(message.id, f"{message.role}: {message.content}") for message in messages],
+        max_tokens=settings.memory_chunk_tokens,
+        overlap_tokens=settings.memory_chunk_overlap_tokens,
+        start_index=start_index,
+        start_offset=start_offset,
+    )
+    await job.progress(0, total=len(chunks))
+    ids: list[str] = []
+    step = max(1, settings.ingest_job_batch_size)
+    with scheduler.priority(scheduler.BACKGROUND):
+        for start in range(0, len(chunks), step):
+            batch = chunks[start : start + step]
+            items = await create_knowledge_items(
+                [
+                    KnowledgeItemCreate(
+                        title=f"Chat memory {chat_id} #{chunk.index + 1}",
+                        text=chunk.text,
+                        tags=["memory"],
+                        source="chat",
+                    )
+                    for chunk in batch
+                ],
+                [chunk_point_id(chat_id, chunk.index) for chunk in batch],
+            )
+            ids.extend(item.id for item in items)
+            await job.progress(start + len(batch))
+
+    async with session_factory() as session:
+        await session.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(
+                memory_watermark=messages[-1].id,
+                memory_restart_id=chunks[-1].first_message_id,
+                memory_restart_offset=chunks[-1].first_offset,
+                memory_chunk_count=chunks[-1].index + 1,
+            )
+        )
+        await session.commit()
+    return {"ids": ids, "count": len(ids)}
+
+
+def _read_lines(handle: TextIO, count: int) -> list[str]:
+    lines = []
+    for line in handle:
+        lines.append(line)
+        if len(lines) >= count:
+            break
+    return lines
+
+
+def _skip_lines(handle: TextIO, count: int) -> None:
+    for _ in range(count):
+        if not handle.readline():
+            return
+
+
+def _remove_files(*paths: Path) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+@job_handler(DOCUMENT_INGEST)
+async def run_document_ingest(job: JobContext) -> dict:
+    """Parse, chunk, embed and upsert an uploaded document.
+
+    A worker process turns the document into a chunk file; chunks are then
+    read back a batch at a time and embedded while earlier batches are being
+    upserted. At most ``ingest_pipeline_depth`` embedded batches wait for
+    upsert, so memory does not grow with the document. Chunk point IDs are
+    deterministic and progress is checkpointed per batch, so a resumed job
+    continues where the last one stopped.
+    """
+
+    settings = get_settings()
+    payload = job.payload
+    document_id = payload["document_id"]
+    path = Path(payload["path"])
+    chunks_path = path.with_suffix(".chunks.jsonl")
+    try:
+        if job.total == 0 or not chunks_path.exists():
+            loop = asyncio.get_running_loop()
+            total = await loop.run_in_executor(
+                documents.get_parser_pool(),
+                documents.parse_document,
+                str(path),
+                payload["kind"],
+                str(chunks_path),
+                settings.ingest_chunk_tokens,
+                settings.ingest_chunk_overlap_tokens,
+            )
+            await job.progress(min(job.processed, total), total=total)
+
+        step = max(1, settings.ingest_job_batch_size)
+        batches: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.ingest_pipeline_depth))
+
+        async def embed_batches() -> None:
+            try:
+                handle = await asyncio.to_thread(open, chunks_path, encoding="utf-8")
+                try:
+                    await asyncio.to_thread(_skip_lines, handle, job.processed)
+                    start = job.processed
+                    while lines := await asyncio.to_thread(_read_lines, handle, step):
+                        texts = [json.loads(line) for line in lines]
+                        await batches.put((start, texts, await embed_texts(texts)))
+                        start += len(texts)
+                finally:
+                    await asyncio.to_thread(handle.close)
+            except Exception as exc:  # noqa: BLE001 - re-raised by the upsert loop
+                await batches.put(exc)
+            else:
+                await batches.put(None)
+
+        with scheduler.priority(scheduler.BULK):
+            embedder = asyncio.create_task(embed_batches())
+            try:
+                while (batch := await batches.get()) is not None:
+                    if isinstance(batch, Exception):
+                        raise batch
+                    start, texts, vectors = batch
+                    items = [
+                        KnowledgeItemCreate(
+                            title=f"{payload['title']} #{start + offset + 1}",
+                            text=text,
+                            tags=payload["tags"],
+                            source=payload["source"],
+                        )
+                        for offset, text in enumerate(texts)
+                    ]
+                    ids = [document_point_id(document_id, start + offset) for offset in range(len(texts))]
+                    await store_knowledge_items(items, ids, vectors)
+                    await job.progress(start + len(texts))
+            finally:
+                embedder.cancel()
+                await asyncio.gather(embedder, return_exceptions=True)
+    except LeaseLostError:
+        raise
+    except Exception:
+        if job.attempts >= settings.ingest_job_max_attempts:
+            await asyncio.to_thread(_remove_files, path, chunks_path)
+        raise
+
+    await asyncio.to_thread(_remove_files, path, chunks_path)
+    return {"document_id": document_id, "count": job.total}
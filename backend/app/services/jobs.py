@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+"""Durable background jobs executed by an asyncio worker pool.
+
+Jobs are rows in ``ingest_jobs``, so they survive restarts. A worker claims a
+queued job with a conditional ``UPDATE`` that takes a lease, renews the lease
+while the handler runs and records progress as it goes. If a worker dies,
+its lease expires and another worker (in this or any other process) claims
+the job again; handlers resume from the recorded progress.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import and_, or_, select, update
+
+from app.config import get_settings
+from app.database import get_session_factory
+from app.models import IngestJob
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+_handlers: dict[str, Callable[["JobContext"], Awaitable[Any]]] = {}
+_pool: "JobWorkerPool | None" = None
+
+
+def job_handler(kind: str):
+    """Register the coroutine executing jobs of ``kind``.
+
+    The handler receives a :class:`JobContext` and returns a JSON-serialisable
+    result stored on the job.
+    """
+
+    def register(function: Callable[[JobContext], Awaitable[Any]]):
+        _handlers[kind] = function
+        return function
+
+    return register
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a job's lease was taken over by another worker."""
+
+
+@dataclass
+class JobContext:
+    """What a handler needs to run and report on a claimed job."""
+
+    id: str
+    kind: str
+    payload: dict
+    processed: int
+    total: int
+    owner: str
+    attempts: int = 1
+
+    async def progress(self, processed: int, total: int | None = None) -> None:
+        """Persist progress; work before ``processed`` is not repeated on resume."""
+
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        values: dict[str, Any] = {"processed": processed, "updated_at": datetime.utcnow()}
+        if total is not None:
+            values["total"] = total
+        await _update_owned(self.id, self.owner, **values)
+
+
+async def _update_owned(job_id: str, owner: str, **values: Any) -> None:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        result = await session.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.lease_owner == owner)
+            .values(**values)
+        )
+        await session.commit()
+    if result.rowcount == 0:
+        raise LeaseLostError(f"Lost the lease on job {job_id}")
+
+
+async def submit_job(kind: str, payload: dict, total: int = 0) -> IngestJob:
+    """Persist a new job and wake the local workers."""
+
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    now = datetime.utcnow()
+    job = IngestJob(
+        id=str(uuid.uuid4()),
+        kind=kind,
+        status=QUEUED,
+        payload=json.dumps(payload),
+        total=total,
+        processed=0,
+        attempts=0,
+        created_at=now,
+        updated_at=now,
+    )
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        session.add(job)
+        await session.commit()
+    if _pool is not None:
+        _pool.wake()
+    return job
+
+
+async def get_job(job_id: str) -> IngestJob | None:
+    """Return the job with ``job_id``, if any."""
+
+    session_factory = get_session_factory()
+    async with session_factory() as session:
+        return await session.get(IngestJob, job_id)
+
+
+class JobWorkerPool:
+    """A fixed number of asyncio workers draining the job table."""
+
+    def __init__(
+        self,
+        size: int,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 3,
+        poll_interval: float = 2.0,
+    ):
+        self.size = size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.size)]
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they were running are released back to the queue."""
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                # Cleared before looking so a submission during the claim is not missed.
+                self._wakeup.clear()
+                context = await self._claim()
+                if context is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(context)
+            except Exception:  # noqa: BLE001 - a worker must outlive database hiccups
+                # Any job left leased is claimed again once its lease expires.
+                logger.exception("Job worker iteration failed; retrying")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim(self) -> JobContext | None:
+        """Lease the oldest runnable job, including ones whose lease expired."""
+
+        now = datetime.utcnow()
+        runnable = or_(
+            and_(
+                IngestJob.status == QUEUED,
+                or_(IngestJob.run_after.is_(None), IngestJob.run_after <= now),
+            ),
+            and_(IngestJob.status == RUNNING, IngestJob.lease_expires_at < now),
+        )
+        owner = uuid.uuid4().hex
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            for _ in range(3):
+                job_id = await session.scalar(
+                    select(IngestJob.id).where(runnable).order_by(IngestJob.created_at).limit(1)
+                )
+                if job_id is None:
+                    return None
+                claimed = await session.execute(
+                    update(IngestJob)
+                    .where(IngestJob.id == job_id, runnable)
+                    .values(
+                        status=RUNNING,
+                        lease_owner=owner,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        attempts=IngestJob.attempts + 1,
+                        updated_at=now,
+                    )
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    job = await session.get(IngestJob, job_id)
+                    assert job is not None
+                    return JobContext(
+                        id=job.id,
+                        kind=job.kind,
+                        payload=json.loads(job.payload),
+                        processed=job.processed,
+                        total=job.total,
+                        owner=owner,
+                        attempts=job.attempts,
+                    )
+                # Another worker won the race; look for the next job.
+        return None
+
+    async def _heartbeat(self, context: JobContext) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await _update_owned(
+                    context.id,
+                    context.owner,
+                    lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds),
+                )
+            except LeaseLostError:
+                return
+            except Exception:  # noqa: BLE001 - retried on the next beat
+                continue
+
+    async def _run(self, context: JobContext) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(context))
+        handler = _handlers.get(context.kind)
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job kind '{context.kind}'")
+            result = await handler(context)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without counting this attempt.
+            await self._release(context)
+            raise
+        except LeaseLostError:
+            pass  # Another worker resumed the job after our lease expired.
+        except Exception as exc:  # noqa: BLE001 - recorded on the job
+            await self._fail(context, exc)
+        else:
+            await self._finish(context, result)
+        finally:
+            heartbeat.cancel()
+
+    async def _finish(self, context: JobContext, result: Any) -> None:
+        now = datetime.utcnow()
+        try:
+            await _update_owned(
+                context.id,
+                context.owner,
+                status=SUCCEEDED,
+                result=json.dumps(result),
+                processed=max(context.processed, context.total),
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=now,
+                finished_at=now,
+            )
+        except LeaseLostError:
+            pass  # The worker that took over records the outcome.
+        except Exception:  # noqa: BLE001 - the job reruns once its lease expires
+            logger.exception("Could not record completion of job %s", context.id)
+
+    async def _fail(self, context: JobContext, exc: Exception) -> None:
+        now = datetime.utcnow()
+        values: dict[str, Any] = {
+            "error": f"{type(exc).__name__}: {exc}",
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "updated_at": now,
+        }
+        if context.attempts >= self.max_attempts:
+            values.update(status=FAILED, finished_at=now)
+        else:
+            values.update(status=QUEUED, run_after=now + timedelta(seconds=2**context.attempts))
+        try:
+            await _update_owned(context.id, context.owner, **values)
+        except LeaseLostError:
+            pass
+        except Exception:  # noqa: BLE001 - the job reruns once its lease expires
+            logger.exception("Could not record failure of job %s", context.id)
+
+    async def _release(self, context: JobContext) -> None:
+        try:
+            await _update_owned(
+                context.id,
+                context.owner,
+                status=QUEUED,
+                attempts=IngestJob.attempts - 1,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=datetime.utcnow(),
+            )
+        except Exception:  # noqa: BLE001 - the job resumes once its lease expires
+            pass
+
+
+async def start_job_workers() -> None:
+    """Start the process-wide worker pool if workers are configured."""
+
+    global _pool
+    settings = get_settings()
+    if settings.ingest_workers <= 0 or _pool is not None:
+        return
+    _pool = JobWorkerPool(
+        settings.ingest_workers,
+        lease_seconds=settings.ingest_job_lease_seconds,
+        max_attempts=settings.ingest_job_max_attempts,
+        poll_interval=settings.ingest_poll_interval,
+    )
+    _pool.start()
+
+
+async def stop_job_workers() -> None:
+    """Stop the worker pool, returning in-flight jobs to the queue."""
+
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.stop()
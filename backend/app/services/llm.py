@@ -2,16 +2,28 @@ from __future__ import annotations
 
 """Groq LLM helper utilities."""
 
+import time
+from contextlib import aclosing
 from typing import AsyncIterator, Optional
 
 import httpx
 from openai import APIStatusError, AsyncOpenAI, OpenAIError
 
 from app.config import get_settings
-
-GROQ_TRANSCRIBE_ENDPOINT = "https://api.groq.com/openai/v1/audio/transcriptions"
+from app.services import metrics
+from app.services.http_clients import GROQ, get_groq_client
+from app.services.scheduler import get_scheduler
+from app.services.tokens import estimate_tokens
+from app.storage.completion_cache import get_completion_cache
+from app.storage.vector_store import embed_text
+
+GROQ_TRANSCRIBE_PATH = "/audio/transcriptions"
+GROQ_TRANSCRIBE_MODEL = "whisper-large-v3"
+# Size of the slices a cached answer is replayed in when streaming.
+REPLAY_CHUNK_CHARS = 64
 
 _chat_client: AsyncOpenAI | None = None
+_chat_http_client: httpx.AsyncClient | None = None
 
 
 def _build_headers(*, accept: str, content_type: str | None = "application/json") -> dict[str, str]:
@@ -51,17 +63,23 @@ def _combine_messages(
 def _get_chat_client() -> AsyncOpenAI:
     """Return a lazily instantiated Groq-compatible OpenAI client."""
 
-    global _chat_client
+    global _chat_client, _chat_http_client
 
-    if _chat_client is None:
+    http_client = get_groq_client()
+    if _chat_client is None or _chat_http_client is not http_client:
         settings = get_settings()
         if not settings.groq_api_key:
             raise RuntimeError("GROQ_API_KEY must be configured to use Groq services.")
 
+        # Reuse the shared Groq connection pool rather than letting the SDK open its own;
+        # retries are handled by the upstream scheduler.
         _chat_client = AsyncOpenAI(
             api_key=settings.groq_api_key,
-            base_url="https://api.groq.com/openai/v1",
+            base_url=settings.groq_base_url,
+            http_client=http_client,
+            max_retries=0,
         )
+        _chat_http_client = http_client
 
     return _chat_client
 
@@ -70,49 +88,99 @@ async def generate_response(
     messages: list[dict[str, str]],
     knowledge_snippets: Optional[list[str]] = None,
     stream: bool = True,
+    cache: bool = False,
 ) -> AsyncIterator[str]:
-    """Stream completion tokens from Groq's chat completion API."""
+    """Stream completion text from Groq's chat completion API.
+
+    Yields content deltas as plain strings when streaming, or the whole reply
+    as a single string when ``stream`` is false. With ``cache`` enabled,
+    answers are looked up in the completion cache first. A cached answer is
+    replayed immediately in small slices. Completed answers are stored for
+    later requests.
+    """
 
     if not messages:
         raise ValueError("At least one chat message is required to request a completion.")
 
     settings = get_settings()
-    client = _get_chat_client()
     request_messages = _combine_messages(messages, knowledge_snippets)
+    completion_cache = get_completion_cache() if cache else None
+    if completion_cache is None:
+        async with aclosing(_complete(request_messages, stream)) as parts:
+            async for part in parts:
+                yield part
+        return
 
-    try:
-        if stream:
-            completion = await client.chat.completions.create(
-                model=settings.groq_model,
-                messages=request_messages,
-                stream=True,
-            )
-        else:
-            completion = await client.chat.completions.create(
-                model=settings.groq_model,
-                messages=request_messages,
-                stream=False,
-            )
-    except APIStatusError as exc:
-        detail = exc.response.text if exc.response is not None else str(exc)
-        raise RuntimeError(
-            "Groq chat completion request failed with status "
-            f"{exc.status_code}: {detail}"
-        ) from exc
-    except OpenAIError as exc:  # pragma: no cover - network errors only
-        raise RuntimeError(f"Groq chat completion request failed: {exc}") from exc
-
-    if not stream:
-        message = completion.choices[0].message.content if completion.choices else ""
-        if message:
-            yield message
+    lookup = await completion_cache.lookup(settings.groq_model, request_messages, embed=embed_text)
+    if lookup.text is not None:
+        if not stream:
+            yield lookup.text
+            return
+        for start in range(0, len(lookup.text), REPLAY_CHUNK_CHARS):
+            yield lookup.text[start : start + REPLAY_CHUNK_CHARS]
         return
 
-    try:
-        async for chunk in completion:
-            yield chunk.model_dump_json(exclude_none=True)
-    finally:
-        await completion.close()
+    received: list[str] = []
+    async with aclosing(_complete(request_messages, stream)) as parts:
+        async for part in parts:
+            received.append(part)
+            yield part
+    completion_cache.store(lookup, "".join(received))
+
+
+async def _complete(request_messages: list[dict[str, str]], stream: bool) -> AsyncIterator[str]:
+    """Request a completion from Groq under the upstream scheduler."""
+
+    settings = get_settings()
+    client = _get_chat_client()
+
+    model = settings.groq_model
+    started = time.perf_counter()
+    # The concurrency slot is held until the streamed completion is consumed.
+    async with get_scheduler(GROQ).slot() as scheduler:
+        try:
+            completion = await scheduler.call(
+                lambda: client.chat.completions.create(
+                    model=model,
+                    messages=request_messages,
+                    stream=stream,
+                )
+            )
+        except APIStatusError as exc:
+            detail = exc.response.text if exc.response is not None else str(exc)
+            raise RuntimeError(
+                "Groq chat completion request failed with status "
+                f"{exc.status_code}: {detail}"
+            ) from exc
+        except OpenAIError as exc:  # pragma: no cover - network errors only
+            raise RuntimeError(f"Groq chat completion request failed: {exc}") from exc
+
+        if not stream:
+            metrics.LLM_COMPLETION_SECONDS.observe(time.perf_counter() - started, model, "false")
+            message = completion.choices[0].message.content if completion.choices else ""
+            if message:
+                yield message
+            return
+
+        first_token_at: float | None = None
+        generated = 0
+        try:
+            async for chunk in completion:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        metrics.LLM_TTFT_SECONDS.observe(first_token_at - started, model)
+                    generated += estimate_tokens(content)
+                    yield content
+        finally:
+            await completion.close()
+            finished = time.perf_counter()
+            metrics.LLM_COMPLETION_SECONDS.observe(finished - started, model, "true")
+            if first_token_at is not None and finished > first_token_at:
+                metrics.LLM_TOKENS_PER_SECOND.observe(generated / (finished - first_token_at), model)
 
 
 async def transcribe_audio(audio_bytes: bytes, mime_type: str = "audio/webm") -> str:
@@ -120,26 +188,32 @@ async def transcribe_audio(audio_bytes: bytes, mime_type: str = "audio/webm") ->
 
     headers = _build_headers(accept="application/json", content_type=None)
     files = {"file": ("audio", audio_bytes, mime_type)}
-    data = {"model": "whisper-large-v3"}
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    data = {"model": GROQ_TRANSCRIBE_MODEL}
+    client = get_groq_client()
+
+    async def send() -> httpx.Response:
+        response = await client.post(
+            GROQ_TRANSCRIBE_PATH,
+            headers=headers,
+            data=data,
+            files=files,
+        )
+        response.raise_for_status()
+        return response
+
+    try:
+        with metrics.STT_SECONDS.time(GROQ_TRANSCRIBE_MODEL):
+            response = await get_scheduler(GROQ).run(send)
+    except httpx.HTTPStatusError as exc:  # pragma: no cover - network errors only
+        detail: str
         try:
-            response = await client.post(
-                GROQ_TRANSCRIBE_ENDPOINT,
-                headers=headers,
-                data=data,
-                files=files,
-            )
-            response.raise_for_status()
-        except httpx.HTTPStatusError as exc:  # pragma: no cover - network errors only
-            detail: str
-            try:
-                body = await exc.response.aread()
-                detail = body.decode() if body else exc.response.text
-            except Exception:  # noqa: BLE001 - best effort decoding
-                detail = "<unable to decode error payload>"
-            raise RuntimeError(
-                "Groq transcription request failed with status "
-                f"{exc.response.status_code}: {detail}"
-            ) from exc
+            body = await exc.response.aread()
+            detail = body.decode() if body else exc.response.text
+        except Exception:  # noqa: BLE001 - best effort decoding
+            detail = "<unable to decode error payload>"
+        raise RuntimeError(
+            "Groq transcription request failed with status "
+            f"{exc.response.status_code}: {detail}"
+        ) from exc
 
-        return response.json().get("text", "")
+    return response.json().get("text", "")
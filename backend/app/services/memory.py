@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+"""Chunking helpers used to memorise chats in the knowledge base."""
+
+import uuid
+from dataclasses import dataclass
+from typing import Sequence
+
+from app.services.tokens import estimate_tokens, split_by_tokens
+
+MEMORY_NAMESPACE = uuid.UUID("6f1c3a52-9b0e-4d8a-a7f4-2c5e8d9b1f30")
+
+
+@dataclass
+class MemoryChunk:
+    """A token-bounded window over consecutive chat messages."""
+
+    index: int
+    text: str
+    first_message_id: str
+    last_message_id: str
+    # Index of the chunk's first piece among the pieces of its first message.
+    first_offset: int = 0
+
+
+def chunk_point_id(chat_id: str, index: int) -> str:
+    """Return the deterministic vector store point ID for a chat memory chunk."""
+
+    return str(uuid.uuid5(MEMORY_NAMESPACE, f"{chat_id}:{index}"))
+
+
+def chunk_messages(
+    messages: Sequence[tuple[str, str]],
+    max_tokens: int,
+    overlap_tokens: int,
+    start_index: int = 0,
+    start_offset: int = 0,
+) -> list[MemoryChunk]:
+    """Group ``(message_id, text)`` pairs into overlapping, token-bounded chunks.
+
+    Long messages are split into several pieces. Chunks are built greedily, so
+    re-chunking from a previously emitted chunk's first message, skipping its
+    ``first_offset`` pieces via ``start_offset``, reproduces that chunk before
+    continuing with any newer messages.
+    """
+
+    units: list[tuple[str, str, int, int]] = []
+    for position, (message_id, text) in enumerate(messages):
+        pieces = split_by_tokens(text, max_tokens)
+        first = start_offset if position == 0 else 0
+        for offset in range(first, len(pieces)):
+            units.append((message_id, pieces[offset], estimate_tokens(pieces[offset]), offset))
+
+    chunks: list[MemoryChunk] = []
+    start = 0
+    while start < len(units):
+        end = start
+        total = 0
+        while end < len(units) and (end == start or total + units[end][2] <= max_tokens):
+            total += units[end][2]
+            end += 1
+
+        chunks.append(
+            MemoryChunk(
+                index=start_index + len(chunks),
+                text="\n".join(unit[1] for unit in units[start:end]),
+                first_message_id=units[start][0],
+                last_message_id=units[end - 1][0],
+                first_offset=units[start][3],
+            )
+        )
+        if end >= len(units):
+            break
+
+        # Carry trailing units into the next chunk, always advancing by at least one unit.
+        next_start = end
+        overlap = 0
+        while next_start - 1 > start and overlap + units[next_start - 1][2] <= overlap_tokens:
+            next_start -= 1
+            overlap += units[next_start][2]
+        start = next_start
+    return chunks
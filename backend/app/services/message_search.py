@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+"""Ranked full-text search over chat messages.
+
+Queries run against the database's own full-text index, created by the
+``0004_message_search`` and ``0008_message_search_keys`` migrations: FTS5 on
+SQLite and a ``tsvector`` GIN index on PostgreSQL. Matching never scans the
+messages table.
+
+Snippets are HTML: message text is escaped and only the highlight tags are
+markup, so clients can render them directly.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Text search configuration; must match the 0004_message_search migration.
+TS_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Private-use characters the database wraps matches in; they are swapped for
+# the highlight tags once the snippet text has been escaped.
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+SNIPPET_WORDS = 24
+
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+_SQLITE_QUERY = """
+SELECT * FROM (
+    SELECT m.id AS id, m.chat_id AS chat_id, c.title AS chat_title, m.seq AS seq, m.role AS role,
+           m.created_at AS created_at,
+           snippet(messages_fts, 0, :start, :stop, '…', :words) AS snippet,
+           -bm25(messages_fts) AS score
+    FROM messages_fts
+    JOIN messages_fts_keys AS k ON k.key = messages_fts.rowid
+    JOIN messages AS m ON m.id = k.message_id
+    JOIN chats AS c ON c.id = m.chat_id
+    WHERE messages_fts MATCH :query {chat_filter}
+) AS hits
+{after}
+ORDER BY score DESC, id
+LIMIT :limit
+"""
+
+_POSTGRES_QUERY = """
+SELECT * FROM (
+    SELECT m.id AS id, m.chat_id AS chat_id, c.title AS chat_title, m.seq AS seq, m.role AS role,
+           m.created_at AS created_at,
+           ts_headline(CAST(:config AS regconfig), m.content, q, :options) AS snippet,
+           CAST(ts_rank_cd(m.content_tsv, q) AS float8) AS score
+    FROM messages AS m
+    JOIN chats AS c ON c.id = m.chat_id
+    CROSS JOIN websearch_to_tsquery(CAST(:config AS regconfig), :query) AS q
+    WHERE m.content_tsv @@ q {chat_filter}
+) AS hits
+{after}
+ORDER BY score DESC, id
+LIMIT :limit
+"""
+
+_AFTER = "WHERE score < :after_score OR (score = :after_score AND id > :after_id)"
+
+
+@dataclass
+class SearchHit:
+    """A message matching a search, with a highlighted excerpt."""
+
+    id: str
+    chat_id: str
+    chat_title: str
+    seq: int
+    role: str
+    created_at: datetime
+    snippet: str
+    score: float
+
+
+def fts5_query(query: str) -> str:
+    """Translate user input into a safe FTS5 expression.
+
+    Words become quoted terms that must all match; ``"quoted phrases"`` stay
+    phrases and a trailing ``*`` makes a term a prefix match. FTS5 operators
+    in the input are treated as plain words.
+    """
+
+    terms = []
+    for phrase, word in _TERM.findall(query):
+        prefix = not phrase and word.endswith("*")
+        term = (phrase or word.rstrip("*")).replace('"', "").strip()
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+async def search_messages(
+    session: AsyncSession,
+    query: str,
+    *,
+    chat_id: str | None = None,
+    limit: int = 20,
+    after: tuple[float, str] | None = None,
+) -> list[SearchHit]:
+    """Return up to ``limit`` messages matching ``query``, best first.
+
+    ``after`` is the ``(score, id)`` of the last hit on the previous page.
+    Raises ``RuntimeError`` on databases without a supported full-text index.
+    """
+
+    dialect = session.bind.dialect.name if session.bind is not None else ""
+    params: dict = {"limit": limit, "chat_id": chat_id}
+    if dialect == "sqlite":
+        statement = _SQLITE_QUERY
+        params.update(
+            query=fts5_query(query), start=_MARK_START, stop=_MARK_END, words=SNIPPET_WORDS
+        )
+    elif dialect == "postgresql":
+        statement = _POSTGRES_QUERY
+        params.update(
+            query=query,
+            config=TS_CONFIG,
+            options=(
+                f"StartSel={_MARK_START}, StopSel={_MARK_END}, "
+                f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}"
+            ),
+        )
+    else:
+        raise RuntimeError(f"Full-text search is not supported on {dialect or 'this database'}")
+    if not params["query"].strip():
+        return []
+
+    if after is not None:
+        params.update(after_score=after[0], after_id=after[1])
+    sql = statement.format(
+        chat_filter="AND m.chat_id = :chat_id" if chat_id is not None else "",
+        after=_AFTER if after is not None else "",
+    )
+    rows = (await session.execute(text(sql), params)).mappings().all()
+    return [
+        SearchHit(
+            id=row["id"],
+            chat_id=row["chat_id"],
+            chat_title=row["chat_title"],
+            seq=row["seq"],
+            role=row["role"],
+            created_at=_as_datetime(row["created_at"]),
+            snippet=_highlight(row["snippet"]),
+            score=float(row["score"]),
+        )
+        for row in rows
+    ]
+
+
+def _highlight(snippet: str) -> str:
+    """Escape ``snippet`` as HTML, then turn the match markers into highlight tags."""
+
+    escaped = html.escape(snippet)
+    return escaped.replace(_MARK_START, HIGHLIGHT_START).replace(_MARK_END, HIGHLIGHT_END)
+
+
+def _as_datetime(value: datetime | str) -> datetime:
+    # Textual SQL on SQLite returns timestamps as stored strings.
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
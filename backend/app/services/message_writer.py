@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+"""Write-behind group commit for chat messages.
+
+Concurrent appends are queued for a single background writer. The writer
+gathers everything that arrives within a short window and persists it in one
+transaction, so many requests share one commit (and one fsync) instead of
+paying for their own. Each caller awaits a future that resolves only once its
+rows are durably committed.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.database import get_session_factory
+from app.models import Message
+from app.services.messages import MessageDraft, append_messages
+
+_writer: "MessageWriter | None" = None
+
+
+@dataclass
+class _Pending:
+    chat_id: str
+    drafts: list[MessageDraft]
+    future: asyncio.Future[list[Message] | None] = field(repr=False)
+
+
+class MessageWriter:
+    """Batch message inserts from many callers into shared transactions."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        window: float = 0.005,
+        max_messages: int = 512,
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_messages = max_messages
+        self._queue: asyncio.Queue[_Pending | None] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+
+    async def submit(self, chat_id: str, drafts: list[MessageDraft]) -> list[Message] | None:
+        """Append ``drafts`` to ``chat_id`` and wait until they are committed.
+
+        Returns ``None`` when the chat does not exist. Database errors are
+        raised to the callers whose rows could not be written.
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future: asyncio.Future[list[Message] | None] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Pending(chat_id, drafts, future))
+        return await future
+
+    async def _collect(self) -> tuple[list[_Pending], bool]:
+        """Gather requests arriving within the window; report whether to stop."""
+
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        size = len(first.drafts)
+        stop = False
+        deadline = time.monotonic() + self.window
+        while size < self.max_messages:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if pending is None:
+                stop = True
+                break
+            batch.append(pending)
+            size += len(pending.drafts)
+        # Callers that gave up while queued are not written.
+        return [pending for pending in batch if not pending.future.done()], stop
+
+    async def _run(self) -> None:
+        while True:
+            batch, stop = await self._collect()
+            if batch:
+                await self._write(batch)
+            if stop:
+                return
+
+    async def _write(self, batch: list[_Pending]) -> None:
+        try:
+            results = await self._commit(batch)
+        except Exception:  # noqa: BLE001 - isolate the failing request below
+            # One bad request must not fail its neighbours: retry each on its own.
+            for pending in batch:
+                try:
+                    (result,) = await self._commit([pending])
+                except Exception as exc:  # noqa: BLE001 - reported to that caller
+                    _settle(pending, exception=exc)
+                else:
+                    _settle(pending, result)
+            return
+        for pending, result in zip(batch, results):
+            _settle(pending, result)
+
+    async def _commit(self, batch: list[_Pending]) -> list[list[Message] | None]:
+        # Requests for the same chat reserve their sequence numbers in one UPDATE.
+        by_chat: dict[str, list[_Pending]] = {}
+        for pending in batch:
+            by_chat.setdefault(pending.chat_id, []).append(pending)
+
+        results: dict[int, list[Message] | None] = {}
+        async with self.session_factory() as session:
+            for chat_id, group in by_chat.items():
+                drafts = [draft for pending in group for draft in pending.drafts]
+                messages = await append_messages(session, chat_id, drafts)
+                offset = 0
+                for pending in group:
+                    count = len(pending.drafts)
+                    results[id(pending)] = messages[offset : offset + count] if messages else None
+                    offset += count
+            await session.commit()
+        return [results[id(pending)] for pending in batch]
+
+    async def close(self) -> None:
+        """Write everything already queued, then stop the background writer."""
+
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        self._queue.put_nowait(None)
+        await task
+
+
+def _settle(
+    pending: _Pending, result: list[Message] | None = None, exception: Exception | None = None
+) -> None:
+    if pending.future.done():
+        return
+    if exception is not None:
+        pending.future.set_exception(exception)
+    else:
+        pending.future.set_result(result)
+
+
+def get_message_writer() -> MessageWriter | None:
+    """Return the shared writer, or ``None`` when write-behind is disabled."""
+
+    global _writer
+    settings = get_settings()
+    if not settings.message_write_behind:
+        return None
+    if _writer is None:
+        _writer = MessageWriter(
+            get_session_factory(),
+            window=settings.message_group_commit_ms / 1000,
+            max_messages=settings.message_group_commit_max,
+        )
+    return _writer
+
+
+async def close_message_writer() -> None:
+    """Flush pending writes and stop the shared writer."""
+
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        await writer.close()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+"""Helpers for writing chat messages."""
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Chat, Message
+from app.services.tokens import estimate_tokens
+
+
+async def allocate_seq(session: AsyncSession, chat_id: str, count: int = 1) -> int | None:
+    """Reserve ``count`` consecutive message sequence numbers for ``chat_id``.
+
+    The chat's counter is bumped with a single ``UPDATE ... RETURNING`` so
+    concurrent writers serialise on the chat row. Returns the first reserved
+    number, or ``None`` when the chat does not exist.
+    """
+
+    result = await session.execute(
+        update(Chat)
+        .where(Chat.id == chat_id)
+        .values(last_seq=Chat.last_seq + count)
+        .returning(Chat.last_seq)
+    )
+    last_seq = result.scalar_one_or_none()
+    if last_seq is None:
+        return None
+    return last_seq - count + 1
+
+
+@dataclass
+class MessageDraft:
+    """A message to append, before its sequence number is assigned."""
+
+    role: str
+    content: str
+    audio_url: str | None = None
+    id: str | None = None
+
+
+def build_messages(chat_id: str, first_seq: int, drafts: list[MessageDraft]) -> list[Message]:
+    """Materialise ``drafts`` as rows numbered from ``first_seq``.
+
+    IDs and timestamps are assigned here rather than by the database, so the
+    returned objects are complete without a refresh after commit.
+    """
+
+    now = datetime.utcnow()
+    return [
+        Message(
+            id=draft.id or str(uuid.uuid4()),
+            chat_id=chat_id,
+            seq=first_seq + offset,
+            role=draft.role,
+            content=draft.content,
+            audio_url=draft.audio_url,
+            token_count=estimate_tokens(draft.content),
+            created_at=now,
+        )
+        for offset, draft in enumerate(drafts)
+    ]
+
+
+async def append_messages(
+    session: AsyncSession, chat_id: str, drafts: list[MessageDraft]
+) -> list[Message] | None:
+    """Stage ``drafts`` at the end of ``chat_id`` with one sequence reservation.
+
+    Returns ``None`` when the chat does not exist. The caller commits.
+    """
+
+    first_seq = await allocate_seq(session, chat_id, len(drafts))
+    if first_seq is None:
+        return None
+    messages = build_messages(chat_id, first_seq, drafts)
+    session.add_all(messages)
+    return messages
+
+
+async def append_message(
+    session: AsyncSession,
+    chat_id: str,
+    role: str,
+    content: str,
+    audio_url: str | None = None,
+    message_id: str | None = None,
+) -> Message | None:
+    """Stage a new message at the end of ``chat_id``.
+
+    Returns ``None`` when the chat does not exist. The caller commits.
+    """
+
+    messages = await append_messages(
+        session, chat_id, [MessageDraft(role, content, audio_url=audio_url, id=message_id)]
+    )
+    return messages[0] if messages else None
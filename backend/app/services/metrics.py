@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+"""Lightweight Prometheus metrics registry and the application's instruments."""
+
+import time
+from bisect import bisect_left
+from contextlib import aclosing, contextmanager
+from typing import AsyncIterator, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_RATE_BUCKETS = (5, 10, 25, 50, 100, 200, 400, 800, 1600)
+BYTE_RATE_BUCKETS = (8e3, 16e3, 32e3, 64e3, 128e3, 256e3, 512e3, 1e6, 4e6)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class for labelled metrics.
+
+    Observations are plain dictionary updates made from the event loop thread,
+    so the hot path takes no locks.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _labels(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{self._labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    @contextmanager
+    def track(self, *labels: str) -> Iterator[None]:
+        """Increment for the duration of the block."""
+
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution with running sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last is +Inf), sum, count].
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the block."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {count}")
+        return lines
+
+
+_registry: list[_Metric] = []
+
+
+def render_metrics() -> str:
+    """Return every registered metric in the Prometheus text exposition format."""
+
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+async def track_stream(route: str, source: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Yield ``source`` while counting it as an in-flight stream for ``route``."""
+
+    with STREAMS_IN_FLIGHT.track(route):
+        async with aclosing(source):
+            async for item in source:
+                yield item
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing HTTP requests, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    getattr(route, "path", "unmatched"),
+                    scope["method"],
+                    str(message["status"]),
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to produce an HTTP response (streams: until headers are sent).",
+    ["route", "method", "status"],
+)
+STREAMS_IN_FLIGHT = Gauge(
+    "streams_in_flight", "Streaming responses and websockets currently open.", ["route"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Database statement execution time.", ["operation"]
+)
+EMBEDDING_SECONDS = Histogram(
+    "embedding_request_duration_seconds", "Latency of upstream embedding requests.", ["model"]
+)
+EMBEDDING_TEXTS = Counter("embedding_texts_total", "Texts sent for embedding upstream.", ["model"])
+VECTOR_SEARCH_SECONDS = Histogram(
+    "vector_search_duration_seconds", "Vector similarity search latency.", ["backend"]
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds", "Time from request to the first completion token.", ["model"]
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second",
+    "Completion throughput after the first token (estimated tokens).",
+    ["model"],
+    buckets=TOKEN_RATE_BUCKETS,
+)
+LLM_COMPLETION_SECONDS = Histogram(
+    "llm_completion_duration_seconds", "Total completion request time.", ["model", "stream"]
+)
+TTS_TTFB_SECONDS = Histogram(
+    "tts_time_to_first_byte_seconds", "Time from TTS request to the first audio byte.", ["voice"]
+)
+TTS_BYTES_PER_SECOND = Histogram(
+    "tts_bytes_per_second", "Audio streaming throughput.", ["voice"], buckets=BYTE_RATE_BUCKETS
+)
+STT_SECONDS = Histogram("stt_duration_seconds", "Speech-to-text request latency.", ["model"])
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+"""Opaque keyset pagination cursors."""
+
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values: datetime | str | int | float) -> str:
+    """Encode a keyset position as an opaque URL-safe token."""
+
+    parts = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(parts, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decode a cursor produced by :func:`encode_cursor` into its raw JSON values.
+
+    Raises ``ValueError`` when the token is malformed.
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("Invalid pagination cursor")
+    return values
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+"""Lexical scoring, rank fusion and diversification for knowledge search."""
+
+import math
+import re
+from collections import Counter
+from typing import Hashable, Sequence
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be but by do does for from had has have how i if in is it its of on or
+    so that the their then there these this to was what when where which who why will with you
+    """.split()
+)
+# Query terms used for lexical matching; longer questions keep their first distinct words.
+MAX_QUERY_TERMS = 16
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case word tokens of ``text``."""
+
+    return _WORD.findall(text.lower())
+
+
+def query_terms(query: str) -> list[str]:
+    """Distinct, meaningful terms of a search query, in order of appearance."""
+
+    terms: list[str] = []
+    for token in tokenize(query):
+        if len(token) > 1 and token not in _STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms[:MAX_QUERY_TERMS]
+
+
+def bm25_scores(
+    terms: Sequence[str], documents: Sequence[str], k1: float = 1.2, b: float = 0.75
+) -> list[float]:
+    """Okapi BM25 score of each document for ``terms``.
+
+    Document frequencies and the average length come from ``documents``
+    themselves, so scores rank a candidate pool rather than a whole corpus.
+    """
+
+    if not terms or not documents:
+        return [0.0 for _ in documents]
+    counts = [Counter(tokenize(document)) for document in documents]
+    lengths = [sum(count.values()) for count in counts]
+    average = (sum(lengths) / len(lengths)) or 1.0
+    total = len(documents)
+    idf = {}
+    for term in terms:
+        frequency = sum(1 for count in counts if term in count)
+        idf[term] = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+
+    scores = []
+    for count, length in zip(counts, lengths):
+        score = 0.0
+        for term in terms:
+            tf = count.get(term, 0)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average))
+        scores.append(score)
+    return scores
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> dict[Hashable, float]:
+    """Fuse ranked ID lists into ``{id: score}`` using reciprocal rank fusion."""
+
+    fused: dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return fused
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def mmr(
+    relevance: Sequence[float],
+    vectors: Sequence[Sequence[float]],
+    limit: int,
+    diversity: float = 0.3,
+) -> list[int]:
+    """Pick ``limit`` indices by maximal marginal relevance.
+
+    Each step takes the candidate maximising
+    ``(1 - diversity) * relevance - diversity * max_similarity_to_selected``.
+    ``relevance`` should be on a 0..1 scale.
+    """
+
+    remaining = list(range(len(relevance)))
+    selected: list[int] = []
+    similarity: dict[tuple[int, int], float] = {}
+    while remaining and len(selected) < limit:
+        best, best_score = remaining[0], -math.inf
+        for index in remaining:
+            redundancy = 0.0
+            for chosen in selected:
+                key = (min(index, chosen), max(index, chosen))
+                if key not in similarity:
+                    similarity[key] = _cosine(vectors[index], vectors[chosen])
+                redundancy = max(redundancy, similarity[key])
+            score = (1 - diversity) * relevance[index] - diversity * redundancy
+            if score > best_score:
+                best, best_score = index, score
+        selected.append(best)
+        remaining.remove(best)
+    return selected
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+"""Signalling rooms with serialise-once fan-out across workers."""
+
+import asyncio
+import json
+import uuid
+from typing import Any
+
+from fastapi import WebSocket
+
+from app.config import get_settings
+from app.services.broker import Broker, create_broker
+
+_manager: "RoomManager | None" = None
+_manager_lock = asyncio.Lock()
+
+# Close code sent to consumers that cannot keep up (RFC 6455 "try again later").
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class RoomConnection:
+    """A websocket participant with a bounded outbound queue.
+
+    Room frames are queued and written by a dedicated sender task so one slow
+    socket never stalls a broadcast. When the queue is full the frame is dropped
+    or the connection is closed, depending on ``policy``.
+    """
+
+    def __init__(self, websocket: WebSocket, send_lock: asyncio.Lock, max_queue: int, policy: str = "drop"):
+        self.id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.dropped = 0
+        self._send_lock = send_lock
+        self._policy = policy
+        self._queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=max_queue)
+        self._closed = False
+        self._sender = asyncio.create_task(self._drain())
+
+    def offer(self, frame: str) -> None:
+        """Queue ``frame`` without waiting, applying the slow-consumer policy."""
+
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self._policy == "close":
+                self._closed = True
+                asyncio.create_task(self._close_slow())
+
+    async def _drain(self) -> None:
+        while True:
+            frame = await self._queue.get()
+            if frame is None:
+                return
+            try:
+                async with self._send_lock:
+                    await self.websocket.send_text(frame)
+            except Exception:  # noqa: BLE001 - the reader loop notices the disconnect.
+                self._closed = True
+                return
+
+    async def _close_slow(self) -> None:
+        self._sender.cancel()
+        try:
+            await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Consumer too slow")
+        except Exception:  # noqa: BLE001 - the socket may already be gone.
+            pass
+
+    async def close(self) -> None:
+        """Stop the sender task, discarding undelivered frames."""
+
+        self._closed = True
+        self._sender.cancel()
+        await asyncio.gather(self._sender, return_exceptions=True)
+
+
+class RoomManager:
+    """Track local room members and relay broadcasts through a pub/sub broker.
+
+    Each broadcast is serialised once: the frame is queued for every local
+    member and the same bytes are published for other workers. Frames that
+    arrive from the broker carrying this worker's ID were already delivered
+    locally and are ignored.
+    """
+
+    def __init__(self, broker: Broker):
+        self.broker = broker
+        self.worker_id = uuid.uuid4().hex
+        self._rooms: dict[str, dict[str, RoomConnection]] = {}
+
+    @staticmethod
+    def _channel(room: str) -> str:
+        return f"signalling:room:{room}"
+
+    async def join(self, room: str, connection: RoomConnection) -> None:
+        """Add ``connection`` to ``room``, subscribing this worker on first join."""
+
+        members = self._rooms.get(room)
+        if members is None:
+            members = self._rooms[room] = {}
+            await self.broker.subscribe(self._channel(room), lambda data: self._deliver(room, data))
+        members[connection.id] = connection
+
+    async def leave(self, room: str, connection: RoomConnection) -> None:
+        """Remove ``connection`` from ``room``, unsubscribing once it is empty locally."""
+
+        members = self._rooms.get(room)
+        if members is None:
+            return
+        members.pop(connection.id, None)
+        if not members:
+            del self._rooms[room]
+            await self.broker.unsubscribe(self._channel(room))
+
+    def members(self, room: str) -> int:
+        """Return the number of participants connected to this worker."""
+
+        return len(self._rooms.get(room, ()))
+
+    async def broadcast(self, room: str, data: Any, sender: RoomConnection | None = None) -> None:
+        """Send ``data`` to every participant of ``room`` except ``sender``."""
+
+        sender_id = sender.id if sender is not None else None
+        frame = json.dumps({"type": "room.message", "room": room, "from": sender_id, "data": data})
+        self._fan_out(room, frame, sender_id)
+        envelope = json.dumps({"origin": self.worker_id, "from": sender_id, "frame": frame})
+        await self.broker.publish(self._channel(room), envelope.encode("utf-8"))
+
+    def _deliver(self, room: str, data: bytes) -> None:
+        envelope = json.loads(data)
+        if envelope["origin"] == self.worker_id:
+            return
+        self._fan_out(room, envelope["frame"], envelope["from"])
+
+    def _fan_out(self, room: str, frame: str, sender_id: str | None) -> None:
+        for connection_id, connection in list(self._rooms.get(room, {}).items()):
+            if connection_id != sender_id:
+                connection.offer(frame)
+
+
+async def get_room_manager() -> RoomManager:
+    """Return the process-wide room manager, starting its broker on first use."""
+
+    global _manager
+    if _manager is None:
+        async with _manager_lock:
+            if _manager is None:
+                broker = create_broker(get_settings().signalling_broker_url)
+                await broker.start()
+                _manager = RoomManager(broker)
+    return _manager
+
+
+async def close_room_manager() -> None:
+    """Close the broker connection used for signalling rooms."""
+
+    global _manager
+    manager, _manager = _manager, None
+    if manager is not None:
+        await manager.broker.close()
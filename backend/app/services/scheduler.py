@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+"""Rate-limit-aware scheduling of upstream provider requests."""
+
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+
+import httpx
+from openai import APIConnectionError
+
+from app.config import get_settings
+from app.services.http_clients import ELEVENLABS, GROQ, VECTOR_STORE
+
+T = TypeVar("T")
+
+# Lower values are served first when a provider is saturated.
+INTERACTIVE = 0
+BULK = 1
+BACKGROUND = 2
+
+TRANSIENT_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+_priority: ContextVar[int] = ContextVar("upstream_priority", default=INTERACTIVE)
+_schedulers: dict[str, "UpstreamScheduler"] = {}
+
+
+class UpstreamUnavailableError(RuntimeError):
+    """Raised when a provider is failing fast or still throttling after every retry."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} is temporarily unavailable; retry in {math.ceil(retry_after)}s.")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Run upstream calls made inside the block at priority ``level``."""
+
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Reservation-based token bucket; callers sleep for the returned delay."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take one token and return how long to wait before it may be used."""
+
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class CircuitBreaker:
+    """Open after consecutive failures, then allow one probe once ``reset_timeout`` passes."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    def retry_after(self) -> float:
+        """Seconds until a probe is allowed, or ``0`` if requests may proceed."""
+
+        if self._opened_at is None:
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def check(self, provider: str) -> None:
+        """Raise without side effects if the breaker is open."""
+
+        remaining = self.retry_after()
+        if remaining > 0:
+            raise UpstreamUnavailableError(provider, remaining)
+
+    def before_call(self, provider: str) -> bool:
+        """Admit a call, letting a single probe through when half-open.
+
+        Returns whether this call took the probe slot.
+        """
+
+        self.check(provider)
+        if self._opened_at is not None:
+            if self._probing:
+                raise UpstreamUnavailableError(provider, self.reset_timeout)
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Free the half-open probe slot without judging the upstream, e.g. on cancellation."""
+
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None and isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+    return status
+
+
+def _is_transient(exc: BaseException, status: int | None) -> bool:
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    return isinstance(exc, (httpx.TransportError, APIConnectionError))
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    """Return the ``Retry-After`` delay in seconds carried by an error response."""
+
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class UpstreamScheduler:
+    """Admission control, retries and circuit breaking for one provider.
+
+    Concurrency slots are granted in priority order, so interactive requests
+    overtake queued bulk work. Each attempt then takes a token from the rate
+    bucket and waits out any ``Retry-After`` pause. Transient failures (429,
+    5xx, timeouts, connection errors) are retried with full-jitter exponential
+    backoff. Repeated failures open the circuit breaker so later calls fail
+    fast with :class:`UpstreamUnavailableError`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate: float,
+        burst: int,
+        concurrency: int,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+        breaker: CircuitBreaker,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = breaker
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._unlimited = concurrency <= 0
+        self._available = concurrency
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+        self._paused_until = 0.0
+
+    async def _acquire(self, level: int) -> None:
+        if self._unlimited:
+            return
+        if self._available > 0 and not self._waiters:
+            self._available -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        if self._unlimited:
+            return
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._available += 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator["UpstreamScheduler"]:
+        """Hold a concurrency slot, e.g. for the lifetime of a streamed response."""
+
+        self.breaker.check(self.name)
+        await self._acquire(_priority.get())
+        try:
+            yield self
+        finally:
+            self._release()
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """Run ``operation`` under the rate limit and breaker, retrying transient failures.
+
+        The caller must already hold a slot; use :meth:`run` otherwise.
+        """
+
+        attempt = 0
+        while True:
+            probe = self.breaker.before_call(self.name)
+            try:
+                delay = max(self.bucket.reserve(), self._paused_until - time.monotonic())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                result = await operation()
+            except Exception as exc:
+                status = _status_code(exc)
+                if not _is_transient(exc, status):
+                    self.breaker.record_success()
+                    raise
+                if status != 429:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                retry_after = _retry_after(exc)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+                if attempt >= self.max_retries:
+                    raise UpstreamUnavailableError(self.name, max(retry_after or 0.0, backoff, 1.0)) from exc
+                attempt += 1
+                await asyncio.sleep(backoff)
+                continue
+            except BaseException:
+                # Cancelled mid-call (e.g. the client went away): the outcome says
+                # nothing about the upstream, but a probe must not stay claimed.
+                if probe:
+                    self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def run(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """Acquire a slot and :meth:`call` ``operation``."""
+
+        async with self.slot():
+            return await self.call(operation)
+
+
+def _build_scheduler(name: str) -> UpstreamScheduler:
+    settings = get_settings()
+    if name == GROQ:
+        rate, burst, concurrency = (
+            settings.groq_requests_per_second,
+            settings.groq_burst,
+            settings.groq_max_concurrency,
+        )
+    elif name == ELEVENLABS:
+        rate, burst, concurrency = (
+            settings.elevenlabs_requests_per_second,
+            settings.elevenlabs_burst,
+            settings.elevenlabs_max_concurrency,
+        )
+    elif name == VECTOR_STORE:
+        rate, burst, concurrency = (
+            settings.vector_store_requests_per_second,
+            settings.vector_store_burst,
+            settings.vector_store_max_concurrency,
+        )
+    else:
+        raise ValueError(f"Unknown upstream service: {name}")
+    return UpstreamScheduler(
+        name,
+        rate=rate,
+        burst=burst,
+        concurrency=concurrency,
+        max_retries=settings.upstream_max_retries,
+        base_delay=settings.upstream_retry_base_delay,
+        max_delay=settings.upstream_retry_max_delay,
+        breaker=CircuitBreaker(
+            settings.upstream_breaker_failures, settings.upstream_breaker_reset_seconds
+        ),
+    )
+
+
+def get_scheduler(name: str) -> UpstreamScheduler:
+    """Return the process-wide scheduler for the named upstream."""
+
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        scheduler = _build_scheduler(name)
+        _schedulers[name] = scheduler
+    return scheduler
+
+
+def ensure_available(name: str) -> None:
+    """Raise :class:`UpstreamUnavailableError` if ``name``'s breaker is open.
+
+    Streaming endpoints call this before sending headers so an outage becomes
+    a 503 rather than a truncated stream.
+    """
+
+    get_scheduler(name).breaker.check(name)
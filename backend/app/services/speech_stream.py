@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+"""Concurrent transcription of VAD-segmented streaming audio."""
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from app.services import llm
+from app.services.vad import EnergyVAD, SpeechSegment, pcm_to_wav
+
+_STOP = object()
+
+
+class SpeechStream:
+    """Turn streamed PCM into partial and final transcripts sent through ``send``.
+
+    Finished utterances are queued for a small pool of transcription workers.
+    The queue is bounded: when it is full, :meth:`feed` waits for a free slot
+    (so the socket reader stops consuming audio) and partial snapshots are
+    dropped rather than queued.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict[str, Any]], Awaitable[None]],
+        vad: EnergyVAD,
+        workers: int = 2,
+        max_pending: int = 4,
+    ):
+        self._send = send
+        self._vad = vad
+        self._queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=max(1, max_pending))
+        self._workers = [asyncio.create_task(self._work()) for _ in range(max(1, workers))]
+        self._finalised: set[int] = set()
+
+    async def _work(self) -> None:
+        while True:
+            segment = await self._queue.get()
+            if segment is _STOP:
+                return
+            if not segment.final and segment.index in self._finalised:
+                continue
+            try:
+                text = await llm.transcribe_audio(
+                    pcm_to_wav(segment.pcm, self._vad.sample_rate), mime_type="audio/wav"
+                )
+                message: dict[str, Any] = {
+                    "type": "transcript",
+                    "segment": segment.index,
+                    "final": segment.final,
+                    "text": text.strip(),
+                }
+            except Exception as exc:  # noqa: BLE001 - reported to the client
+                message = {"type": "error", "segment": segment.index, "detail": str(exc)}
+            if not segment.final and segment.index in self._finalised:
+                continue
+            if segment.final:
+                self._finalised.add(segment.index)
+            await self._send(message)
+
+    async def _dispatch(self, segments: list[SpeechSegment]) -> None:
+        for segment in segments:
+            if segment.final:
+                await self._send({"type": "speech_end", "segment": segment.index})
+                await self._queue.put(segment)
+            else:
+                try:
+                    self._queue.put_nowait(segment)
+                except asyncio.QueueFull:
+                    pass
+
+    async def feed(self, pcm: bytes) -> None:
+        """Run VAD over ``pcm`` and queue any resulting segments."""
+
+        await self._dispatch(self._vad.feed(pcm))
+
+    async def flush(self) -> None:
+        """Finalise the current utterance without waiting for trailing silence."""
+
+        await self._dispatch(self._vad.flush())
+
+    async def close(self, drain: bool = True) -> None:
+        """Stop the workers, optionally letting queued segments finish first."""
+
+        if drain:
+            for _ in self._workers:
+                await self._queue.put(_STOP)
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        else:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
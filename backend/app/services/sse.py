@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+"""Compact server-sent event framing and token coalescing."""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator
+
+_DONE = object()
+
+
+def sse_frame(data: Any, event: str | None = None) -> str:
+    """Serialise ``data`` as a single SSE frame with an optional event name."""
+
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+
+def delta_frame(text: str) -> str:
+    """Return the compact ``{"d": ...}`` frame used for streamed text deltas."""
+
+    return sse_frame({"d": text})
+
+
+async def coalesce(
+    deltas: AsyncIterator[str], max_delay: float = 0.0, max_chars: int = 0
+) -> AsyncIterator[str]:
+    """Merge consecutive text deltas into fewer, larger pieces.
+
+    A piece is flushed once it holds ``max_chars`` characters or its first
+    delta has waited ``max_delay`` seconds, whichever comes first. With both
+    limits disabled the deltas are passed through unchanged.
+    """
+
+    if max_delay <= 0 and max_chars <= 0:
+        async for delta in deltas:
+            yield delta
+        return
+
+    queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=256)
+
+    async def pump() -> None:
+        try:
+            async for delta in deltas:
+                await queue.put(delta)
+        except Exception as exc:  # noqa: BLE001 - re-raised by the consumer
+            await queue.put(exc)
+        await queue.put(_DONE)
+
+    producer = asyncio.create_task(pump())
+    buffer: list[str] = []
+    size = 0
+    started = 0.0
+    try:
+        while True:
+            timeout = None
+            if buffer and max_delay > 0:
+                timeout = max(started + max_delay - time.monotonic(), 0.0)
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield "".join(buffer)
+                buffer, size = [], 0
+                continue
+
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if not buffer:
+                started = time.monotonic()
+            buffer.append(item)
+            size += len(item)
+            if max_chars > 0 and size >= max_chars:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        producer.cancel()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+"""Lightweight token estimation helpers."""
+
+# Roughly four characters per token for English text with BPE tokenizers.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Return an approximate token count for ``text`` without loading a tokenizer."""
+
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def split_by_tokens(text: str, max_tokens: int) -> list[str]:
+    """Split ``text`` on whitespace into pieces of at most ``max_tokens`` estimated tokens."""
+
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces: list[str] = []
+    current: list[str] = []
+    size = 0
+    for word in text.split():
+        while len(word) > max_chars:
+            if current:
+                pieces.append(" ".join(current))
+                current, size = [], 0
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        extra = len(word) + (1 if current else 0)
+        if current and size + extra > max_chars:
+            pieces.append(" ".join(current))
+            current, size = [], 0
+            extra = len(word)
+        current.append(word)
+        size += extra
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+"""Stream ``multipart/form-data`` uploads straight to disk.
+
+The request body is fed through python-multipart's incremental parser as it
+arrives. File bytes are written to the destination as soon as they are
+parsed, and form fields are buffered only up to a small limit. Memory use
+therefore does not depend on the upload size, and an oversized upload is
+rejected as soon as it crosses the limit.
+"""
+
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Room allowed beyond the file size for form fields, part headers and boundaries.
+FORM_OVERHEAD_BYTES = 64 * 1024
+# Longest value accepted for a plain (non-file) form field.
+MAX_FIELD_BYTES = 16 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised as soon as an upload exceeds its size limit."""
+
+
+@dataclass
+class MultipartUpload:
+    """A file spooled to ``path`` plus the plain form fields sent with it."""
+
+    path: Path
+    filename: str | None
+    content_type: str | None
+    size: int
+    fields: dict[str, list[str]] = field(default_factory=dict)
+
+
+@dataclass
+class _Part:
+    headers: dict[bytes, bytes] = field(default_factory=dict)
+    name: str = ""
+    filename: str | None = None
+    data: list[bytes] = field(default_factory=list)
+    size: int = 0
+
+
+def _boundary(content_type: str | None) -> bytes:
+    kind, options = parse_options_header(content_type or "")
+    boundary = options.get(b"boundary")
+    if kind != b"multipart/form-data" or not boundary:
+        raise ValueError("Expected a multipart/form-data body with a boundary")
+    return boundary
+
+
+async def receive_file(
+    body: AsyncIterator[bytes],
+    content_type: str | None,
+    directory: Path,
+    file_field: str,
+    max_file_bytes: int,
+) -> MultipartUpload:
+    """Write the ``file_field`` part of a multipart body into ``directory``.
+
+    Exactly one file part named ``file_field`` is expected; other parts are
+    collected as text fields. Raises :class:`UploadTooLargeError` once the
+    file exceeds ``max_file_bytes`` or the body outgrows the file limit plus
+    :data:`FORM_OVERHEAD_BYTES`. Raises ``ValueError`` for malformed bodies.
+    Nothing is left on disk when an error is raised.
+    """
+
+    events: list[tuple[str, object]] = []
+    header: list[bytes] = [b"", b""]
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header[0] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header[1] += data[start:end]
+
+    def on_header_end() -> None:
+        events.append(("header", (header[0].lower(), header[1])))
+        header[0], header[1] = b"", b""
+
+    parser = MultipartParser(
+        _boundary(content_type),
+        {
+            "on_part_begin": lambda: events.append(("begin", None)),
+            "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+            "on_part_end": lambda: events.append(("end", None)),
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": lambda: events.append(("headers", None)),
+            "on_end": lambda: events.append(("finish", None)),
+        },
+    )
+
+    await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4()}.part"
+    upload: MultipartUpload | None = None
+    handle = None
+    part: _Part | None = None
+    fields: dict[str, list[str]] = {}
+    received = 0
+    finished = False
+    try:
+        async for chunk in body:
+            received += len(chunk)
+            if received > max_file_bytes + FORM_OVERHEAD_BYTES:
+                raise UploadTooLargeError(f"Documents are limited to {max_file_bytes} bytes")
+            try:
+                parser.write(chunk)
+            except MultipartParseError as exc:
+                raise ValueError(f"Malformed multipart body: {exc}") from exc
+
+            for event, value in events:
+                if event == "begin":
+                    part = _Part()
+                elif event == "header":
+                    name, header_value = value
+                    part.headers[name] = header_value
+                elif event == "headers":
+                    _, options = parse_options_header(part.headers.get(b"content-disposition", b""))
+                    part.name = options.get(b"name", b"").decode("utf-8", "replace")
+                    filename = options.get(b"filename")
+                    part.filename = filename.decode("utf-8", "replace") if filename is not None else None
+                    if part.name == file_field:
+                        if upload is not None:
+                            raise ValueError(f"Send a single '{file_field}' part")
+                        content = part.headers.get(b"content-type")
+                        upload = MultipartUpload(
+                            path=path,
+                            filename=part.filename,
+                            content_type=content.decode("latin-1") if content else None,
+                            size=0,
+                        )
+                        handle = await asyncio.to_thread(open, path, "wb")
+                elif event == "data":
+                    if part.name == file_field:
+                        upload.size += len(value)
+                        if upload.size > max_file_bytes:
+                            raise UploadTooLargeError(f"Documents are limited to {max_file_bytes} bytes")
+                        await asyncio.to_thread(handle.write, value)
+                    else:
+                        part.size += len(value)
+                        if part.size > MAX_FIELD_BYTES:
+                            raise ValueError(f"Form field '{part.name}' exceeds {MAX_FIELD_BYTES} bytes")
+                        part.data.append(value)
+                elif event == "end":
+                    if part.name == file_field:
+                        await asyncio.to_thread(handle.close)
+                    else:
+                        text = b"".join(part.data).decode("utf-8", "replace")
+                        fields.setdefault(part.name, []).append(text)
+                    part = None
+                elif event == "finish":
+                    finished = True
+            events.clear()
+
+        if not finished:
+            raise ValueError("Multipart body ended early")
+        if upload is None:
+            raise ValueError(f"A '{file_field}' file part is required")
+        upload.fields = fields
+        return upload
+    except BaseException:
+        if handle is not None:
+            await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(path.unlink, True)
+        raise
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+"""Lightweight energy-based voice activity detection over 16-bit PCM audio."""
+
+import io
+import math
+import sys
+import wave
+from array import array
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass
+class SpeechSegment:
+    """Audio for one utterance; ``final`` is false for in-progress snapshots."""
+
+    index: int
+    pcm: bytes
+    final: bool
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap mono 16-bit little-endian PCM in a WAV container."""
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class EnergyVAD:
+    """Segment a PCM stream into utterances using frame energy with an adaptive noise floor.
+
+    Speech starts after ``start_ms`` of consecutive loud frames (keeping
+    ``pre_roll_ms`` of audio before it) and ends after ``end_silence_ms`` of
+    quiet frames or once ``max_utterance_ms`` is reached. While an utterance is
+    open, a partial snapshot is emitted every ``partial_interval_ms``
+    (``0`` disables partials).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16_000,
+        frame_ms: int = 30,
+        threshold_ratio: float = 3.0,
+        min_rms: float = 300.0,
+        start_ms: int = 90,
+        end_silence_ms: int = 600,
+        pre_roll_ms: int = 210,
+        max_utterance_ms: int = 15_000,
+        partial_interval_ms: int = 1_500,
+    ):
+        if sample_rate <= 0 or frame_ms <= 0 or sample_rate * frame_ms // 1000 == 0:
+            raise ValueError("sample_rate and frame_ms must give at least one sample per frame")
+        self.sample_rate = sample_rate
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self._frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self._start_frames = max(1, start_ms // frame_ms)
+        self._end_frames = max(1, end_silence_ms // frame_ms)
+        self._max_frames = max(1, max_utterance_ms // frame_ms)
+        self._partial_frames = partial_interval_ms // frame_ms if partial_interval_ms > 0 else 0
+        self._pre_roll: deque[bytes] = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self._pending = bytearray()
+        self._noise = min_rms / threshold_ratio
+        self._loud_run = 0
+        self._utterance: bytearray | None = None
+        self._utterance_frames = 0
+        self._silent_run = 0
+        self._index = 0
+
+    def _rms(self, frame: bytes) -> float:
+        samples = array("h", frame)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+    def _close(self) -> SpeechSegment:
+        assert self._utterance is not None
+        segment = SpeechSegment(index=self._index, pcm=bytes(self._utterance), final=True)
+        self._index += 1
+        self._utterance = None
+        self._utterance_frames = 0
+        self._silent_run = 0
+        self._loud_run = 0
+        self._pre_roll.clear()
+        return segment
+
+    def _process(self, frame: bytes) -> SpeechSegment | None:
+        rms = self._rms(frame)
+        loud = rms > max(self.min_rms, self._noise * self.threshold_ratio)
+
+        if self._utterance is None:
+            if not loud:
+                self._noise = 0.95 * self._noise + 0.05 * rms
+            self._pre_roll.append(frame)
+            self._loud_run = self._loud_run + 1 if loud else 0
+            if self._loud_run >= self._start_frames:
+                self._utterance = bytearray(b"".join(self._pre_roll))
+                self._utterance_frames = len(self._pre_roll)
+                self._silent_run = 0
+            return None
+
+        self._utterance += frame
+        self._utterance_frames += 1
+        self._silent_run = 0 if loud else self._silent_run + 1
+        if self._silent_run >= self._end_frames or self._utterance_frames >= self._max_frames:
+            return self._close()
+        if self._partial_frames and self._utterance_frames % self._partial_frames == 0:
+            return SpeechSegment(index=self._index, pcm=bytes(self._utterance), final=False)
+        return None
+
+    def feed(self, pcm: bytes) -> list[SpeechSegment]:
+        """Consume raw PCM bytes and return any segments completed by them."""
+
+        self._pending += pcm
+        segments: list[SpeechSegment] = []
+        while len(self._pending) >= self._frame_bytes:
+            frame = bytes(self._pending[: self._frame_bytes])
+            del self._pending[: self._frame_bytes]
+            segment = self._process(frame)
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> list[SpeechSegment]:
+        """Finish the open utterance, if any, e.g. when the client stops sending audio."""
+
+        self._pending.clear()
+        if self._utterance is None:
+            return []
+        return [self._close()]
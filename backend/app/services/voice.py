@@ -2,16 +2,26 @@ from __future__ import annotations
 
 """Voice synthesis utilities."""
 
+import time
 from typing import AsyncIterator
 
 import httpx
 
 from app.config import get_settings
+from app.services import metrics
+from app.services.http_clients import ELEVENLABS, get_elevenlabs_client
+from app.services.scheduler import get_scheduler
 
-ELEVENLABS_TTS_ENDPOINT = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
+ELEVENLABS_TTS_PATH = "/v1/text-to-speech/{voice_id}/stream"
+DEFAULT_VOICE_ID = "eleven_multilingual_v2"
+DEFAULT_VOICE_SETTINGS = {"stability": 0.35, "similarity_boost": 0.75}
 
 
-async def stream_tts(text: str, voice_id: str = "eleven_multilingual_v2") -> AsyncIterator[bytes]:
+async def stream_tts(
+    text: str,
+    voice_id: str = DEFAULT_VOICE_ID,
+    voice_settings: dict | None = None,
+) -> AsyncIterator[bytes]:
     """Stream audio bytes for the provided text using ElevenLabs."""
 
     settings = get_settings()
@@ -25,15 +35,39 @@ async def stream_tts(text: str, voice_id: str = "eleven_multilingual_v2") -> Asy
     }
     payload = {
         "text": text,
-        "voice_settings": {"stability": 0.35, "similarity_boost": 0.75},
+        "voice_settings": voice_settings or DEFAULT_VOICE_SETTINGS,
     }
-    async with httpx.AsyncClient(timeout=None) as client:
-        async with client.stream(
+    client = get_elevenlabs_client()
+
+    async def open_stream() -> httpx.Response:
+        request = client.build_request(
             "POST",
-            ELEVENLABS_TTS_ENDPOINT.format(voice_id=voice_id),
+            ELEVENLABS_TTS_PATH.format(voice_id=voice_id),
             headers=headers,
             json=payload,
-        ) as response:
+        )
+        response = await client.send(request, stream=True)
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
             response.raise_for_status()
+        return response
+
+    started = time.perf_counter()
+    # The concurrency slot is held until the audio stream is consumed.
+    async with get_scheduler(ELEVENLABS).slot() as scheduler:
+        response = await scheduler.call(open_stream)
+        first_byte_at: float | None = None
+        received = 0
+        try:
             async for chunk in response.aiter_bytes():
+                if first_byte_at is None:
+                    first_byte_at = time.perf_counter()
+                    metrics.TTS_TTFB_SECONDS.observe(first_byte_at - started, voice_id)
+                received += len(chunk)
                 yield chunk
+        finally:
+            await response.aclose()
+            elapsed = time.perf_counter() - first_byte_at if first_byte_at is not None else 0.0
+            if elapsed > 0:
+                metrics.TTS_BYTES_PER_SECOND.observe(received / elapsed, voice_id)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+"""Sentence-level pipelining of streamed LLM text into ordered TTS audio."""
+
+import asyncio
+import re
+from typing import Any, AsyncIterator, Callable
+
+_END = object()
+_BOUNDARY = re.compile(r"[.!?…]+[\"')\]]*\s+|\n{2,}")
+
+
+async def split_sentences(deltas: AsyncIterator[str], min_chars: int = 20) -> AsyncIterator[str]:
+    """Re-chunk streamed text deltas into sentences as soon as each one completes.
+
+    Boundaries closer than ``min_chars`` to the start of the pending text are
+    skipped so abbreviations and very short fragments are merged with the next
+    sentence.
+    """
+
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+        while True:
+            boundary = next(
+                (match for match in _BOUNDARY.finditer(buffer) if match.end() >= min_chars), None
+            )
+            if boundary is None:
+                break
+            sentence = buffer[: boundary.end()].strip()
+            buffer = buffer[boundary.end() :]
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def synthesise_in_order(
+    sentences: AsyncIterator[str],
+    synthesise: Callable[[str], AsyncIterator[bytes]],
+    concurrency: int = 2,
+) -> AsyncIterator[bytes]:
+    """Start synthesis for each sentence as it arrives and yield audio in sentence order.
+
+    Up to ``concurrency`` sentences are synthesised at once, so later sentences
+    are buffered while an earlier one is still being played out.
+    """
+
+    order: asyncio.Queue[Any] = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks: list[asyncio.Task[None]] = []
+
+    async def run(sentence: str, output: asyncio.Queue[Any]) -> None:
+        try:
+            async with semaphore:
+                async for chunk in synthesise(sentence):
+                    await output.put(chunk)
+            await output.put(_END)
+        except Exception as exc:  # noqa: BLE001 - re-raised by the consumer
+            await output.put(exc)
+
+    async def feed() -> None:
+        try:
+            async for sentence in sentences:
+                output: asyncio.Queue[Any] = asyncio.Queue()
+                tasks.append(asyncio.create_task(run(sentence, output)))
+                await order.put(output)
+            await order.put(_END)
+        except Exception as exc:  # noqa: BLE001 - re-raised by the consumer
+            await order.put(exc)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            output = await order.get()
+            if output is _END:
+                break
+            if isinstance(output, Exception):
+                raise output
+            while True:
+                chunk = await output.get()
+                if chunk is _END:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+"""Exact and semantic cache for LLM completions."""
+
+import asyncio
+import hashlib
+import json
+import math
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Sequence
+
+from app.config import get_settings
+
+_cache: "CompletionCache | None" = None
+
+
+@dataclass
+class CompletionCacheStats:
+    """Counters describing how completion lookups were served."""
+
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dictionary."""
+
+        return asdict(self)
+
+
+@dataclass
+class CompletionLookup:
+    """Result of a cache lookup; carries what is needed to store the answer on a miss."""
+
+    key: str
+    text: str | None = None
+    scope: str | None = None
+    vector: array | None = None
+
+
+@dataclass
+class _SemanticEntry:
+    scope: str
+    vector: array
+    text: str
+    expires_at: float
+
+
+def _normalise(messages: Sequence[dict[str, str]]) -> list[list[str]]:
+    """Collapse whitespace so trivially different prompts share a key."""
+
+    return [[message["role"], " ".join(message["content"].split())] for message in messages]
+
+
+def _digest(*parts: object) -> str:
+    material = json.dumps(parts, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _unit(vector: Sequence[float]) -> array:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return array("f", (value / norm for value in vector))
+
+
+def _single_turn_question(messages: Sequence[dict[str, str]]) -> tuple[str, str] | None:
+    """Return ``(system context, question)`` for prompts with exactly one user turn."""
+
+    users = [message for message in messages if message["role"] == "user"]
+    if len(users) != 1 or any(message["role"] == "assistant" for message in messages):
+        return None
+    system = [message for message in messages if message["role"] == "system"]
+    return _digest(_normalise(system)), " ".join(users[0]["content"].split())
+
+
+class CompletionCache:
+    """TTL-bounded LRU of completions keyed by (model, normalised messages).
+
+    An optional semantic tier indexes single-turn questions by embedding. A new
+    question whose cosine similarity to a cached one (same model and system
+    prompt) reaches ``semantic_threshold`` reuses that answer.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        semantic_threshold: float = 0.0,
+        semantic_max_entries: int = 512,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.semantic_max_entries = semantic_max_entries
+        self.stats = CompletionCacheStats()
+        self._exact: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._semantic: OrderedDict[str, _SemanticEntry] = OrderedDict()
+
+    @staticmethod
+    def key(model: str, messages: Sequence[dict[str, str]]) -> str:
+        """Return the exact-match key for a completion request."""
+
+        return _digest(model, _normalise(messages))
+
+    def _get_exact(self, key: str) -> str | None:
+        entry = self._exact.get(key)
+        if entry is None:
+            return None
+        text, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._exact[key]
+            return None
+        self._exact.move_to_end(key)
+        return text
+
+    def _semantic_candidates(self, scope: str) -> list[tuple[array, str]]:
+        """Drop expired entries and snapshot the live ones in ``scope``.
+
+        Runs on the event loop, so it never races :meth:`store`; the returned
+        list is private to the caller and safe to score in a worker thread.
+        """
+
+        now = time.monotonic()
+        for key in [key for key, entry in self._semantic.items() if entry.expires_at < now]:
+            del self._semantic[key]
+        return [(entry.vector, entry.text) for entry in self._semantic.values() if entry.scope == scope]
+
+    def _best_match(self, vector: array, candidates: list[tuple[array, str]]) -> str | None:
+        best_score, best_text = self.semantic_threshold, None
+        for candidate, text in candidates:
+            score = sum(a * b for a, b in zip(vector, candidate))
+            if score >= best_score:
+                best_score, best_text = score, text
+        return best_text
+
+    async def lookup(
+        self,
+        model: str,
+        messages: Sequence[dict[str, str]],
+        embed: Callable[[str], Awaitable[list[float]]] | None = None,
+    ) -> CompletionLookup:
+        """Find a cached answer by exact key, then by similarity when ``embed`` is given."""
+
+        key = self.key(model, messages)
+        text = self._get_exact(key)
+        if text is not None:
+            self.stats.exact_hits += 1
+            return CompletionLookup(key=key, text=text)
+
+        lookup = CompletionLookup(key=key)
+        question = _single_turn_question(messages)
+        if embed is not None and self.semantic_threshold > 0 and question is not None:
+            system_scope, prompt = question
+            lookup.scope = _digest(model, system_scope)
+            try:
+                lookup.vector = _unit(await embed(prompt))
+            except Exception:  # noqa: BLE001 - the semantic tier is best effort
+                lookup.scope = None
+            else:
+                candidates = self._semantic_candidates(lookup.scope)
+                text = await asyncio.to_thread(self._best_match, lookup.vector, candidates) if candidates else None
+                if text is not None:
+                    self.stats.semantic_hits += 1
+                    lookup.text = text
+                    return lookup
+
+        self.stats.misses += 1
+        return lookup
+
+    def store(self, lookup: CompletionLookup, text: str) -> None:
+        """Cache ``text`` as the answer for the request described by ``lookup``."""
+
+        if not text:
+            return
+        expires_at = time.monotonic() + self.ttl
+        self._exact[lookup.key] = (text, expires_at)
+        self._exact.move_to_end(lookup.key)
+        while len(self._exact) > self.max_entries:
+            self._exact.popitem(last=False)
+
+        if lookup.scope is not None and lookup.vector is not None:
+            self._semantic[lookup.key] = _SemanticEntry(lookup.scope, lookup.vector, text, expires_at)
+            self._semantic.move_to_end(lookup.key)
+            while len(self._semantic) > self.semantic_max_entries:
+                self._semantic.popitem(last=False)
+
+
+def get_completion_cache() -> CompletionCache | None:
+    """Return the process-wide completion cache, or ``None`` when it is disabled."""
+
+    global _cache
+    settings = get_settings()
+    if settings.completion_cache_size <= 0:
+        return None
+    if _cache is None:
+        _cache = CompletionCache(
+            settings.completion_cache_size,
+            settings.completion_cache_ttl_seconds,
+            semantic_threshold=settings.completion_cache_semantic_threshold,
+            semantic_max_entries=settings.completion_cache_semantic_size,
+        )
+    return _cache
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+"""Content-addressed cache for embedding vectors."""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Sequence
+
+from app.config import get_settings
+
+_cache: "EmbeddingCache | None" = None
+
+# Disk hits refresh an entry's recency at most this often, so most reads stay
+# read-only; eviction order only needs to be coarse.
+RECENCY_REFRESH_SECONDS = 3600.0
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Counters describing how embedding lookups were served."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dictionary."""
+
+        return asdict(self)
+
+
+class _DiskStore:
+    """SQLite-backed persistent tier keyed by content hash, bounded by LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int = 0):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, used_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(embeddings)")}
+            if "used_at" not in columns:
+                # Files written before eviction existed; their entries go first.
+                self._connection.execute(
+                    "ALTER TABLE embeddings ADD COLUMN used_at REAL NOT NULL DEFAULT 0"
+                )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_used_at ON embeddings (used_at)"
+            )
+            self._connection.commit()
+            self._count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._evict()
+
+    def get(self, key: str) -> array | None:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, array]:
+        found: dict[str, array] = {}
+        stale: list[str] = []
+        now = time.time()
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start : start + 500])
+                placeholders = ",".join("?" for _ in chunk)
+                rows = self._connection.execute(
+                    f"SELECT key, vector, used_at FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob, used_at in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+                    if used_at < now - RECENCY_REFRESH_SECONDS:
+                        stale.append(key)
+            if stale:
+                self._connection.executemany(
+                    "UPDATE embeddings SET used_at = ? WHERE key = ?", [(now, key) for key in stale]
+                )
+                self._connection.commit()
+        return found
+
+    def put(self, key: str, vector: array) -> None:
+        self.put_many({key: vector})
+
+    def put_many(self, vectors: dict[str, array]) -> None:
+        now = time.time()
+        with self._lock:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, used_at) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in vectors.items()],
+            )
+            self._count += self._connection.total_changes - before
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond ``max_entries``; call with the lock held."""
+
+        if self.max_entries <= 0 or self._count <= self.max_entries:
+            return
+        excess = self._count - self.max_entries
+        self._connection.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY used_at LIMIT ?)",
+            (excess,),
+        )
+        self._count -= excess
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class EmbeddingCache:
+    """Two-tier (LRU memory + SQLite) embedding cache with in-flight coalescing."""
+
+    def __init__(self, max_entries: int = 4096, path: str | None = None, disk_entries: int = 0):
+        self.max_entries = max_entries
+        self.stats = EmbeddingCacheStats()
+        self._memory: OrderedDict[str, array] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[array]] = {}
+        # Batch loads are only referenced here while they run.
+        self._loads: set[asyncio.Task[None]] = set()
+        self._disk = _DiskStore(path, disk_entries) if path else None
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """Return the content address for ``text`` embedded with ``model``."""
+
+        digest = hashlib.sha256()
+        digest.update(model.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _remember(self, key: str, vector: array) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[list[float]]]) -> array:
+        """Resolve ``key`` from disk or by calling ``compute`` and populate both tiers."""
+
+        try:
+            if self._disk is not None:
+                cached = await asyncio.to_thread(self._disk.get, key)
+                if cached is not None:
+                    self.stats.disk_hits += 1
+                    self._remember(key, cached)
+                    return cached
+
+            self.stats.misses += 1
+            vector = array("f", await compute())
+            self._remember(key, vector)
+            if self._disk is not None:
+                await asyncio.to_thread(self._disk.put, key, vector)
+            return vector
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_compute(
+        self, model: str, text: str, compute: Callable[[], Awaitable[list[float]]]
+    ) -> list[float]:
+        """Return the cached embedding for ``text`` or compute it exactly once."""
+
+        key = self.key(model, text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return vector.tolist()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, compute))
+            self._inflight[key] = task
+        else:
+            self.stats.coalesced += 1
+        # Shield the shared lookup so one cancelled caller does not abort the others.
+        vector = await asyncio.shield(task)
+        return vector.tolist()
+
+    async def _load_many(
+        self,
+        missing: dict[str, str],
+        futures: dict[str, asyncio.Future[array]],
+        compute_many: Callable[[list[str]], Awaitable[list[list[float]]]],
+    ) -> None:
+        """Resolve a batch of keys from disk, computing the remainder in one call."""
+
+        try:
+            remaining = dict(missing)
+            if self._disk is not None:
+                found = await asyncio.to_thread(self._disk.get_many, list(remaining))
+                for key, vector in found.items():
+                    self.stats.disk_hits += 1
+                    self._remember(key, vector)
+                    futures[key].set_result(vector)
+                    remaining.pop(key)
+
+            if remaining:
+                self.stats.misses += len(remaining)
+                computed: dict[str, array] = {}
+                values = await compute_many(list(remaining.values()))
+                if len(values) != len(remaining):
+                    raise RuntimeError(
+                        f"Expected {len(remaining)} embeddings but received {len(values)}"
+                    )
+                for key, raw in zip(remaining, values):
+                    vector = array("f", raw)
+                    self._remember(key, vector)
+                    computed[key] = vector
+                    futures[key].set_result(vector)
+                if self._disk is not None:
+                    await asyncio.to_thread(self._disk.put_many, computed)
+        except BaseException as exc:
+            for future in futures.values():
+                if future.done():
+                    continue
+                if isinstance(exc, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(exc)
+                    # Callers may stop awaiting after the first failed key.
+                    future.exception()
+            if not isinstance(exc, Exception):
+                raise
+        finally:
+            for key in futures:
+                self._inflight.pop(key, None)
+
+    async def get_or_compute_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        compute_many: Callable[[list[str]], Awaitable[list[list[float]]]],
+    ) -> list[list[float]]:
+        """Return embeddings for ``texts`` in order, computing only uncached entries.
+
+        Duplicate texts and keys already being computed by other callers are
+        resolved once; every remaining miss is handed to ``compute_many`` in a
+        single call so the caller controls upstream batching.
+        """
+
+        keys = [self.key(model, text) for text in texts]
+        resolved: dict[str, array] = {}
+        pending: dict[str, asyncio.Future[array]] = {}
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in resolved or key in pending or key in missing:
+                continue
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                resolved[key] = vector
+                continue
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+                pending[key] = future
+                continue
+            missing[key] = text
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in missing}
+            self._inflight.update(futures)
+            pending.update(futures)
+            load = asyncio.ensure_future(self._load_many(missing, futures, compute_many))
+            self._loads.add(load)
+            load.add_done_callback(self._loads.discard)
+
+        for key, future in pending.items():
+            resolved[key] = await asyncio.shield(future)
+        return [resolved[key].tolist() for key in keys]
+
+    def close(self) -> None:
+        """Release the persistent store."""
+
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache configured from settings."""
+
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = EmbeddingCache(
+            max_entries=settings.embedding_cache_size,
+            path=settings.embedding_cache_path or None,
+            disk_entries=settings.embedding_cache_disk_entries,
+        )
+    return _cache
+
+
+def close_embedding_cache() -> None:
+    """Close and discard the process-wide embedding cache."""
+
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
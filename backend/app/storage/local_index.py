@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+"""Embedded, file-backed vector index used by ``local://`` vector store URLs."""
+
+import json
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+_indexes: dict[tuple[str, str], "LocalVectorIndex"] = {}
+_indexes_lock = threading.Lock()
+
+# Rows scored per matrix multiplication during exhaustive search.
+_SCAN_BLOCK_ROWS = 65_536
+
+
+@dataclass
+class LocalHit:
+    """A scored point returned from a local index query."""
+
+    id: str
+    score: float
+    payload: dict
+    vector: list[float] | None = None
+
+
+_PAYLOAD_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def _json_path(key: str) -> str:
+    """SQL literal for a payload key's JSON path; literal paths let expression indexes apply."""
+
+    if not _PAYLOAD_KEY.match(key):
+        raise ValueError(f"Unsupported payload key: {key!r}")
+    return f"'$.{key}'"
+
+
+def filter_sql(query_filter: dict) -> tuple[str, list]:
+    """Translate a Qdrant-style filter into a SQL predicate over ``points.payload``.
+
+    Supports ``must``/``should``/``must_not`` clauses (nested too) whose
+    conditions use ``match`` (``value`` on scalar fields, ``any`` on scalar or
+    list fields, ``text`` as a case-insensitive substring) or ``range``.
+    """
+
+    clauses: list[str] = []
+    params: list = []
+
+    def condition(entry: dict) -> str:
+        if any(clause in entry for clause in ("must", "should", "must_not")):
+            sql, nested = filter_sql(entry)
+            params.extend(nested)
+            return sql
+        path = _json_path(entry["key"])
+        if "match" in entry:
+            match = entry["match"]
+            if "value" in match:
+                params.append(match["value"])
+                return f"json_extract(payload, {path}) = ?"
+            if "any" in match:
+                values = list(match["any"])
+                if not values:
+                    return "0"
+                params.extend(values)
+                marks = ",".join("?" for _ in values)
+                return f"EXISTS (SELECT 1 FROM json_each(payload, {path}) WHERE value IN ({marks}))"
+            if "text" in match:
+                escaped = str(match["text"]).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                params.append(f"%{escaped}%")
+                return f"json_extract(payload, {path}) LIKE ? ESCAPE '\\'"
+            raise ValueError(f"Unsupported match condition: {match}")
+        if "range" in entry:
+            parts = []
+            for operator, sql_operator in (("gt", ">"), ("gte", ">="), ("lt", "<"), ("lte", "<=")):
+                if entry["range"].get(operator) is not None:
+                    params.append(entry["range"][operator])
+                    parts.append(f"json_extract(payload, {path}) {sql_operator} ?")
+            return " AND ".join(parts) or "1"
+        raise ValueError(f"Unsupported filter condition: {entry}")
+
+    for entry in query_filter.get("must") or []:
+        clauses.append(f"({condition(entry)})")
+    should = [condition(entry) for entry in query_filter.get("should") or []]
+    if should:
+        clauses.append("(" + " OR ".join(f"({sql})" for sql in should) + ")")
+    for entry in query_filter.get("must_not") or []:
+        clauses.append(f"NOT ({condition(entry)})")
+    return (" AND ".join(clauses) or "1"), params
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError(
+            "numpy is required for local:// vector stores; install multimodal-backend[local]."
+        )
+
+
+def local_index_path(url: str) -> Path:
+    """Return the directory referenced by a ``local://`` vector store URL."""
+
+    raw = url[len("local://") :]
+    return Path(raw or "./vector_store")
+
+
+class LocalVectorIndex:
+    """In-process cosine index over a memory-mapped float32 matrix.
+
+    Normalised vectors live in ``vectors.f32``; point IDs and payloads live in a
+    SQLite sidecar keyed by matrix row. Once the collection grows past
+    ``ivf_threshold`` points an inverted-file (IVF) index is trained and
+    persisted next to the matrix so searches only score the closest lists.
+    """
+
+    def __init__(self, directory: Path, ivf_threshold: int = 50_000, nprobe: int = 8):
+        _require_numpy()
+        self.directory = directory
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._meta_path = self.directory / "meta.json"
+        self._matrix_path = self.directory / "vectors.f32"
+        self._ivf_path = self.directory / "ivf.npz"
+
+        self._db = sqlite3.connect(self.directory / "points.sqlite", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        if "dim" not in meta and self._meta_path.exists():
+            # Collections written before the metadata moved into the sidecar.
+            meta["dim"] = str(json.loads(self._meta_path.read_text()).get("dim", 0))
+            self._db.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (meta["dim"],))
+        self._db.commit()
+
+        # The sidecar is the source of truth: rows are only committed once their
+        # vectors are flushed, so the matrix may hold uncommitted rows past
+        # ``count`` but never lack committed ones.
+        self.dim: int = int(meta.get("dim", 0))
+        self.count: int = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM points").fetchone()[0]
+        self.capacity: int = 0
+        self._matrix = None
+        if self.dim and self._matrix_path.exists():
+            self.capacity = self._matrix_path.stat().st_size // (self.dim * 4)
+        if self.dim and self.capacity:
+            self._matrix = np.memmap(
+                self._matrix_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim)
+            )
+
+        self._centroids = None
+        self._assignments = None
+        self._trained_count = 0
+        if self._ivf_path.exists():
+            data = np.load(self._ivf_path)
+            self._centroids = data["centroids"]
+            self._assignments = data["assignments"]
+            self._trained_count = int(data["trained_count"])
+            assigned = int(data["assigned_count"]) if "assigned_count" in data else self.count
+            if assigned < self.count:
+                self._update_ivf(list(range(assigned, self.count)), self._matrix[assigned : self.count])
+
+    # -- persistence -----------------------------------------------------------------
+
+    def _write_meta(self) -> None:
+        """Stage the metadata; it is committed with the caller's transaction."""
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),)
+        )
+
+    def _grow(self, required: int) -> None:
+        """Resize the memory-mapped matrix to hold at least ``required`` rows."""
+
+        capacity = max(1024, self.capacity)
+        while capacity < required:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._matrix_path, "ab") as handle:
+            handle.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self._matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim)
+        )
+
+    def _save_ivf(self) -> None:
+        np.savez(
+            self._ivf_path,
+            centroids=self._centroids,
+            assignments=self._assignments,
+            trained_count=self._trained_count,
+            assigned_count=self.count,
+        )
+
+    # -- public API ------------------------------------------------------------------
+
+    def create_payload_index(self, key: str) -> None:
+        """Index a scalar payload field so ``match.value`` and ``range`` filters avoid a scan."""
+
+        path = _json_path(key)
+        name = "ix_points_" + key.replace(".", "_")
+        with self._lock:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON points (json_extract(payload, {path}))")
+            self._db.commit()
+
+    def ensure(self, vector_size: int) -> None:
+        """Initialise the matrix for ``vector_size`` dimensions if it is empty."""
+
+        with self._lock:
+            if self.dim and self.dim != vector_size:
+                raise ValueError(
+                    f"Local collection has dimension {self.dim}, cannot store {vector_size}-d vectors."
+                )
+            if not self.dim:
+                self.dim = vector_size
+                self._grow(1)
+                self._write_meta()
+                self._db.commit()
+
+    def upsert(self, points: Sequence[tuple[str, dict, Sequence[float]]]) -> None:
+        """Insert or replace ``(id, payload, vector)`` points."""
+
+        if not points:
+            return
+        with self._lock:
+            if not self.dim:
+                self.ensure(len(points[0][2]))
+            vectors = np.asarray([vector for _, _, vector in points], dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1.0, norms)
+
+            rows: list[int] = []
+            appended = 0
+            try:
+                for point_id, payload, _ in points:
+                    existing = self._db.execute(
+                        "SELECT row FROM points WHERE id = ?", (point_id,)
+                    ).fetchone()
+                    if existing is not None:
+                        row = existing[0]
+                        self._db.execute(
+                            "UPDATE points SET payload = ? WHERE row = ?", (json.dumps(payload), row)
+                        )
+                    else:
+                        row = self.count + appended
+                        appended += 1
+                        self._db.execute(
+                            "INSERT INTO points (row, id, payload) VALUES (?, ?, ?)",
+                            (row, point_id, json.dumps(payload)),
+                        )
+                    rows.append(row)
+
+                self._grow(self.count + appended)
+                assert self._matrix is not None
+                self._matrix[rows] = vectors
+                self._matrix.flush()
+                # Committing the rows is what publishes the new count (see __init__),
+                # so it happens only once their vectors are on disk.
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+            self.count += appended
+            self._update_ivf(rows, vectors)
+
+    def query(
+        self,
+        vectors: Sequence[Sequence[float]],
+        limit: int,
+        filters: Sequence[dict | None] | None = None,
+        with_vectors: bool = False,
+    ) -> list[list[LocalHit]]:
+        """Return the ``limit`` most similar points for each query vector.
+
+        ``filters`` holds an optional Qdrant-style payload filter per query;
+        filtered queries score only the rows the filter selects.
+        """
+
+        with self._lock:
+            if not self.count or not len(vectors):
+                return [[] for _ in vectors]
+            queries = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries /= np.where(norms == 0, 1.0, norms)
+
+            filters = list(filters) if filters is not None else [None] * len(queries)
+            results: list = [None] * len(queries)
+            plain = [index for index, query_filter in enumerate(filters) if not query_filter]
+            if plain:
+                search = self._search_ivf if self._centroids is not None else self._search_exhaustive
+                for index, scored in zip(plain, search(queries[plain], limit)):
+                    results[index] = scored
+            for index, query_filter in enumerate(filters):
+                if query_filter:
+                    results[index] = self._search_filtered(queries[index], limit, query_filter)
+            return [self._hits(rows, scores, with_vectors) for rows, scores in results]
+
+    def close(self) -> None:
+        """Flush the matrix and close the payload store."""
+
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._db.close()
+
+    # -- search ----------------------------------------------------------------------
+
+    def _search_exhaustive(self, queries, limit: int):
+        """Score every stored vector in fixed-size blocks and keep the running top-k."""
+
+        assert self._matrix is not None
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, self.count, _SCAN_BLOCK_ROWS):
+            stop = min(start + _SCAN_BLOCK_ROWS, self.count)
+            scores = queries @ self._matrix[start:stop].T
+            rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > limit:
+                keep = np.argpartition(-best_scores, limit - 1, axis=1)[:, :limit]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        return [self._ranked(rows, scores, limit) for rows, scores in zip(best_rows, best_scores)]
+
+    def _search_ivf(self, queries, limit: int):
+        """Score only the vectors assigned to the ``nprobe`` closest centroids."""
+
+        assert self._matrix is not None and self._centroids is not None
+        assignments = self._assignments[: self.count]
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argsort(-(queries @ self._centroids.T), axis=1)[:, :nprobe]
+        results = []
+        for query, lists in zip(queries, probes):
+            candidates = np.flatnonzero(np.isin(assignments, lists))
+            if not len(candidates):
+                results.append((candidates, np.zeros(0, dtype=np.float32)))
+                continue
+            scores = self._matrix[candidates] @ query
+            results.append(self._ranked(candidates, scores, limit))
+        return results
+
+    def _search_filtered(self, query, limit: int, query_filter: dict):
+        """Score exactly the rows whose payload satisfies ``query_filter``."""
+
+        assert self._matrix is not None
+        predicate, params = filter_sql(query_filter)
+        rows = np.sort(
+            np.fromiter(
+                (row for (row,) in self._db.execute(f"SELECT row FROM points WHERE {predicate}", params)),
+                dtype=np.int64,
+            )
+        )
+        if not len(rows):
+            return rows, np.zeros(0, dtype=np.float32)
+        scores = np.concatenate(
+            [
+                self._matrix[rows[start : start + _SCAN_BLOCK_ROWS]] @ query
+                for start in range(0, len(rows), _SCAN_BLOCK_ROWS)
+            ]
+        )
+        return self._ranked(rows, scores, limit)
+
+    @staticmethod
+    def _ranked(rows, scores, limit: int):
+        order = np.argsort(-scores)[:limit]
+        return rows[order], scores[order]
+
+    def _hits(self, rows, scores, with_vectors: bool = False) -> list[LocalHit]:
+        if not len(rows):
+            return []
+        placeholders = ",".join("?" for _ in rows)
+        records = {
+            row: (point_id, payload)
+            for row, point_id, payload in self._db.execute(
+                f"SELECT row, id, payload FROM points WHERE row IN ({placeholders})",
+                [int(row) for row in rows],
+            )
+        }
+        hits = []
+        for row, score in zip(rows, scores):
+            record = records.get(int(row))
+            if record is not None:
+                vector = self._matrix[int(row)].tolist() if with_vectors else None
+                hits.append(LocalHit(record[0], float(score), json.loads(record[1]), vector))
+        return hits
+
+    # -- approximate index -----------------------------------------------------------
+
+    def _update_ivf(self, rows: list[int], vectors) -> None:
+        """Assign new rows to trained lists, (re)training once the collection doubles."""
+
+        if self.count < self.ivf_threshold:
+            return
+        if self._centroids is None or self.count >= 2 * self._trained_count:
+            self._train_ivf()
+            return
+        assignments = np.argmax(vectors @ self._centroids.T, axis=1)
+        if len(self._assignments) < self.capacity:
+            grown = np.zeros(self.capacity, dtype=np.int32)
+            grown[: len(self._assignments)] = self._assignments
+            self._assignments = grown
+        self._assignments[rows] = assignments
+        self._save_ivf()
+
+    def _train_ivf(self, iterations: int = 10, sample_size: int = 65_536) -> None:
+        """Train spherical k-means centroids on a sample and assign every row."""
+
+        assert self._matrix is not None
+        nlist = max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(0)
+        sample_rows = rng.choice(self.count, size=min(sample_size, self.count), replace=False)
+        sample = np.asarray(self._matrix[np.sort(sample_rows)])
+        centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for index in range(len(centroids)):
+                members = sample[labels == index]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[index] = centroid / norm if norm else centroid
+
+        assignments = np.zeros(self.capacity, dtype=np.int32)
+        for start in range(0, self.count, _SCAN_BLOCK_ROWS):
+            stop = min(start + _SCAN_BLOCK_ROWS, self.count)
+            assignments[start:stop] = np.argmax(self._matrix[start:stop] @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._assignments = assignments
+        self._trained_count = self.count
+        self._save_ivf()
+
+
+def get_local_index(url: str, collection: str, ivf_threshold: int, nprobe: int) -> LocalVectorIndex:
+    """Return the process-wide index for ``collection`` under the ``local://`` URL."""
+
+    directory = local_index_path(url) / collection
+    key = (str(directory.resolve()), collection)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = LocalVectorIndex(directory, ivf_threshold=ivf_threshold, nprobe=nprobe)
+            _indexes[key] = index
+        return index
+
+
+def close_local_indexes() -> None:
+    """Flush and close every open local index."""
+
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+        _indexes.clear()
+    for index in indexes:
+        index.close()
@@ -2,14 +2,33 @@ from __future__ import annotations
 
 """Vector store integration helpers."""
 
+import asyncio
+import uuid
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Iterable
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Sequence
 
 import httpx
 
 from app.config import get_settings
-from app.schemas.knowledge import KnowledgeItem, KnowledgeItemCreate
+from app.schemas.knowledge import KnowledgeFilter, KnowledgeItem, KnowledgeItemCreate
+from app.services import metrics, ranking
+from app.services.http_clients import GROQ, VECTOR_STORE, get_groq_client, get_vector_store_client
+from app.services.scheduler import get_scheduler
+from app.storage.embedding_cache import get_embedding_cache
+from app.storage.local_index import LocalVectorIndex, get_local_index
+
+_clients: dict[str, "VectorStoreClient"] = {}
+
+# Payload fields indexed for filtering, with their Qdrant index schema.
+PAYLOAD_INDEXES: dict[str, str | dict] = {
+    "tags": "keyword",
+    "source": "keyword",
+    "created_ts": "float",
+    "text": {"type": "text", "tokenizer": "word", "lowercase": True, "min_token_len": 2},
+}
+# Scalar fields the local:// backend can serve from an expression index.
+LOCAL_PAYLOAD_INDEXES = ("source", "created_ts")
 
 
 @dataclass
@@ -21,131 +40,521 @@ class VectorStoreItem:
     vector: list[float]
 
 
+@dataclass
+class SearchQuery:
+    """One nearest-neighbour search, optionally restricted by a Qdrant-style payload filter."""
+
+    vector: list[float]
+    limit: int
+    filter: dict | None = None
+    with_vector: bool = False
+
+
+@dataclass
+class ScoredPoint:
+    """A search hit with its similarity score."""
+
+    id: str
+    score: float
+    payload: dict
+    vector: list[float] | None = None
+
+
+def _timestamp(value: datetime) -> float:
+    """Epoch seconds of ``value``; naive datetimes are taken as UTC like stored timestamps."""
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def build_filter(filters: KnowledgeFilter | None) -> dict | None:
+    """Translate API filters into a Qdrant payload filter, or ``None`` when unfiltered."""
+
+    if filters is None:
+        return None
+    must: list[dict] = []
+    if filters.tags:
+        must.append({"key": "tags", "match": {"any": list(filters.tags)}})
+    if filters.source is not None:
+        must.append({"key": "source", "match": {"value": filters.source}})
+    created: dict[str, float] = {}
+    if filters.created_after is not None:
+        created["gte"] = _timestamp(filters.created_after)
+    if filters.created_before is not None:
+        created["lte"] = _timestamp(filters.created_before)
+    if created:
+        must.append({"key": "created_ts", "range": created})
+    return {"must": must} if must else None
+
+
+def _with_terms(query_filter: dict | None, terms: list[str]) -> dict:
+    """Extend ``query_filter`` to require at least one of ``terms`` in the item text."""
+
+    must = list((query_filter or {}).get("must", []))
+    must.append({"should": [{"key": "text", "match": {"text": term}} for term in terms]})
+    return {**(query_filter or {}), "must": must}
+
+
+def _to_knowledge_item(point_id: str | int, payload: dict, score: float | None = None) -> KnowledgeItem:
+    """Convert a stored point payload into a :class:`KnowledgeItem`."""
+
+    created_at_raw = payload.get("created_at")
+    try:
+        created_at = datetime.fromisoformat(created_at_raw) if created_at_raw else datetime.utcnow()
+    except ValueError:
+        created_at = datetime.utcnow()
+    return KnowledgeItem(
+        id=str(point_id),
+        title=payload.get("title", "Untitled"),
+        text=payload.get("text", ""),
+        tags=payload.get("tags", []),
+        source=payload.get("source"),
+        created_at=created_at,
+        score=score,
+    )
+
+
 class VectorStoreClient:
-    """Minimal Qdrant-compatible client used for knowledge base storage."""
+    """Minimal Qdrant-compatible client used for knowledge base storage.
+
+    ``local://`` URLs are served in-process by :class:`LocalVectorIndex` instead.
+    """
 
-    def __init__(self, collection: str = "knowledge_items"):
+    def __init__(self, collection: str = "knowledge_items", http: httpx.AsyncClient | None = None):
         self.settings = get_settings()
         self.collection = collection
-        raw_url = self.settings.vector_store_url
-        if raw_url.startswith("qdrant+https://"):
-            raw_url = raw_url.replace("qdrant+https://", "https://", 1)
-        elif raw_url.startswith("qdrant://"):
-            raw_url = raw_url.replace("qdrant://", "http://", 1)
-        self.base_url = raw_url
-        self._http = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
+        self._own_http = http
+        self.is_local = self.settings.vector_store_url.startswith("local://")
+        # Vector size the collection is known to exist with; checked once per process.
+        self._ensured_size: int | None = None
+        self._ensure_lock = asyncio.Lock()
 
-    async def ensure_collection(self, vector_size: int = 1536):
-        """Create the collection if it does not already exist."""
+    @property
+    def _http(self) -> httpx.AsyncClient:
+        """Return the HTTP client, defaulting to the shared vector store pool."""
 
-        response = await self._http.put(
-            f"/collections/{self.collection}",
-            json={
-                "name": self.collection,
-                "vectors": {"size": vector_size, "distance": "Cosine"},
-            },
+        if self._own_http is not None:
+            return self._own_http
+        return get_vector_store_client()
+
+    @property
+    def _local(self) -> LocalVectorIndex | None:
+        """Return the embedded index when configured with a ``local://`` URL."""
+
+        if not self.is_local:
+            return None
+        return get_local_index(
+            self.settings.vector_store_url,
+            self.collection,
+            ivf_threshold=self.settings.local_index_ivf_threshold,
+            nprobe=self.settings.local_index_nprobe,
         )
-        if response.status_code not in (200, 201, 409):
-            response.raise_for_status()
+
+    async def ensure_collection(self, vector_size: int = 1536):
+        """Create the collection and its payload indexes if they do not already exist.
+
+        The result is cached, so only the first call per process reaches the store.
+        """
+
+        if self._ensured_size == vector_size:
+            return
+        async with self._ensure_lock:
+            if self._ensured_size != vector_size:
+                await self._create_collection(vector_size)
+                self._ensured_size = vector_size
+
+    async def _create_collection(self, vector_size: int) -> None:
+        if self._local is not None:
+            await asyncio.to_thread(self._local.ensure, vector_size)
+            for key in LOCAL_PAYLOAD_INDEXES:
+                await asyncio.to_thread(self._local.create_payload_index, key)
+            return
+
+        async def send() -> None:
+            response = await self._http.put(
+                f"/collections/{self.collection}",
+                json={
+                    "name": self.collection,
+                    "vectors": {"size": vector_size, "distance": "Cosine"},
+                },
+            )
+            if response.status_code not in (200, 201, 409):
+                response.raise_for_status()
+
+        await get_scheduler(VECTOR_STORE).run(send)
+
+        async def index(field: str, schema: str | dict) -> None:
+            async def send_index() -> None:
+                response = await self._http.put(
+                    f"/collections/{self.collection}/index",
+                    json={"field_name": field, "field_schema": schema},
+                )
+                if response.status_code not in (200, 201, 409):
+                    response.raise_for_status()
+
+            await get_scheduler(VECTOR_STORE).run(send_index)
+
+        await asyncio.gather(*(index(field, schema) for field, schema in PAYLOAD_INDEXES.items()))
 
     async def upsert(self, items: Iterable[VectorStoreItem]):
         """Insert or update vector store items."""
 
-        response = await self._http.put(
-            f"/collections/{self.collection}/points",
-            json={
-                "points": [
-                    {"id": item.id, "payload": item.payload, "vector": item.vector}
-                    for item in items
-                ]
-            },
-        )
-        response.raise_for_status()
+        if self._local is not None:
+            points = [(item.id, item.payload, item.vector) for item in items]
+            await asyncio.to_thread(self._local.upsert, points)
+            return
 
-    async def query(self, text_vector: list[float], limit: int = 4) -> list[KnowledgeItem]:
-        """Query the collection for similar vectors."""
+        body = {
+            "points": [
+                {"id": item.id, "payload": item.payload, "vector": item.vector} for item in items
+            ]
+        }
 
-        response = await self._http.post(
-            f"/collections/{self.collection}/points/search",
-            json={"vector": text_vector, "limit": limit, "with_payload": True},
-        )
-        response.raise_for_status()
-        results = response.json().get("result", [])
-        items: list[KnowledgeItem] = []
-        for entry in results:
-            payload = entry.get("payload", {})
-            created_at_raw = payload.get("created_at")
-            try:
-                created_at = datetime.fromisoformat(created_at_raw) if created_at_raw else datetime.utcnow()
-            except ValueError:
-                created_at = datetime.utcnow()
-            items.append(
-                KnowledgeItem(
+        async def send() -> None:
+            response = await self._http.put(f"/collections/{self.collection}/points", json=body)
+            if response.status_code == 404:
+                # The collection was dropped behind our back; recreate it on the next ingest.
+                self._ensured_size = None
+            response.raise_for_status()
+
+        await get_scheduler(VECTOR_STORE).run(send)
+
+    async def search_batch(self, queries: Sequence[SearchQuery]) -> list[list[ScoredPoint]]:
+        """Run several searches in a single request, returning hits per query."""
+
+        if not queries:
+            return []
+        if self._local is not None:
+            with metrics.VECTOR_SEARCH_SECONDS.time("local"):
+                results = await asyncio.to_thread(self._search_local, list(queries))
+            return results
+
+        body = {
+            "searches": [
+                {
+                    "vector": query.vector,
+                    "limit": query.limit,
+                    "with_payload": True,
+                    "with_vector": query.with_vector,
+                    **({"filter": query.filter} if query.filter else {}),
+                }
+                for query in queries
+            ]
+        }
+
+        async def send() -> httpx.Response:
+            response = await self._http.post(
+                f"/collections/{self.collection}/points/search/batch", json=body
+            )
+            response.raise_for_status()
+            return response
+
+        with metrics.VECTOR_SEARCH_SECONDS.time("qdrant"):
+            response = await get_scheduler(VECTOR_STORE).run(send)
+        return [
+            [
+                ScoredPoint(
                     id=str(entry["id"]),
-                    title=payload.get("title", "Untitled"),
-                    text=payload.get("text", ""),
-                    tags=payload.get("tags", []),
-                    source=payload.get("source"),
-                    created_at=created_at,
+                    score=float(entry.get("score", 0.0)),
+                    payload=entry.get("payload") or {},
+                    vector=entry.get("vector") if query.with_vector else None,
                 )
+                for entry in hits
+            ]
+            for query, hits in zip(queries, response.json().get("result", []))
+        ]
+
+    def _search_local(self, queries: list[SearchQuery]) -> list[list[ScoredPoint]]:
+        assert self._local is not None
+        # Group by limit and vector return so each group is one matrix pass.
+        results: list[list[ScoredPoint]] = [[] for _ in queries]
+        groups: dict[tuple[int, bool], list[int]] = {}
+        for position, query in enumerate(queries):
+            groups.setdefault((query.limit, query.with_vector), []).append(position)
+        for (limit, with_vector), positions in groups.items():
+            hits = self._local.query(
+                [queries[position].vector for position in positions],
+                limit,
+                filters=[queries[position].filter for position in positions],
+                with_vectors=with_vector,
             )
-        return items
+            for position, entries in zip(positions, hits):
+                results[position] = [
+                    ScoredPoint(hit.id, hit.score, hit.payload, hit.vector) for hit in entries
+                ]
+        return results
+
+    async def query(
+        self, text_vector: list[float], limit: int = 4, query_filter: dict | None = None
+    ) -> list[KnowledgeItem]:
+        """Query the collection for similar vectors."""
+
+        (hits,) = await self.search_batch([SearchQuery(text_vector, limit, query_filter)])
+        return [_to_knowledge_item(hit.id, hit.payload, hit.score) for hit in hits]
 
     async def close(self) -> None:
-        """Close the underlying HTTP client."""
+        """Close the underlying HTTP client if it is not the shared pool."""
 
-        await self._http.aclose()
+        if self._own_http is not None:
+            await self._own_http.aclose()
 
 
-async def embed_text(text: str) -> list[float]:
-    """Create an embedding vector using Groq's embedding endpoint."""
+def get_vector_store(collection: str = "knowledge_items") -> VectorStoreClient:
+    """Return a cached client for ``collection`` backed by the shared connection pool."""
+
+    client = _clients.get(collection)
+    if client is None:
+        client = VectorStoreClient(collection)
+        _clients[collection] = client
+    return client
+
+
+async def _request_embeddings(texts: list[str], model: str) -> list[list[float]]:
+    """Call Groq's embedding endpoint with a list input in a single request."""
 
     settings = get_settings()
     if not settings.groq_api_key:
         raise RuntimeError("GROQ_API_KEY must be configured to embed text.")
 
     headers = {"Authorization": f"Bearer {settings.groq_api_key}"}
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    client = get_groq_client()
+
+    async def send() -> httpx.Response:
         response = await client.post(
-            "https://api.groq.com/openai/v1/embeddings",
+            "/embeddings",
             headers=headers,
-            json={"input": text, "model": "text-embedding-3-large"},
+            json={"input": texts, "model": model},
         )
         response.raise_for_status()
-        data = response.json()
-        return data["data"][0]["embedding"]
+        return response
 
+    metrics.EMBEDDING_TEXTS.inc(model, amount=len(texts))
+    with metrics.EMBEDDING_SECONDS.time(model):
+        response = await get_scheduler(GROQ).run(send)
+    data = sorted(response.json()["data"], key=lambda entry: entry.get("index", 0))
+    return [entry["embedding"] for entry in data]
 
-async def create_knowledge_item(payload: KnowledgeItemCreate, item_id: str) -> KnowledgeItem:
-    """Persist a knowledge item and return the stored representation."""
 
-    vector = await embed_text(payload.text)
-    timestamp = datetime.utcnow()
-    client = VectorStoreClient()
-    try:
-        await client.ensure_collection(vector_size=len(vector))
-        await client.upsert(
-            [
-                VectorStoreItem(
-                    id=item_id,
-                    payload={
-                        "title": payload.title,
-                        "text": payload.text,
-                        "tags": payload.tags,
-                        "source": payload.source,
-                        "created_at": timestamp.isoformat(),
-                    },
-                    vector=vector,
-                )
-            ]
+async def _request_embedding(text: str, model: str) -> list[float]:
+    """Call Groq's embedding endpoint for a single text."""
+
+    return (await _request_embeddings([text], model))[0]
+
+
+def _batches(texts: Sequence[str], max_items: int, max_chars: int) -> Iterator[list[int]]:
+    """Yield index groups that respect both item-count and character limits."""
+
+    batch: list[int] = []
+    size = 0
+    for index, text in enumerate(texts):
+        if batch and (len(batch) >= max_items or size + len(text) > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append(index)
+        size += len(text)
+    if batch:
+        yield batch
+
+
+async def _request_embeddings_batched(texts: list[str], model: str) -> list[list[float]]:
+    """Embed ``texts`` using size-limited batches with bounded concurrency."""
+
+    settings = get_settings()
+    semaphore = asyncio.Semaphore(max(1, settings.embedding_batch_concurrency))
+    vectors: list[list[float]] = [[] for _ in texts]
+
+    async def run(indices: list[int]) -> None:
+        async with semaphore:
+            batch_vectors = await _request_embeddings([texts[i] for i in indices], model)
+        for index, vector in zip(indices, batch_vectors):
+            vectors[index] = vector
+
+    await asyncio.gather(
+        *(
+            run(indices)
+            for indices in _batches(
+                texts, max(1, settings.embedding_batch_size), settings.embedding_batch_max_chars
+            )
         )
-    finally:
-        await client.close()
-    return KnowledgeItem(
-        id=item_id,
-        title=payload.title,
-        text=payload.text,
-        tags=payload.tags,
-        source=payload.source,
-        created_at=timestamp,
     )
+    return vectors
+
+
+async def embed_text(text: str) -> list[float]:
+    """Create an embedding vector using Groq's embedding endpoint, served from cache when possible."""
+
+    model = get_settings().embedding_model
+    return await get_embedding_cache().get_or_compute(
+        model, text, lambda: _request_embedding(text, model)
+    )
+
+
+async def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embed many texts, batching cache misses into list-input embedding requests."""
+
+    if not texts:
+        return []
+    model = get_settings().embedding_model
+    return await get_embedding_cache().get_or_compute_many(
+        model, texts, lambda missing: _request_embeddings_batched(missing, model)
+    )
+
+
+def _fuse(
+    dense: list[ScoredPoint], lexical: list[ScoredPoint], terms: list[str], limit: int, mmr: bool
+) -> list[KnowledgeItem]:
+    """Combine dense and lexical hits with RRF, then optionally diversify with MMR."""
+
+    settings = get_settings()
+    candidates: dict[str, ScoredPoint] = {}
+    for hit in (*dense, *lexical):
+        candidates.setdefault(hit.id, hit)
+
+    if terms:
+        ids = list(candidates)
+        documents = [
+            f"{candidates[i].payload.get('title', '')} {candidates[i].payload.get('text', '')}" for i in ids
+        ]
+        scores = ranking.bm25_scores(terms, documents)
+        ordered_ids = sorted(zip(scores, ids), key=lambda pair: -pair[0])
+        lexical_ranking = [i for score, i in ordered_ids if score > 0]
+        fused = ranking.reciprocal_rank_fusion(
+            [[hit.id for hit in dense], lexical_ranking], k=settings.knowledge_rrf_k
+        )
+    else:
+        fused = {hit.id: hit.score for hit in dense}
+
+    ordered = sorted(fused, key=fused.__getitem__, reverse=True)
+    if mmr and ordered:
+        # Min-max scale relevance so it is comparable with cosine redundancy.
+        top, bottom = fused[ordered[0]], fused[ordered[-1]]
+        spread = (top - bottom) or 1.0
+        picks = ranking.mmr(
+            [(fused[i] - bottom) / spread for i in ordered],
+            [candidates[i].vector or [] for i in ordered],
+            limit,
+            diversity=settings.knowledge_mmr_diversity,
+        )
+        ordered = [ordered[index] for index in picks]
+    return [_to_knowledge_item(i, candidates[i].payload, fused[i]) for i in ordered[:limit]]
+
+
+async def search_knowledge_many(
+    queries: Sequence[str],
+    limit: int = 4,
+    filters: KnowledgeFilter | None = None,
+    mode: str | None = None,
+    mmr: bool = False,
+) -> list[list[KnowledgeItem]]:
+    """Search the knowledge base for several queries with one vector store round trip.
+
+    ``mode="dense"`` ranks by vector similarity alone. ``mode="hybrid"`` also
+    runs a lexical leg restricted to items containing a query term; both legs
+    are fused with reciprocal rank fusion over BM25 and dense rankings.
+    Filters are applied inside the vector store, and ``mmr`` diversifies the
+    fused candidates before the top ``limit`` are returned.
+    """
+
+    if not queries:
+        return []
+    settings = get_settings()
+    mode = mode or settings.knowledge_search_mode
+    vectors = await embed_texts(list(queries))
+    pool = max(limit, settings.knowledge_search_candidates) if mode == "hybrid" or mmr else limit
+    base_filter = build_filter(filters)
+
+    searches: list[SearchQuery] = []
+    legs: list[tuple[int, int | None, list[str]]] = []
+    for query, vector in zip(queries, vectors):
+        terms = ranking.query_terms(query) if mode == "hybrid" else []
+        dense = len(searches)
+        searches.append(SearchQuery(vector, pool, base_filter, with_vector=mmr))
+        lexical = None
+        if terms:
+            lexical = len(searches)
+            searches.append(SearchQuery(vector, pool, _with_terms(base_filter, terms), with_vector=mmr))
+        legs.append((dense, lexical, terms))
+
+    results = await get_vector_store().search_batch(searches)
+    return [
+        _fuse(results[dense], results[lexical] if lexical is not None else [], terms, limit, mmr)
+        for dense, lexical, terms in legs
+    ]
+
+
+async def search_knowledge(
+    query: str,
+    limit: int = 4,
+    filters: KnowledgeFilter | None = None,
+    mode: str | None = None,
+    mmr: bool = False,
+) -> list[KnowledgeItem]:
+    """Return the knowledge items most relevant to ``query``."""
+
+    (items,) = await search_knowledge_many([query], limit, filters, mode=mode, mmr=mmr)
+    return items
+
+
+async def create_knowledge_items(
+    payloads: Sequence[KnowledgeItemCreate], item_ids: Sequence[str] | None = None
+) -> list[KnowledgeItem]:
+    """Embed and persist many knowledge items using batched embeddings and large upserts."""
+
+    if not payloads:
+        return []
+    if item_ids is None:
+        item_ids = [str(uuid.uuid4()) for _ in payloads]
+
+    vectors = await embed_texts([payload.text for payload in payloads])
+    return await store_knowledge_items(payloads, item_ids, vectors)
+
+
+async def store_knowledge_items(
+    payloads: Sequence[KnowledgeItemCreate], item_ids: Sequence[str], vectors: Sequence[list[float]]
+) -> list[KnowledgeItem]:
+    """Persist already embedded knowledge items with large upserts."""
+
+    if not payloads:
+        return []
+    timestamp = datetime.utcnow()
+    client = get_vector_store()
+    await client.ensure_collection(vector_size=len(vectors[0]))
+
+    points = [
+        VectorStoreItem(
+            id=item_id,
+            payload={
+                "title": payload.title,
+                "text": payload.text,
+                "tags": payload.tags,
+                "source": payload.source,
+                "created_at": timestamp.isoformat(),
+                "created_ts": _timestamp(timestamp),
+            },
+            vector=vector,
+        )
+        for payload, item_id, vector in zip(payloads, item_ids, vectors)
+    ]
+    batch_size = max(1, get_settings().vector_upsert_batch_size)
+    for start in range(0, len(points), batch_size):
+        await client.upsert(points[start : start + batch_size])
+
+    return [
+        KnowledgeItem(
+            id=item_id,
+            title=payload.title,
+            text=payload.text,
+            tags=payload.tags,
+            source=payload.source,
+            created_at=timestamp,
+        )
+        for payload, item_id in zip(payloads, item_ids)
+    ]
+
+
+async def create_knowledge_item(payload: KnowledgeItemCreate, item_id: str) -> KnowledgeItem:
+    """Persist a knowledge item and return the stored representation."""
+
+    items = await create_knowledge_items([payload], [item_id])
+    return items[0]
@@ -0,0 +1 @@
+"""Offline load-testing harness with local stand-ins for every upstream service."""
@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+"""Local stand-ins for the Groq (OpenAI-compatible), ElevenLabs and Qdrant APIs."""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while latency budgets shrink and "
+    "throughput climbs as caches warm and queues drain"
+).split()
+
+
+@dataclass
+class MockProfile:
+    """Behaviour shared by every mock upstream."""
+
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    tokens_per_second: float = 200.0
+    reply_tokens: int = 120
+    bytes_per_second: float = 64_000.0
+    audio_bytes_per_char: int = 200
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: float | None = None
+    embedding_dim: int = 384
+    seed: int = 0
+
+
+class _Behaviour:
+    """Latency and error injection driven by a :class:`MockProfile`."""
+
+    def __init__(self, profile: MockProfile):
+        self.profile = profile
+        self.random = random.Random(profile.seed)
+
+    async def delay(self) -> None:
+        seconds = (self.profile.latency_ms + self.random.uniform(0, self.profile.jitter_ms)) / 1000
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def error(self) -> Response | None:
+        if self.profile.error_rate <= 0 or self.random.random() >= self.profile.error_rate:
+            return None
+        headers = {}
+        if self.profile.retry_after is not None:
+            headers["Retry-After"] = str(self.profile.retry_after)
+        return JSONResponse(
+            {"error": {"message": "injected failure", "type": "mock_error"}},
+            status_code=self.profile.error_status,
+            headers=headers,
+        )
+
+
+def _embedding(text: str, dim: int) -> list[float]:
+    """Deterministic pseudo-embedding: similar inputs share hashed word features."""
+
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def create_openai_app(profile: MockProfile) -> FastAPI:
+    """OpenAI-compatible chat completions, embeddings and transcriptions."""
+
+    app = FastAPI()
+    behaviour = _Behaviour(profile)
+
+    def _reply(seed: str) -> list[str]:
+        rng = random.Random(seed)
+        return [rng.choice(WORDS) + " " for _ in range(profile.reply_tokens)]
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        model = body.get("model", "mock")
+        tokens = _reply(json.dumps(body.get("messages", [])))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+                }
+            )
+
+        async def events() -> AsyncIterator[bytes]:
+            interval = 1 / profile.tokens_per_second if profile.tokens_per_second > 0 else 0
+            for index, token in enumerate(tokens + [None]):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": token} if token is not None else {},
+                            "finish_reason": None if token is not None else "stop",
+                        }
+                    ],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+                if interval and index:
+                    await asyncio.sleep(interval)
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/embeddings")
+    async def embeddings(request: Request) -> Response:
+        body = await request.json()
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return JSONResponse(
+            {
+                "object": "list",
+                "model": body.get("model", "mock"),
+                "data": [
+                    {"object": "embedding", "index": index, "embedding": _embedding(text, profile.embedding_dim)}
+                    for index, text in enumerate(inputs)
+                ],
+            }
+        )
+
+    @app.post("/audio/transcriptions")
+    async def transcriptions(request: Request) -> Response:
+        form = await request.form()
+        upload = form.get("file")
+        size = len(await upload.read()) if upload is not None and hasattr(upload, "read") else 0
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        words = max(1, size // 2000)
+        return JSONResponse({"text": " ".join(WORDS[i % len(WORDS)] for i in range(words))})
+
+    return app
+
+
+def create_elevenlabs_app(profile: MockProfile) -> FastAPI:
+    """ElevenLabs streaming text-to-speech endpoint returning paced filler bytes."""
+
+    app = FastAPI()
+    behaviour = _Behaviour(profile)
+    chunk_size = 4096
+
+    @app.post("/v1/text-to-speech/{voice_id}/stream")
+    async def stream_tts(voice_id: str, request: Request) -> Response:
+        body = await request.json()
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        total = max(chunk_size, len(body.get("text", "")) * profile.audio_bytes_per_char)
+
+        async def audio() -> AsyncIterator[bytes]:
+            interval = chunk_size / profile.bytes_per_second if profile.bytes_per_second > 0 else 0
+            sent = 0
+            while sent < total:
+                size = min(chunk_size, total - sent)
+                yield b"\xff" * size
+                sent += size
+                if interval and sent < total:
+                    await asyncio.sleep(interval)
+
+        return StreamingResponse(audio(), media_type="audio/mpeg")
+
+    return app
+
+
+def create_qdrant_app(profile: MockProfile) -> FastAPI:
+    """In-memory subset of the Qdrant REST API used by the vector store client."""
+
+    app = FastAPI()
+    behaviour = _Behaviour(profile)
+    collections: dict[str, dict[str, tuple[list[float], dict]]] = {}
+
+    def _unit(vector: list[float]) -> list[float]:
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    @app.put("/collections/{name}")
+    async def create_collection(name: str) -> Response:
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        if name in collections:
+            return JSONResponse({"status": {"error": "already exists"}}, status_code=409)
+        collections[name] = {}
+        return JSONResponse({"result": True, "status": "ok"})
+
+    @app.put("/collections/{name}/points")
+    async def upsert_points(name: str, request: Request) -> Response:
+        body = await request.json()
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        points = collections.setdefault(name, {})
+        for point in body.get("points", []):
+            points[str(point["id"])] = (_unit(point["vector"]), point.get("payload", {}))
+        return JSONResponse({"result": {"status": "completed"}, "status": "ok"})
+
+    def _matches(payload: dict, query_filter: dict | None) -> bool:
+        """Evaluate the subset of Qdrant filters the backend sends."""
+
+        if not query_filter:
+            return True
+
+        def condition(entry: dict) -> bool:
+            if any(clause in entry for clause in ("must", "should", "must_not")):
+                return _matches(payload, entry)
+            value = payload.get(entry["key"])
+            values = value if isinstance(value, list) else [value]
+            match = entry.get("match")
+            if match is not None:
+                if "value" in match:
+                    return match["value"] in values
+                if "any" in match:
+                    return any(item in values for item in match["any"])
+                return str(match["text"]).lower() in str(value or "").lower()
+            bounds = entry.get("range", {})
+            if not isinstance(value, (int, float)):
+                return False
+            return (
+                ("gt" not in bounds or value > bounds["gt"])
+                and ("gte" not in bounds or value >= bounds["gte"])
+                and ("lt" not in bounds or value < bounds["lt"])
+                and ("lte" not in bounds or value <= bounds["lte"])
+            )
+
+        should = query_filter.get("should") or []
+        return (
+            all(condition(entry) for entry in query_filter.get("must") or [])
+            and (not should or any(condition(entry) for entry in should))
+            and not any(condition(entry) for entry in query_filter.get("must_not") or [])
+        )
+
+    def _search(name: str, body: dict) -> list[dict]:
+        points = collections.get(name, {})
+        limit = int(body.get("limit", 10))
+        query = _unit(body["vector"])
+        ids = [point_id for point_id, (_, payload) in points.items() if _matches(payload, body.get("filter"))]
+        if not ids:
+            return []
+        if np is not None:
+            matrix = np.asarray([points[point_id][0] for point_id in ids], dtype=np.float32)
+            scores = (matrix @ np.asarray(query, dtype=np.float32)).tolist()
+        else:
+            scores = [sum(a * b for a, b in zip(points[point_id][0], query)) for point_id in ids]
+        ranked = sorted(zip(scores, ids), reverse=True)[:limit]
+        return [
+            {
+                "id": point_id,
+                "score": score,
+                "payload": points[point_id][1],
+                **({"vector": points[point_id][0]} if body.get("with_vector") else {}),
+            }
+            for score, point_id in ranked
+        ]
+
+    @app.put("/collections/{name}/index")
+    async def create_index(name: str) -> Response:
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        return JSONResponse({"result": {"status": "completed"}, "status": "ok"})
+
+    @app.post("/collections/{name}/points/search")
+    async def search_points(name: str, request: Request) -> Response:
+        body = await request.json()
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        return JSONResponse({"result": _search(name, body), "status": "ok"})
+
+    @app.post("/collections/{name}/points/search/batch")
+    async def search_batch(name: str, request: Request) -> Response:
+        body = await request.json()
+        await behaviour.delay()
+        if (failure := behaviour.error()) is not None:
+            return failure
+        return JSONResponse(
+            {"result": [_search(name, search) for search in body.get("searches", [])], "status": "ok"}
+        )
+
+    return app
+
+
+class LocalServer:
+    """Run an ASGI app with uvicorn on an ephemeral local port inside the current loop."""
+
+    def __init__(self, app, host: str = "127.0.0.1"):
+        config = uvicorn.Config(app, host=host, port=0, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.server.install_signal_handlers = lambda: None  # type: ignore[method-assign]
+        self.host = host
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://{self.host}:{port}"
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+
+    async def stop(self) -> None:
+        self.server.should_exit = True
+        if self._task is not None:
+            await self._task
+
+
+class MockUpstreams:
+    """Start the three mock upstreams for the duration of an ``async with`` block."""
+
+    def __init__(self, profile: MockProfile | None = None):
+        self.profile = profile or MockProfile()
+        self.openai = LocalServer(create_openai_app(self.profile))
+        self.elevenlabs = LocalServer(create_elevenlabs_app(self.profile))
+        self.qdrant = LocalServer(create_qdrant_app(self.profile))
+
+    async def __aenter__(self) -> "MockUpstreams":
+        for server in (self.openai, self.elevenlabs, self.qdrant):
+            await server.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        for server in (self.openai, self.elevenlabs, self.qdrant):
+            await server.stop()
+
+    def environment(self) -> dict[str, str]:
+        """Settings overrides pointing the backend at these mocks."""
+
+        return {
+            "GROQ_BASE_URL": self.openai.url,
+            "GROQ_API_KEY": "mock",
+            "ELEVENLABS_BASE_URL": self.elevenlabs.url,
+            "ELEVENLABS_API_KEY": "mock",
+            "VECTOR_STORE_URL": self.qdrant.url.replace("http://", "qdrant://", 1),
+        }
+
+
+def _parse_args(argv: list[str] | None = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the mock upstreams until interrupted.")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_profile_arguments(parser) -> None:
+    """Register command-line options for every :class:`MockProfile` field."""
+
+    defaults = MockProfile()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--reply-tokens", type=int, default=defaults.reply_tokens)
+    parser.add_argument("--bytes-per-second", type=float, default=defaults.bytes_per_second)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--embedding-dim", type=int, default=defaults.embedding_dim)
+
+
+def profile_from_args(args) -> MockProfile:
+    """Build a :class:`MockProfile` from parsed command-line arguments."""
+
+    return MockProfile(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        bytes_per_second=args.bytes_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        embedding_dim=args.embedding_dim,
+    )
+
+
+async def _serve_forever(profile: MockProfile) -> None:
+    async with MockUpstreams(profile) as mocks:
+        for name, value in mocks.environment().items():
+            print(f"{name}={value}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":  # pragma: no cover - manual entry point
+    try:
+        asyncio.run(_serve_forever(profile_from_args(_parse_args())))
+    except KeyboardInterrupt:
+        pass
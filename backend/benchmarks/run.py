@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+"""Load driver running benchmark scenarios against ``app.main:app`` with mocked upstreams.
+
+Usage::
+
+    python -m benchmarks.run --scenarios chat_stream,knowledge_search --requests 200 --concurrency 16
+
+The backend is served in-process by uvicorn on an ephemeral port. Its upstreams point at
+the mocks from :mod:`benchmarks.mocks`, and it uses a throwaway SQLite database and caches.
+Pass ``--target`` to benchmark an already running backend instead. That backend must be
+configured against mocks started with ``python -m benchmarks.mocks``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.mocks import LocalServer, MockUpstreams, add_profile_arguments, profile_from_args
+
+QUESTIONS = [
+    "How do I reset my password?",
+    "What are the opening hours of the support desk?",
+    "Summarise the refund policy in two sentences.",
+    "Which plans include priority support?",
+]
+
+
+@dataclass
+class Sample:
+    """Outcome of one scenario request."""
+
+    latency: float
+    ok: bool
+    first_byte: float | None = None
+    size: int = 0
+
+
+@dataclass
+class ScenarioReport:
+    """Aggregated results for one scenario."""
+
+    name: str
+    requests: int
+    errors: int
+    duration_s: float
+    throughput_rps: float
+    latency_ms: dict[str, float]
+    first_byte_ms: dict[str, float] = field(default_factory=dict)
+    bytes_per_s: float = 0.0
+    rss_peak_mb: float = 0.0
+    rss_growth_mb: float = 0.0
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))] * 1000
+
+    return {
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "mean": statistics.fmean(ordered) * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MiB, falling back to the peak where /proc is unavailable."""
+
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class _MemorySampler:
+    """Sample RSS periodically while a scenario runs."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.start = self.peak = _rss_mb()
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, _rss_mb())
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self) -> "_MemorySampler":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self.peak = max(self.peak, _rss_mb())
+
+
+# -- scenarios -------------------------------------------------------------------------
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[Sample]]
+
+
+async def _timed_stream(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Sample:
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    async with client.stream(method, url, **kwargs) as response:
+        async for chunk in response.aiter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+        ok = response.status_code < 400
+    return Sample(time.perf_counter() - started, ok, first_byte, size)
+
+
+async def _timed(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Sample:
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return Sample(time.perf_counter() - started, response.status_code < 400, size=len(response.content))
+
+
+async def _create_chats(client: httpx.AsyncClient, count: int) -> list[str]:
+    ids = []
+    for index in range(count):
+        response = await client.post("/chats/", json={"title": f"bench {index}"})
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def _wait_for_job(client: httpx.AsyncClient, response: httpx.Response) -> bool:
+    """Poll an accepted ingestion job until it finishes; return whether it succeeded."""
+
+    response.raise_for_status()
+    location = response.headers["Location"]
+    while True:
+        status = (await client.get(location)).json()["status"]
+        if status in ("succeeded", "failed"):
+            return status == "succeeded"
+        await asyncio.sleep(0.02)
+
+
+async def setup_chat_stream(client: httpx.AsyncClient, concurrency: int) -> Request:
+    chats = await _create_chats(client, concurrency)
+
+    async def request(client: httpx.AsyncClient, index: int) -> Sample:
+        chat_id = chats[index % len(chats)]
+        await client.post(
+            f"/chats/{chat_id}/messages",
+            json={"role": "user", "content": f"{QUESTIONS[index % len(QUESTIONS)]} #{index}"},
+        )
+        return await _timed_stream(client, "POST", f"/chats/{chat_id}/stream", params={"cache": "false"})
+
+    return request
+
+
+async def setup_knowledge_search(client: httpx.AsyncClient, concurrency: int) -> Request:
+    items = [
+        {"title": f"Doc {index}", "text": f"{QUESTIONS[index % len(QUESTIONS)]} answer {index}", "tags": ["bench"]}
+        for index in range(200)
+    ]
+    if not await _wait_for_job(client, await client.post("/knowledge/bulk", json=items)):
+        raise RuntimeError("Seeding the knowledge base failed")
+
+    async def request(client: httpx.AsyncClient, index: int) -> Sample:
+        # Unique queries so the embedding cache does not hide upstream latency.
+        query = f"{QUESTIONS[index % len(QUESTIONS)]} variant {index}"
+        return await _timed(client, "GET", "/knowledge/search", params={"query": query})
+
+    return request
+
+
+async def setup_bulk_ingest(client: httpx.AsyncClient, concurrency: int) -> Request:
+    run_id = uuid.uuid4().hex[:8]
+
+    async def request(client: httpx.AsyncClient, index: int) -> Sample:
+        items = [
+            {"title": f"Bulk {index}-{n}", "text": f"bulk {run_id} document {index} part {n}", "tags": ["bulk"]}
+            for n in range(50)
+        ]
+        # Ingestion runs in the background; measure until the job has finished.
+        started = time.perf_counter()
+        ok = await _wait_for_job(client, await client.post("/knowledge/bulk", json=items))
+        return Sample(time.perf_counter() - started, ok)
+
+    return request
+
+
+async def setup_tts(client: httpx.AsyncClient, concurrency: int) -> Request:
+    chats = await _create_chats(client, 1)
+
+    async def request(client: httpx.AsyncClient, index: int) -> Sample:
+        # Unique text so every request reaches the upstream instead of the audio cache.
+        text = f"{QUESTIONS[index % len(QUESTIONS)]} Reply number {index}."
+        return await _timed_stream(
+            client, "POST", f"/chats/{chats[0]}/speak", json={"role": "assistant", "content": text}
+        )
+
+    return request
+
+
+SCENARIOS: dict[str, Callable[[httpx.AsyncClient, int], Awaitable[Request]]] = {
+    "chat_stream": setup_chat_stream,
+    "knowledge_search": setup_knowledge_search,
+    "bulk_ingest": setup_bulk_ingest,
+    "tts": setup_tts,
+}
+
+
+async def run_scenario(
+    name: str, client: httpx.AsyncClient, requests: int, concurrency: int
+) -> ScenarioReport:
+    """Run ``requests`` calls of scenario ``name`` with ``concurrency`` workers."""
+
+    request = await SCENARIOS[name](client, concurrency)
+    samples: list[Sample] = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for index in counter:
+            try:
+                samples.append(await request(client, index))
+            except httpx.HTTPError:
+                samples.append(Sample(0.0, False))
+
+    with _MemorySampler() as memory:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - started
+
+    succeeded = [sample for sample in samples if sample.ok]
+    transferred = sum(sample.size for sample in succeeded)
+    return ScenarioReport(
+        name=name,
+        requests=len(samples),
+        errors=len(samples) - len(succeeded),
+        duration_s=duration,
+        throughput_rps=len(succeeded) / duration if duration else 0.0,
+        latency_ms=_percentiles([sample.latency for sample in succeeded]),
+        first_byte_ms=_percentiles([s.first_byte for s in succeeded if s.first_byte is not None]),
+        bytes_per_s=transferred / duration if duration else 0.0,
+        rss_peak_mb=memory.peak,
+        rss_growth_mb=memory.peak - memory.start,
+    )
+
+
+def _print_report(report: ScenarioReport) -> None:
+    latency = report.latency_ms
+    line = (
+        f"{report.name:<17} n={report.requests:<5} err={report.errors:<4} "
+        f"{report.throughput_rps:8.1f} req/s  "
+        f"p50={latency.get('p50', 0):7.1f}ms p95={latency.get('p95', 0):7.1f}ms "
+        f"p99={latency.get('p99', 0):7.1f}ms"
+    )
+    if report.first_byte_ms:
+        line += f"  ttfb p50={report.first_byte_ms['p50']:6.1f}ms"
+    line += f"  rss peak={report.rss_peak_mb:6.1f}MiB (+{report.rss_growth_mb:.1f})"
+    print(line)
+
+
+def _configure_backend(workdir: Path, upstreams: dict[str, str]) -> None:
+    """Point the backend at the mocks and at throwaway local state."""
+
+    overrides = {
+        **upstreams,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir / 'bench.db'}",
+        "EMBEDDING_CACHE_PATH": "",
+        "TTS_CACHE_DIR": str(workdir / "tts_cache"),
+        # The mocks are not rate limited; measure the backend rather than the scheduler's pacing.
+        "GROQ_REQUESTS_PER_SECOND": "0",
+        "ELEVENLABS_REQUESTS_PER_SECOND": "0",
+        "VECTOR_STORE_REQUESTS_PER_SECOND": "0",
+    }
+    for key, value in overrides.items():
+        os.environ.setdefault(key, value)
+
+
+async def main_async(args: argparse.Namespace) -> list[ScenarioReport]:
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    reports: list[ScenarioReport] = []
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.target:
+        async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=timeout) as client:
+            for name in names:
+                reports.append(await run_scenario(name, client, args.requests, args.concurrency))
+                _print_report(reports[-1])
+        return reports
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        async with MockUpstreams(profile_from_args(args)) as mocks:
+            _configure_backend(Path(workdir), mocks.environment())
+            from app.main import app
+
+            backend = LocalServer(app)
+            await backend.start()
+            try:
+                async with httpx.AsyncClient(base_url=backend.url, limits=limits, timeout=timeout) as client:
+                    for name in names:
+                        reports.append(await run_scenario(name, client, args.requests, args.concurrency))
+                        _print_report(reports[-1])
+            finally:
+                await backend.stop()
+    return reports
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run backend benchmark scenarios against mock upstreams.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names.")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent workers per scenario.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--target", help="Base URL of an already running backend.")
+    parser.add_argument("--json", type=Path, help="Write the reports to this file as JSON.")
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    reports = asyncio.run(main_async(args))
+    if args.json:
+        args.json.write_text(json.dumps([asdict(report) for report in reports], indent=2))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual entry point
+    main()
@@ -0,0 +1,62 @@
+"""Add per-chat message sequence numbers and history indexes.
+
+Revision ID: 0002_message_seq_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002_message_seq_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("chats") as batch:
+        batch.add_column(sa.Column("last_seq", sa.Integer(), nullable=False, server_default="0"))
+        batch.create_index("ix_chats_created_at", ["created_at"])
+
+    with op.batch_alter_table("messages") as batch:
+        batch.add_column(sa.Column("seq", sa.Integer(), nullable=True))
+
+    # Number existing messages in timestamp order, breaking ties by ID.
+    op.execute(
+        """
+        UPDATE messages SET seq = (
+            SELECT COUNT(*) FROM messages AS earlier
+            WHERE earlier.chat_id = messages.chat_id
+              AND (
+                earlier.created_at < messages.created_at
+                OR (earlier.created_at = messages.created_at AND earlier.id <= messages.id)
+              )
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE chats SET last_seq = COALESCE(
+            (SELECT MAX(seq) FROM messages WHERE messages.chat_id = chats.id), 0
+        )
+        """
+    )
+
+    with op.batch_alter_table("messages") as batch:
+        batch.alter_column("seq", existing_type=sa.Integer(), nullable=False)
+        batch.create_index("ix_messages_chat_id_seq", ["chat_id", "seq"], unique=True)
+        batch.create_index("ix_messages_chat_id_created_at", ["chat_id", "created_at"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("messages") as batch:
+        batch.drop_index("ix_messages_chat_id_created_at")
+        batch.drop_index("ix_messages_chat_id_seq")
+        batch.drop_column("seq")
+
+    with op.batch_alter_table("chats") as batch:
+        batch.drop_index("ix_chats_created_at")
+        batch.drop_column("last_seq")
@@ -0,0 +1,37 @@
+"""Add rolling chat summaries and cached message token counts.
+
+Revision ID: 0003_context_summaries
+Revises: 0002_message_seq_indexes
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003_context_summaries"
+down_revision = "0002_message_seq_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("chats") as batch:
+        batch.add_column(sa.Column("summary", sa.Text(), nullable=True))
+        batch.add_column(sa.Column("summary_seq", sa.Integer(), nullable=False, server_default="0"))
+
+    with op.batch_alter_table("messages") as batch:
+        batch.add_column(sa.Column("token_count", sa.Integer(), nullable=True))
+
+    # Same four-characters-per-token estimate used by app.services.tokens.
+    op.execute("UPDATE messages SET token_count = (LENGTH(content) + 3) / 4")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("messages") as batch:
+        batch.drop_column("token_count")
+
+    with op.batch_alter_table("chats") as batch:
+        batch.drop_column("summary_seq")
+        batch.drop_column("summary")
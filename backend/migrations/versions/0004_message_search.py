@@ -0,0 +1,93 @@
+"""Add full-text search indexes over message content.
+
+SQLite gets an external-content FTS5 table keyed by the messages rowid;
+PostgreSQL gets a ``tsvector`` column with a GIN index. Both are maintained
+by triggers, so every write path stays in sync without application code.
+
+``0008_message_search_keys`` replaces the rowid key on SQLite with a stable
+integer key, because ``VACUUM`` and table rebuilds may renumber rowids.
+
+Revision ID: 0004_message_search
+Revises: 0003_context_summaries
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0004_message_search"
+down_revision = "0003_context_summaries"
+branch_labels = None
+depends_on = None
+
+# Text search configuration; must match app.services.message_search.TS_CONFIG.
+TS_CONFIG = "english"
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE messages_fts USING fts5(
+        content, content='messages', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS messages_fts_update",
+    "DROP TRIGGER IF EXISTS messages_fts_delete",
+    "DROP TRIGGER IF EXISTS messages_fts_insert",
+    "DROP TABLE IF EXISTS messages_fts",
+]
+
+POSTGRES_UPGRADE = [
+    "ALTER TABLE messages ADD COLUMN content_tsv tsvector",
+    f"UPDATE messages SET content_tsv = to_tsvector('{TS_CONFIG}', content)",
+    "CREATE INDEX ix_messages_content_tsv ON messages USING GIN (content_tsv)",
+    f"""
+    CREATE TRIGGER messages_content_tsv_update
+    BEFORE INSERT OR UPDATE OF content ON messages
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(content_tsv, 'pg_catalog.{TS_CONFIG}', content)
+    """,
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS messages_content_tsv_update ON messages",
+    "DROP INDEX IF EXISTS ix_messages_content_tsv",
+    "ALTER TABLE messages DROP COLUMN IF EXISTS content_tsv",
+]
+
+
+def _statements(sqlite: list[str], postgres: list[str]) -> list[str]:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite
+    if dialect == "postgresql":
+        return postgres
+    return []
+
+
+def upgrade() -> None:
+    for statement in _statements(SQLITE_UPGRADE, POSTGRES_UPGRADE):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in _statements(SQLITE_DOWNGRADE, POSTGRES_DOWNGRADE):
+        op.execute(statement)
@@ -0,0 +1,49 @@
+"""Add the chat memory bookkeeping columns.
+
+The model gained these columns before migrations existed, so databases
+bootstrapped by ``metadata.create_all`` in that window (and databases built
+by an earlier revision of ``0001_baseline``) already have them; only
+missing columns are added.
+
+Revision ID: 0006_chat_memory_columns
+Revises: 0005_ingest_jobs
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006_chat_memory_columns"
+down_revision = "0005_ingest_jobs"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    sa.Column("memory_watermark", sa.String(), nullable=True),
+    sa.Column("memory_restart_id", sa.String(), nullable=True),
+    sa.Column("memory_chunk_count", sa.Integer(), nullable=False, server_default="0"),
+]
+
+
+def _existing() -> set[str]:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns("chats")}
+
+
+def upgrade() -> None:
+    existing = _existing()
+    missing = [column for column in COLUMNS if column.name not in existing]
+    if not missing:
+        return
+    with op.batch_alter_table("chats") as batch:
+        for column in missing:
+            batch.add_column(column)
+
+
+def downgrade() -> None:
+    existing = _existing()
+    with op.batch_alter_table("chats") as batch:
+        for column in reversed(COLUMNS):
+            if column.name in existing:
+                batch.drop_column(column.name)
@@ -0,0 +1,28 @@
+"""Record where the last chat memory chunk starts within its first message.
+
+Revision ID: 0007_memory_restart_offset
+Revises: 0006_chat_memory_columns
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007_memory_restart_offset"
+down_revision = "0006_chat_memory_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("chats") as batch:
+        batch.add_column(
+            sa.Column("memory_restart_offset", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("chats") as batch:
+        batch.drop_column("memory_restart_offset")
@@ -0,0 +1,118 @@
+"""Key the SQLite message search index by a stable integer.
+
+``0004_message_search`` keyed ``messages_fts`` by the implicit rowid of
+``messages``, whose primary key is a string. ``VACUUM`` and table rebuilds
+may renumber such rowids, leaving the index pointing at the wrong messages.
+Each message now gets an ``INTEGER PRIMARY KEY`` in ``messages_fts_keys``,
+which SQLite never renumbers, and the index reads content through the
+``messages_fts_source`` view joined on that key.
+
+Migrations that rebuild ``messages`` on SQLite still drop the triggers and
+must recreate them, but the keys survive, so no reindex is needed.
+
+PostgreSQL stores its ``tsvector`` on the message row itself, so nothing
+changes there.
+
+Revision ID: 0008_message_search_keys
+Revises: 0007_memory_restart_offset
+Create Date: 2026-10-17
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0008_message_search_keys"
+down_revision = "0007_memory_restart_offset"
+branch_labels = None
+depends_on = None
+
+_DROP_INDEX = [
+    "DROP TRIGGER IF EXISTS messages_fts_update",
+    "DROP TRIGGER IF EXISTS messages_fts_delete",
+    "DROP TRIGGER IF EXISTS messages_fts_insert",
+    "DROP TABLE IF EXISTS messages_fts",
+]
+
+_KEY = "(SELECT key FROM messages_fts_keys WHERE message_id = {row}.id)"
+
+SQLITE_UPGRADE = _DROP_INDEX + [
+    """
+    CREATE TABLE messages_fts_keys (
+        key INTEGER PRIMARY KEY,
+        message_id VARCHAR NOT NULL UNIQUE
+    )
+    """,
+    "INSERT INTO messages_fts_keys (message_id) SELECT id FROM messages ORDER BY rowid",
+    """
+    CREATE VIEW messages_fts_source AS
+    SELECT k.key AS key, m.content AS content
+    FROM messages_fts_keys AS k JOIN messages AS m ON m.id = k.message_id
+    """,
+    """
+    CREATE VIRTUAL TABLE messages_fts USING fts5(
+        content, content='messages_fts_source', content_rowid='key', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts_keys (message_id) VALUES (new.id);
+        INSERT INTO messages_fts(rowid, content) VALUES ({_KEY.format(row="new")}, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', {_KEY.format(row="old")}, old.content);
+        DELETE FROM messages_fts_keys WHERE message_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', {_KEY.format(row="old")}, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES ({_KEY.format(row="new")}, new.content);
+    END
+    """,
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+]
+
+# Restores the 0004_message_search layout.
+SQLITE_DOWNGRADE = _DROP_INDEX + [
+    "DROP VIEW IF EXISTS messages_fts_source",
+    "DROP TABLE IF EXISTS messages_fts_keys",
+    """
+    CREATE VIRTUAL TABLE messages_fts USING fts5(
+        content, content='messages', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
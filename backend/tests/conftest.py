@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+"""Shared fixtures for the backend tests."""
+
+import pytest
+
+from app import database
+from app.config import get_settings
+
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    """Point the app at a throwaway SQLite database with fresh engines."""
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    get_settings.cache_clear()
+    for name in ("_engine", "_session_factory", "_read_engine", "_read_session_factory"):
+        monkeypatch.setattr(database, name, None)
+    yield
+    get_settings.cache_clear()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+"""Tests for chat history import."""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def _ndjson(*records: dict) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+
+def test_import_into_existing_chat_advances_sequence(sqlite_database):
+    with TestClient(app) as client:
+        chat_id = client.post("/chats/", json={"title": "Existing"}).json()["id"]
+        body = _ndjson(
+            {"type": "chat", "id": chat_id, "title": "Existing"},
+            *(
+                {"type": "message", "chat_id": chat_id, "id": f"m{seq}", "seq": seq, "role": "user", "content": "hi"}
+                for seq in (1, 2)
+            ),
+        )
+
+        imported = client.post("/chats/import", content=body)
+        assert imported.status_code == 200
+        assert imported.json() == {"chats": 0, "messages": 2, "skipped_chats": 1, "skipped_messages": 0}
+
+        posted = client.post(f"/chats/{chat_id}/messages", json={"role": "user", "content": "after import"})
+        assert posted.status_code == 200
+        assert posted.json()["seq"] == 3
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+"""Tests for the durable job worker pool."""
+
+import asyncio
+
+import pytest
+
+from app import database
+from app.services import jobs
+
+
+@pytest.fixture
+def job_database(sqlite_database):
+    """Migrate the throwaway database used by the worker pool."""
+
+    async def migrate() -> None:
+        database._create_engine()
+        async with database._engine.begin() as connection:
+            await connection.run_sync(database.run_migrations)
+
+    asyncio.run(migrate())
+    yield
+    asyncio.run(database._engine.dispose())
+
+
+async def _wait_for(job_ids: list[str], timeout: float = 5.0) -> list[str]:
+    async def statuses() -> list[str]:
+        return [(await jobs.get_job(job_id)).status for job_id in job_ids]
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        current = await statuses()
+        if all(status in (jobs.SUCCEEDED, jobs.FAILED) for status in current):
+            return current
+        await asyncio.sleep(0.01)
+    return await statuses()
+
+
+async def _echo(context: jobs.JobContext) -> dict:
+    return context.payload
+
+
+def test_worker_survives_a_failed_claim(job_database, monkeypatch):
+    monkeypatch.setitem(jobs._handlers, "test_echo", _echo)
+    pool = jobs.JobWorkerPool(1, poll_interval=0.01)
+    claim = pool._claim
+    failures: list[Exception] = []
+
+    async def flaky_claim():
+        if not failures:
+            failures.append(RuntimeError("database is locked"))
+            raise failures[0]
+        return await claim()
+
+    monkeypatch.setattr(pool, "_claim", flaky_claim)
+
+    async def scenario() -> list[str]:
+        pool.start()
+        try:
+            submitted = [await jobs.submit_job("test_echo", {"n": n}) for n in range(2)]
+            pool.wake()
+            statuses = await _wait_for([job.id for job in submitted])
+            assert not any(task.done() for task in pool._tasks)
+            return statuses
+        finally:
+            await pool.stop()
+
+    assert asyncio.run(scenario()) == [jobs.SUCCEEDED, jobs.SUCCEEDED]
+    assert len(failures) == 1
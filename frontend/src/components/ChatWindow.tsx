@@ -1,4 +1,5 @@
 import { FormEvent, useMemo, useState } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
 import { SendHorizonal, AudioLines, Sparkle } from 'lucide-react';
 import clsx from 'clsx';
 
@@ -20,7 +21,7 @@ function ChatWindow({ chatId }: Props) {
   const [isStreaming, setIsStreaming] = useState(false);
   const { data: messages, isLoading, isError } = useChatMessages(chatId);
   const userMessageMutation = useSendMessage(chatId);
-  const assistantMessageMutation = useSendMessage(chatId);
+  const queryClient = useQueryClient();
 
   const displayMessages = useMemo(() => {
     if (!streamingContent) {
@@ -49,15 +50,14 @@ function ChatWindow({ chatId }: Props) {
 
       setIsStreaming(true);
       setStreamingContent('');
-      const assistantReply = await streamCompletion(chatId, {
+      // The backend persists the assembled reply once the stream completes.
+      await streamCompletion(chatId, {
         onToken: (token) => {
           setStreamingContent((prev) => (prev ?? '') + token);
         },
       });
-
-      if (assistantReply.trim()) {
-        await assistantMessageMutation.mutateAsync({ role: 'assistant', content: assistantReply });
-      }
+      await queryClient.invalidateQueries({ queryKey: ['chats', chatId, 'messages'] });
+      queryClient.invalidateQueries({ queryKey: ['chats'] });
     } catch (error) {
       console.error('Unable to send message', error);
     } finally {
@@ -6,6 +6,7 @@ export interface Message {
   id: string;
   role: string;
   content: string;
+  seq?: number;
   created_at: string;
   audio_url?: string | null;
 }
@@ -17,13 +18,28 @@ export interface Chat {
   messages: Message[];
 }
 
+export interface ChatSummary {
+  id: string;
+  title: string;
+  created_at: string;
+  message_count: number;
+  last_message_preview?: string | null;
+  last_activity_at: string;
+}
+
+interface Page<T> {
+  items: T[];
+  next_cursor?: string | null;
+}
+
 export function useChats() {
-  return useQuery<Chat[]>({
+  return useQuery<ChatSummary[]>({
     queryKey: ['chats'],
     queryFn: async () => {
       const response = await fetch(`${API_BASE}/chats/`);
       if (!response.ok) throw new Error('Unable to load chats');
-      return response.json();
+      const page: Page<ChatSummary> = await response.json();
+      return page.items;
     },
   });
 }
@@ -50,9 +66,17 @@ export function useChatMessages(chatId: string | undefined) {
     enabled: Boolean(chatId),
     queryFn: async () => {
       if (!chatId) throw new Error('Chat ID is required');
-      const response = await fetch(`${API_BASE}/chats/${chatId}/messages`);
-      if (!response.ok) throw new Error('Unable to load messages');
-      return response.json();
+      const messages: Message[] = [];
+      let cursor: string | null | undefined;
+      do {
+        const query = cursor ? `?limit=500&cursor=${encodeURIComponent(cursor)}` : '?limit=500';
+        const response = await fetch(`${API_BASE}/chats/${chatId}/messages${query}`);
+        if (!response.ok) throw new Error('Unable to load messages');
+        const page: Page<Message> = await response.json();
+        messages.push(...page.items);
+        cursor = page.next_cursor;
+      } while (cursor);
+      return messages;
     },
   });
 }
@@ -112,6 +136,30 @@ export async function streamCompletion(
   let buffer = '';
   let accumulated = '';
 
+  // Frames are `data: {"d": "<text>"}`; the stream ends with `event: done`.
+  const handleEvent = (rawEvent: string): boolean => {
+    let eventName = 'message';
+    let data = '';
+    for (const line of rawEvent.split('\n')) {
+      if (line.startsWith('event:')) eventName = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    }
+    if (eventName === 'done') return true;
+    if (!data) return false;
+
+    try {
+      const parsed = JSON.parse(data);
+      const deltaContent: string | undefined = parsed?.d;
+      if (deltaContent) {
+        accumulated += deltaContent;
+        options?.onToken?.(deltaContent);
+      }
+    } catch (error) {
+      console.error('Unable to parse streaming chunk', error);
+    }
+    return false;
+  };
+
   try {
     for (;;) {
       const { value, done } = await reader.read();
@@ -125,51 +173,15 @@ export async function streamCompletion(
       while (eventBoundary !== -1) {
         const rawEvent = buffer.slice(0, eventBoundary).trim();
         buffer = buffer.slice(eventBoundary + 2);
-
-        if (!rawEvent.startsWith('data:')) {
-          eventBoundary = buffer.indexOf('\n\n');
-          continue;
-        }
-
-        const payload = rawEvent.slice(5).trim();
-        if (!payload) {
-          eventBoundary = buffer.indexOf('\n\n');
-          continue;
+        if (rawEvent && handleEvent(rawEvent)) {
+          return accumulated;
         }
-
-        try {
-          const parsed = JSON.parse(payload);
-          const choice = parsed?.choices?.[0];
-          const deltaContent: string | undefined = choice?.delta?.content;
-          const finishReason: string | null | undefined = choice?.finish_reason;
-
-          if (deltaContent) {
-            accumulated += deltaContent;
-            options?.onToken?.(deltaContent);
-          }
-
-          if (finishReason) {
-            return accumulated;
-          }
-        } catch (error) {
-          console.error('Unable to parse streaming chunk', error);
-        }
-
         eventBoundary = buffer.indexOf('\n\n');
       }
     }
 
-    if (buffer) {
-      try {
-        const parsed = JSON.parse(buffer.replace(/^data:\s*/, ''));
-        const deltaContent: string | undefined = parsed?.choices?.[0]?.delta?.content;
-        if (deltaContent) {
-          accumulated += deltaContent;
-          options?.onToken?.(deltaContent);
-        }
-      } catch (error) {
-        console.error('Unable to parse trailing streaming chunk', error);
-      }
+    if (buffer.trim()) {
+      handleEvent(buffer.trim());
     }
 
     return accumulated;